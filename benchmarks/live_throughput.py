@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""
+This script measures the throughput ceiling of the live stack against a local stand-in server.
+
+A 'stand_in_server' publishes synthetic ticks for the given currency pairs at the requested rate
+(0 = as fast as possible) and a 'DWX_ZeroMQ_Connector' subscribes to them exactly like the live
+simulator does. The publisher replaces bid/ask with sequence numbers, so the script reports the
+received ticks per second, the share of dropped ticks and the publish-to-handler latency. A HIST
+request of one day of 1-min candles is timed as well.
+
+Usage:
+      python benchmarks/live_throughput.py [options]
+
+Options:
+      -cps, --currency_pairs: symbols to publish, separated by a white blanc character (space).
+
+      -r, --rate            : number of ticks published per second, 0 publishes as fast as possible.
+
+      -s, --seconds         : duration of the measurement in seconds.
+
+      -bp, --base_port      : first of the 3 consecutive ports used by the stand-in server.
+
+      -rx, --reactor        : boolean flag, if True, the connector runs in reactor mode (blocks only
+                              in poll() and drains all ready messages without sleeping).
+
+      -cf, --conflate       : boolean flag, if True, the connector handles only the latest of the ready
+                              ticks of every symbol, the report counts handled ticks and the age of
+                              the quotes the handler sees.
+"""
+
+import argparse
+from time import sleep, monotonic_ns
+import numpy as np
+import pandas as pd
+from fxmanager.dwx.stand_in_server import stand_in_server
+from fxmanager.dwx.DWX_ZeroMQ_Connector_v2_0_1_RC8 import DWX_ZeroMQ_Connector
+
+class tick_counter():
+    """
+    SUB handler that keeps the receipt time of every sequence number.
+    """
+
+    def __init__(self):
+        self._seq = []
+        self._recv_ns = []
+        self._hist_ns = None
+
+    def onSubData(self, msg):
+        self._recv_ns.append(monotonic_ns())
+        self._seq.append(int(float(msg.split(' ')[1].split(';')[0])))
+
+    def onPullData(self, data):
+        if data.get('_action') == 'HIST':
+            self._hist_ns = monotonic_ns()
+
+def synthetic_history(currency_pair, day='2021.10.11'):
+    times = pd.date_range(day.replace('.', '-'), freq='min', periods=1440).strftime('%Y.%m.%d %H:%M')
+    close = 1.1 + np.cumsum(np.random.default_rng(0).normal(0, 1e-5, 1440))
+    return pd.DataFrame({'time': times, 'open': close, 'high': close + 1e-5, 'low': close - 1e-5, 'close': close,
+                         'tick_volume': 1, 'spread': 0, 'real_volume': 0})
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-cps','--currency_pairs', type=str, nargs='+', default = ['EURUSD', 'GBPUSD', 'USDJPY'])
+parser.add_argument('-r','--rate', type=float, default = 0)
+parser.add_argument('-s','--seconds', type=float, default = 5)
+parser.add_argument('-bp','--base_port', type=int, default = 42768)
+parser.add_argument('-rx','--reactor', default=False, action='store_true')
+parser.add_argument('-cf','--conflate', default=False, action='store_true')
+in_args = parser.parse_args()
+
+ports = {'_PUSH_PORT': in_args.base_port, '_PULL_PORT': in_args.base_port + 1, '_SUB_PORT': in_args.base_port + 2}
+ticks = {cp: np.column_stack([np.arange(10000.0), np.arange(10000.0)]) for cp in in_args.currency_pairs}
+history = {cp: synthetic_history(cp) for cp in in_args.currency_pairs}
+
+server = stand_in_server(_ticks=ticks, _history=history, _rate=in_args.rate, _sequence=True, **ports)
+server.run()
+
+counter = tick_counter()
+zmq_connector = DWX_ZeroMQ_Connector(_pulldata_handlers=[counter], _subdata_handlers=[counter], _verbose=False,
+                                     _reactor=in_args.reactor, _conflate=in_args.conflate, **ports)
+sleep(0.5)
+
+# HIST round trip
+t = monotonic_ns()
+zmq_connector._DWX_MTX_SEND_HIST_REQUEST_(_symbol=in_args.currency_pairs[0], _timeframe=1,
+                                          _start='2021.10.11 00:00:00', _end='2021.10.11 23:59:00')
+while counter._hist_ns is None:
+    sleep(0.001)
+hist_ms = (counter._hist_ns - t) / 1e6
+
+# Tick throughput
+for cp in in_args.currency_pairs:
+    zmq_connector._DWX_MTX_SUBSCRIBE_MARKETDATA_(cp)
+zmq_connector._DWX_MTX_SEND_TRACKPRICES_REQUEST_(in_args.currency_pairs)
+sleep(0.5)
+first = len(counter._seq)
+t = monotonic_ns()
+sleep(in_args.seconds)
+elapsed = (monotonic_ns() - t) / 1e9
+last = len(counter._seq)
+
+seq = np.array(counter._seq[first:last])
+recv_ns = np.array(counter._recv_ns[first:last])
+sent_ns = np.array(server._sent_ns)
+published = seq.max() - seq.min() + 1 if len(seq) else 0
+latency_us = (recv_ns - sent_ns[seq]) / 1e3 if len(seq) else np.array([np.nan])
+
+zmq_connector._DWX_ZMQ_SHUTDOWN_()
+server.stop()
+
+print('\n-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> HIST round trip (1440 candles): {hist_ms:.1f} ms')
+print(f'>> BENCHMARK >> Received ticks per second    : {len(seq) / elapsed:,.0f}')
+print(f'>> BENCHMARK >> {"Conflated ticks  " if in_args.conflate else "Dropped ticks    "}            : {100 * (1 - len(seq) / max(published, 1)):.2f}%')
+print(f'>> BENCHMARK >> Latency p50 / p99 / max (us) : {np.percentile(latency_us, 50):,.0f} / {np.percentile(latency_us, 99):,.0f} / {latency_us.max():,.0f}')
+print('-----------------------------------------------------------------------------------------------------------')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+This script compares the PULL message parser of the DWX connector with the former 'eval()' path.
+
+HIST replies of 1 day, 1 week and 1 month of 1-min candles are built in the format the EA (and the
+stand-in server) sends, together with a few small command replies. Every payload is parsed with
+'eval()' + 'pandas.DataFrame()' and with 'parse_message()' + 'pandas.DataFrame()', the results are
+checked to be equal and the best time of each path is reported.
+
+Usage:
+      python benchmarks/message_parsing.py [options]
+
+Options:
+      -r, --repeat: number of timed runs per payload (the best one is reported).
+"""
+
+import argparse
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from fxmanager.dwx.message_parser import parse_message
+
+def hist_payload(n_candles, symbol='EURUSD_M1'):
+    times = pd.date_range('2021-10-11', freq='min', periods=n_candles).strftime('%Y.%m.%d %H:%M')
+    close = 1.1 + np.cumsum(np.random.default_rng(0).normal(0, 1e-5, n_candles)).round(5)
+    records = ["{'time':'" + t + "', 'open':" + repr(c) + ", 'high':" + repr(round(c + 1e-4, 5)) + ", 'low':" + repr(round(c - 1e-4, 5)) +
+               ", 'close':" + repr(c) + ", 'tick_volume':" + str(i % 97) + ", 'spread':" + str(i % 3) + ", 'real_volume':0}"
+               for i, (t, c) in enumerate(zip(times, close.tolist()))]
+    return "{'_action': 'HIST', '_symbol': '" + symbol + "', '_data': [" + ", ".join(records) + "]}"
+
+def best_time(func, msg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t = perf_counter()
+        func(msg)
+        best = min(best, perf_counter() - t)
+    return best
+
+def with_eval(msg):
+    data = eval(msg)
+    if '_data' in data and isinstance(data['_data'], list):
+        pd.DataFrame(data['_data'])
+    return data
+
+def with_parser(msg):
+    data = parse_message(msg)
+    if '_data' in data and isinstance(data['_data'], dict):
+        pd.DataFrame(data['_data'])
+    return data
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-r','--repeat', type=int, default = 5)
+in_args = parser.parse_args()
+
+payloads = {'HIST 1 day (1440 candles)': hist_payload(1440),
+            'HIST 1 week (10080 candles)': hist_payload(10080),
+            'HIST 1 month (43200 candles)': hist_payload(43200),
+            'EXECUTION': "{'_action': 'EXECUTION', '_magic': 123456, '_ticket': 1, '_open_time': '2021.10.11 10:00:00', '_open_price': 1.15432}",
+            'OPEN_TRADES (20 trades)': "{'_action': 'OPEN_TRADES', '_trades': {" + ", ".join(
+                str(t) + ": {'_magic': 123456, '_symbol': 'EURUSD', '_lots': 0.01, '_type': 0, '_open_price': 1.15432, "
+                "'_open_time': '2021.10.11 10:00:00', '_SL': 500, '_TP': 500, '_pnl': 0.0, '_comment': 'fxmanager'}" for t in range(20)) + "}}"}
+
+print('\n-----------------------------------------------------------------------------------------------------------')
+print(f"{'payload':<30}{'size (KB)':>12}{'eval (ms)':>14}{'parser (ms)':>14}{'speedup':>10}")
+for name, msg in payloads.items():
+    expected, result = eval(msg), parse_message(msg)
+    if isinstance(result.get('_data'), dict):
+        assert pd.DataFrame(result['_data']).equals(pd.DataFrame(expected['_data'])), name
+    else:
+        assert result == expected, name
+    t_eval = best_time(with_eval, msg, in_args.repeat)
+    t_parser = best_time(with_parser, msg, in_args.repeat)
+    print(f'{name:<30}{len(msg) / 1024:>12,.1f}{t_eval * 1e3:>14,.3f}{t_parser * 1e3:>14,.3f}{t_eval / t_parser:>9,.1f}x')
+print('-----------------------------------------------------------------------------------------------------------')
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+"""
+This script measures the preprocessing helpers of 'fxmanager.basic.util' on synthetic data.
+
+A day of Bid/Ask ticks (one million by default, with a gap of no ticks to produce empty candles)
+is grouped into 1 to 10 minute candles by 'process_daily_bid_ask' and by the former loop over
+'pd.Grouper' sub-dataframes, the outputs are checked to be identical (the random price samples
+are left out) and both are timed. The same is done for a day of 1-min OHLC candles with
+'process_ohlc', and the time of preprocessing 17 currency pairs x 250 days of candles is
+extrapolated from it. Both are also timed when all the timeframes are computed in a single pass
+('process_daily_bid_ask_time_frames' and 'process_ohlc_time_frames'). Finally the dates of the ticks
+are parsed from their strings by 'pd.to_datetime' and by 'parse_times', and a day of 1-min candles
+with missing minutes is placed in its 1440 minutes by 'reindex' + 'bfill' and by 'reindex_minutes'
+('fxmanager.basic.times'), the outputs are checked to be identical and both are timed.
+
+Usage:
+      python benchmarks/preprocessing.py [options]
+
+Options:
+      -n, --ticks      : number of ticks of the synthetic day.
+
+      -tfs, --timeframes: number of timeframes (1min to <tfs>min).
+"""
+
+import argparse
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from fxmanager.basic.util import process_daily_bid_ask, process_ohlc, process_daily_bid_ask_time_frames, process_ohlc_time_frames
+from fxmanager.basic.times import NS_PER_DAY, parse_times, reindex_minutes
+
+def reference_returns(dataframe, bid_high, ask_low, bid_low, ask_high):
+    """
+    the former per candle best/worst returns (the order of the extremes decides between a buy and a sell).
+    """
+    if bid_high[0] > ask_low[0]:
+        if max(dataframe[bid_high[1]].idxmax(), dataframe[ask_low[1]].idxmin()) == dataframe[bid_high[1]].idxmax():
+            return (bid_high[0]-ask_low[0]) / ask_low[0], (bid_low[0]-ask_high[0]) / bid_low[0]
+        return (bid_high[0]-ask_low[0]) / bid_high[0], (bid_low[0]-ask_high[0]) / ask_high[0]
+    if max(dataframe[bid_low[1]].idxmin(), dataframe[ask_high[1]].idxmax()) == dataframe[bid_low[1]].idxmin():
+        return 0, (bid_low[0]-ask_high[0]) / bid_low[0]
+    return 0, (bid_low[0]-ask_high[0]) / ask_high[0]
+
+def reference_process_daily_bid_ask(df, tf):
+    """
+    the former implementation (loop over the sub-dataframes of pd.Grouper), price samples are left out as they are random.
+    """
+    ask_open, bid_open, ask_close, bid_close, best_rets, wrst_rets, tick_volume = [], [], [], [], [], [], []
+    grouped = pd.DataFrame(df.groupby(pd.Grouper(freq=tf)), columns=['time', 'sub_dataframes'])
+    for dataframe in grouped['sub_dataframes']:
+        tick_volume.append(dataframe.shape[0])
+        if dataframe.shape[0] != 0:
+            ask_open.append(dataframe['ask'].iloc[0])
+            bid_open.append(dataframe['bid'].iloc[0])
+            ask_close.append(dataframe['ask'].iloc[-1])
+            bid_close.append(dataframe['bid'].iloc[-1])
+            best, wrst = reference_returns(dataframe, (dataframe['bid'].max(), 'bid'), (dataframe['ask'].min(), 'ask'),
+                                           (dataframe['bid'].min(), 'bid'), (dataframe['ask'].max(), 'ask'))
+        else:
+            ask_open.append(ask_close[-1])
+            bid_open.append(bid_close[-1])
+            ask_close.append(ask_close[-1])
+            bid_close.append(bid_close[-1])
+            best, wrst = 0, (bid_close[-1]-ask_close[-1]) / bid_close[-1]
+        best_rets.append(best)
+        wrst_rets.append(wrst)
+    return pd.DataFrame({'best_rets':np.array(best_rets, dtype=np.float64), 'wrst_rets':wrst_rets, 'ask_open':ask_open, 'bid_open':bid_open,
+                         'ask_close':ask_close, 'bid_close':bid_close, 'tick_volume':tick_volume},
+                        index=pd.to_datetime(grouped['time']))
+
+def reference_process_ohlc(df, tf):
+    """
+    the former implementation (loop over the sub-dataframes of pd.Grouper), price samples are left out as they are random.
+    """
+    l = df['low']
+    h = df['high']
+    gamma = (np.log(h.rolling(2).max()/l.rolling(2).min()))**2
+    beta = (np.log(h/l))**2 + (np.log(h.shift(1)/l.shift(1)))**2
+    alpha = ((np.sqrt(2*beta) - np.sqrt(beta)) / (3-(2*np.sqrt(2)))) - np.sqrt(gamma / (3-(2*np.sqrt(2))))
+    s = 2*(np.exp(alpha)-1) / (1+np.exp(alpha))
+    s = abs(s).round(5)
+    s.iloc[0] = s.iloc[1]
+    df = pd.DataFrame({'bid_open': df['open'].values, 'ask_open': (df['open'].to_numpy()+s).round(5),
+                       'bid_close': df['close'].values, 'ask_close': (df['close'].to_numpy()+s).round(5),
+                       'bid_high': df['high'].values, 'ask_high': (df['high'].to_numpy()+s).round(5),
+                       'bid_low': df['low'].values, 'ask_low': (df['low'].to_numpy()+s).round(5),
+                       'tick_volume': df['tick_volume'].values}, index=df.index)
+    ask_open, bid_open, ask_close, bid_close, best_rets, wrst_rets, tick_volume = [], [], [], [], [], [], []
+    grouped = pd.DataFrame(df.groupby(pd.Grouper(freq=tf)), columns=['time', 'sub_dataframes'])
+    for dataframe in grouped['sub_dataframes']:
+        tick_volume.append(dataframe['tick_volume'].sum())
+        ask_open.append(dataframe['ask_open'].iloc[0])
+        bid_open.append(dataframe['bid_open'].iloc[0])
+        ask_close.append(dataframe['ask_close'].iloc[-1])
+        bid_close.append(dataframe['bid_close'].iloc[-1])
+        best, wrst = reference_returns(dataframe, (dataframe['bid_high'].max(), 'bid_high'), (dataframe['ask_low'].min(), 'ask_low'),
+                                       (dataframe['bid_low'].min(), 'bid_low'), (dataframe['ask_high'].max(), 'ask_high'))
+        best_rets.append(best)
+        wrst_rets.append(wrst)
+    return pd.DataFrame({'best_rets':np.array(best_rets, dtype=np.float64), 'wrst_rets':wrst_rets, 'ask_open':ask_open, 'bid_open':bid_open,
+                         'ask_close':ask_close, 'bid_close':bid_close, 'tick_volume':tick_volume},
+                        index=pd.to_datetime(grouped['time']))
+
+def synthetic_candles(day='2021-10-11'):
+    rng = np.random.default_rng(0)
+    close = (1.1 + np.cumsum(rng.normal(0, 1e-4, 1440))).round(5)
+    spread = np.abs(rng.normal(0, 1e-4, 1440)).round(5)
+    index = pd.date_range(day, periods=1440, freq='min')
+    return pd.DataFrame({'open': np.r_[close[0], close[:-1]], 'high': close + spread, 'low': close - spread,
+                         'close': close, 'tick_volume': 1}, index=index)
+
+def synthetic_ticks(n, day='2021-10-11'):
+    rng = np.random.default_rng(0)
+    offsets = np.sort(rng.integers(0, 86400 * 10**6, n))
+    # no ticks between 02:00 and 02:30
+    offsets = offsets[(offsets < 2 * 3600 * 10**6) | (offsets >= 2.5 * 3600 * 10**6)]
+    bid = (1.1 + np.cumsum(rng.normal(0, 1e-5, len(offsets)))).round(5)
+    index = pd.Timestamp(day) + pd.to_timedelta(offsets, unit='us')
+    return pd.DataFrame({'ask': bid + 0.0002, 'bid': bid}, index=index)
+
+def time_it(func, df, time_frames):
+    t = perf_counter()
+    out = [func(df=df, tf=tf) for tf in time_frames]
+    return perf_counter() - t, out
+
+def time_it_single_pass(func, df, time_frames):
+    t = perf_counter()
+    out = func(df=df, time_frames=time_frames)
+    return perf_counter() - t, [out[tf] for tf in time_frames]
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n','--ticks', type=int, default = 1000000)
+parser.add_argument('-tfs','--timeframes', type=int, default = 10)
+in_args = parser.parse_args()
+
+df = synthetic_ticks(in_args.ticks)
+time_frames = [str(i) + 'min' for i in range(1, in_args.timeframes + 1)]
+
+t_reference, expected = time_it(reference_process_daily_bid_ask, df, time_frames)
+t_vectorized, result = time_it(process_daily_bid_ask, df, time_frames)
+t_single_pass, single_pass = time_it_single_pass(process_daily_bid_ask_time_frames, df, time_frames)
+for a, b, c in zip(expected, result, single_pass):
+    pd.testing.assert_frame_equal(a, b[a.columns], check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(b, c, check_freq=False)
+
+candles = synthetic_candles()
+t_ohlc_reference, expected = time_it(reference_process_ohlc, candles, time_frames)
+t_ohlc, result = time_it(process_ohlc, candles, time_frames)
+t_ohlc_single_pass, single_pass = time_it_single_pass(process_ohlc_time_frames, candles, time_frames)
+for a, b, c in zip(expected, result, single_pass):
+    pd.testing.assert_frame_equal(a, b[a.columns], check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(b, c, check_freq=False)
+
+date_format = '%d.%m.%Y %H:%M:%S.%f'
+dates = np.asarray(df.index.strftime(date_format).str[:-3], dtype=object)
+t = perf_counter()
+expected = pd.to_datetime(dates, format=date_format)
+t_to_datetime = perf_counter() - t
+t = perf_counter()
+result = parse_times(dates, date_format)
+t_parse_times = perf_counter() - t
+assert (pd.DatetimeIndex(expected).as_unit('ns').asi8 == result).all()
+
+gappy = candles.iloc[7:].drop(candles.index[[100, 101, 700]])
+repeat = 100
+t = perf_counter()
+for _ in range(repeat):
+    expected = gappy.reindex(pd.date_range(gappy.index.date[0], freq='min', periods=1440), method='ffill').bfill()
+t_reindex = perf_counter() - t
+t = perf_counter()
+for _ in range(repeat):
+    times = gappy.index.as_unit('ns').asi8
+    slots, result = reindex_minutes(times, gappy.to_numpy(dtype=np.float64), times[0] // NS_PER_DAY * NS_PER_DAY, bfill=True)
+t_reindex_minutes = perf_counter() - t
+assert (expected.to_numpy(dtype=np.float64) == result).all() and (expected.index.as_unit('ns').asi8 == slots).all()
+
+print('\n-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> process_daily_bid_ask, {len(df):,} ticks x {len(time_frames)} timeframes (outputs identical)')
+print(f'>> BENCHMARK >> Loop over pd.Grouper sub-dataframes : {t_reference:,.2f} s')
+print(f'>> BENCHMARK >> Vectorized buckets                  : {t_vectorized:,.3f} s ({t_reference / t_vectorized:,.0f}x)')
+print(f'>> BENCHMARK >> Single pass over all timeframes      : {t_single_pass:,.3f} s ({t_reference / t_single_pass:,.0f}x)')
+print('-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> process_ohlc, 1,440 1-min candles x {len(time_frames)} timeframes (outputs identical)')
+print(f'>> BENCHMARK >> Loop over pd.Grouper sub-dataframes : {t_ohlc_reference * 1e3:,.1f} ms ({t_ohlc_reference * 17 * 250:,.0f} s for 17 pairs x 250 days)')
+print(f'>> BENCHMARK >> Vectorized buckets                  : {t_ohlc * 1e3:,.1f} ms ({t_ohlc * 17 * 250:,.1f} s for 17 pairs x 250 days, {t_ohlc_reference / t_ohlc:,.0f}x)')
+print(f'>> BENCHMARK >> Single pass over all timeframes      : {t_ohlc_single_pass * 1e3:,.1f} ms ({t_ohlc_single_pass * 17 * 250:,.1f} s for 17 pairs x 250 days, {t_ohlc_reference / t_ohlc_single_pass:,.0f}x)')
+print('-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> parsing {len(dates):,} tick dates \'{date_format}\' (outputs identical)')
+print(f'>> BENCHMARK >> pd.to_datetime                       : {t_to_datetime:,.3f} s')
+print(f'>> BENCHMARK >> parse_times                          : {t_parse_times:,.3f} s ({t_to_datetime / t_parse_times:,.1f}x)')
+print(f'>> BENCHMARK >> placing {len(gappy):,} 1-min candles in 1,440 minutes x {repeat} (outputs identical)')
+print(f'>> BENCHMARK >> reindex(method=\'ffill\') + bfill()    : {t_reindex * 1e3:,.1f} ms')
+print(f'>> BENCHMARK >> reindex_minutes                      : {t_reindex_minutes * 1e3:,.1f} ms ({t_reindex / t_reindex_minutes:,.1f}x)')
+print('-----------------------------------------------------------------------------------------------------------')
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""
+This script measures the storage formats of the preprocessed timeframe files ('fxmanager.basic.storage').
+
+A day of 1-min candles of every currency pair is preprocessed into 1 to 10 minute timeframes and
+written in every available storage format to a temporary directory. The files are then read back
+the way the optimizer reads them ('best_rets' and 'wrst_rets' of every timeframe, as in
+'get_avg_rets') and the way the historical simulator reads them (the prices of the 1-min file, as
+in 'get_prices'), the outputs are checked to be identical across formats, and the read times and
+disk usage are reported. The same is done in compact mode (float32 prices and returns, int32 tick
+volumes, price samples dropped) along with the memory of the dataframes read.
+
+Usage:
+      python benchmarks/storage.py [options]
+
+Options:
+      -cps, --currency_pairs: number of currency pairs.
+
+      -tfs, --timeframes    : number of timeframes (1min to <tfs>min).
+
+      -r, --repeat          : number of times every read is repeated.
+"""
+
+import argparse
+import tempfile
+from os import makedirs
+from os.path import join, getsize
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from fxmanager.basic.util import process_ohlc_time_frames
+from fxmanager.basic.storage import storage_formats, write_time_frame, read_time_frame
+
+def synthetic_candles(seed, day='2021-10-11'):
+    rng = np.random.default_rng(seed)
+    close = (1.1 + np.cumsum(rng.normal(0, 1e-4, 1440))).round(5)
+    spread = np.abs(rng.normal(0, 1e-4, 1440)).round(5)
+    index = pd.date_range(day, periods=1440, freq='min')
+    return pd.DataFrame({'open': np.r_[close[0], close[:-1]], 'high': close + spread, 'low': close - spread,
+                         'close': close, 'tick_volume': 1}, index=index)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-cps','--currency_pairs', type=int, default = 17)
+parser.add_argument('-tfs','--timeframes', type=int, default = 10)
+parser.add_argument('-r','--repeat', type=int, default = 5)
+in_args = parser.parse_args()
+
+time_frames = [str(i) + 'min' for i in range(1, in_args.timeframes + 1)]
+currency_pairs = ['CP{:04d}'.format(i) for i in range(in_args.currency_pairs)]
+tf_dfs = {cp: process_ohlc_time_frames(synthetic_candles(seed), time_frames) for seed, cp in enumerate(currency_pairs)}
+
+results = {}
+with tempfile.TemporaryDirectory() as tmp:
+    for storage_format in storage_formats():
+        for compact in [False, True]:
+            label = storage_format + ('/c' if compact else '')
+            data_dir = join(tmp, label)
+            size = 0
+            for tf in time_frames:
+                makedirs(join(data_dir, tf))
+                for cp in currency_pairs:
+                    size += getsize(write_time_frame(tf_dfs[cp][tf], join(data_dir, tf, cp + '_' + tf), storage_format, compact))
+
+            t = perf_counter()
+            for _ in range(in_args.repeat):
+                rets = [read_time_frame(join(data_dir, tf, cp + '_' + tf), columns=['best_rets', 'wrst_rets'], compact=compact) for tf in time_frames for cp in currency_pairs]
+            t_rets = (perf_counter() - t) / in_args.repeat
+            t = perf_counter()
+            for _ in range(in_args.repeat):
+                prices = [read_time_frame(join(data_dir, '1min', cp + '_1min'), columns=['ask_open', 'bid_open', 'ask_close', 'bid_close'], compact=compact) for cp in currency_pairs]
+            t_prices = (perf_counter() - t) / in_args.repeat
+            memory = sum(read_time_frame(join(data_dir, tf, cp + '_' + tf), compact=compact).memory_usage().sum() for tf in time_frames for cp in currency_pairs)
+            results[label] = (size, t_rets, t_prices, memory, rets, prices)
+
+# identical outputs across formats, compact prices round to the full ones
+for label, (_, _, _, _, rets, prices) in results.items():
+    reference = results['csv/c' if label.endswith('/c') else 'csv']
+    for a, b in zip(reference[4] + reference[5], rets + prices):
+        pd.testing.assert_frame_equal(a, b)
+for a, b in zip(results['csv'][5], results['csv/c'][5]):
+    pd.testing.assert_frame_equal(a, b.astype(np.float64).round(5))
+
+n_files = len(time_frames) * len(currency_pairs)
+print('\n-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> {len(currency_pairs)} currency pairs x {len(time_frames)} timeframes, one day ({n_files} files, outputs identical, /c: compact mode)')
+print('>> BENCHMARK >> format     | disk usage |  read returns (get_avg_rets) | read 1-min prices (get_prices) | memory of all the frames')
+for label, (size, t_rets, t_prices, memory, _, _) in results.items():
+    print(f'>> BENCHMARK >> {label:<10} | {size / 2**20:7.2f} MB | {t_rets * 1e3:9.1f} ms ({results["csv"][1] / t_rets:5.1f}x)      | '
+          f'{t_prices * 1e3:7.1f} ms ({results["csv"][2] / t_prices:5.1f}x)       | {memory / 2**20:6.2f} MB ({memory / results["csv"][3]:4.2f}x)')
+print('-----------------------------------------------------------------------------------------------------------')
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""
+This script measures the per-tick cost of timestamping in the SUB handler of the DWX connector.
+
+The former string timestamp ('str(Timestamp.now("UTC"))[:-6]') is compared with the integer tick
+clock of the connector (monotonic ns plus a fixed epoch offset), then the whole SUB handler
+('_handle_sub_msg_') is timed on synthetic "SYMBOL BID;ASK" messages. No server is needed, the
+connector sockets are never read.
+
+Usage:
+      python benchmarks/tick_timestamping.py [options]
+
+Options:
+      -n, --ticks: number of ticks timed per measurement.
+"""
+
+import argparse
+from time import perf_counter_ns, monotonic_ns, time_ns
+from pandas import Timestamp
+from fxmanager.dwx.DWX_ZeroMQ_Connector_v2_0_1_RC8 import DWX_ZeroMQ_Connector
+
+def per_tick_ns(func, n):
+    t = perf_counter_ns()
+    func(n)
+    return (perf_counter_ns() - t) / n
+
+def string_timestamps(n):
+    for _ in range(n):
+        str(Timestamp.now('UTC'))[:-6]
+
+def integer_timestamps(n, offset=time_ns() - monotonic_ns()):
+    for _ in range(n):
+        monotonic_ns() + offset
+
+parser = argparse.ArgumentParser()
+parser.add_argument('-n','--ticks', type=int, default = 200000)
+in_args = parser.parse_args()
+
+zmq_connector = DWX_ZeroMQ_Connector(_verbose=False, _PUSH_PORT=44768, _PULL_PORT=44769, _SUB_PORT=44770)
+messages = [('EURUSD', 'GBPUSD', 'USDJPY')[i % 3] + ' ' + repr(1.1 + i * 1e-5) + ';' + repr(1.1002 + i * 1e-5) for i in range(in_args.ticks)]
+
+def sub_handler(n):
+    for msg in messages[:n]:
+        zmq_connector._handle_sub_msg_(msg)
+
+t_string = per_tick_ns(string_timestamps, in_args.ticks)
+t_integer = per_tick_ns(integer_timestamps, in_args.ticks)
+t_handler = per_tick_ns(sub_handler, in_args.ticks)
+zmq_connector._DWX_ZMQ_SHUTDOWN_()
+
+print('\n-----------------------------------------------------------------------------------------------------------')
+print(f'>> BENCHMARK >> String timestamp (Timestamp.now)   : {t_string:,.0f} ns/tick')
+print(f'>> BENCHMARK >> Integer tick clock (monotonic+off) : {t_integer:,.0f} ns/tick')
+print(f'>> BENCHMARK >> Saved per tick                     : {t_string - t_integer:,.0f} ns ({t_string / t_integer:,.1f}x)')
+print(f'>> BENCHMARK >> Whole SUB handler (integer clock)  : {t_handler:,.0f} ns/tick')
+print('-----------------------------------------------------------------------------------------------------------')
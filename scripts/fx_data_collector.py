@@ -32,6 +32,17 @@ Options:
                               form YYYY_mm_dd.
       
       -st, save_to          : path to the directory where data is saved, could be absolut or relative. 
+
+      -mif, --max_in_flight : maximum number of history requests pending at the same time (per terminal).
+
+      -eps, --endpoints     : list of MT4 terminals the requests are spread over, each in the form
+                              host:push_port (the PULL and SUB ports are push_port+1 and push_port+2),
+                              separated by a white blanc character (space). by default a single
+                              terminal on localhost:32768 is used.
+
+      -f, --force           : download all the days again, even those already listed in the manifest
+                              (the hidden file '.history_manifest.json' in the save_to directory, skipped
+                              by the preprocessing like any hidden file).
 """
 
 doc = __doc__
@@ -39,7 +50,8 @@ doc = __doc__
 from os import getcwd
 import argparse
 import pandas as pd
-from fxmanager.dwx.rates_historic import rates_historic as rh
+from fxmanager.dwx.history_downloader import history_downloader
+from fxmanager.dwx.rates_historic import rates_historic_pool
 import fxmanager._metadata as md
 from __main__ import __dict__
 
@@ -54,6 +66,9 @@ parser.add_argument('-cps','--currency_pairs', type=str, nargs='+', default = ['
 parser.add_argument('-s','--start', type=str, default = '2021_09_20')
 parser.add_argument('-e','--end', type=str, default = '2021_09_21')
 parser.add_argument('-st','--save_to', type=str, default = getcwd())
+parser.add_argument('-mif','--max_in_flight', type=int, default = 4)
+parser.add_argument('-f','--force', default=False, action='store_true')
+parser.add_argument('-eps','--endpoints', type=str, nargs='+', default = ['localhost:32768'])
 
 # Parse arguments
 in_args = parser.parse_args()
@@ -69,18 +84,18 @@ start_date = pd.to_datetime(in_args.start, format='%Y_%m_%d')
 end_date = pd.to_datetime(in_args.end, format='%Y_%m_%d')
 dates = pd.date_range(start=start_date, end=end_date)
 
-# Create a data collector object
-dc = rh()
-
-for cp in cps:
-    if in_args.raw_data_type == 'daily_candles':
-        for date in dates:
-            # remove weekends
-            if date.weekday() == 5 or date.weekday() == 6:
-                continue
-            dc.get_daily_candles(save_to = in_args.save_to, currency_pair=cp, date='.'.join(str(date.date()).split('-')))
-
-    elif in_args.raw_data_type == 'period_candles':
-        # remove weekends
-        dates = dates[dates.weekday != 5] & dates[dates.weekday != 6]
-        dc.get_period_candles(save_to = in_args.save_to, currency_pair=cp, start='.'.join(str(dates[0].date()).split('-')), end='.'.join(str(dates[-1].date()).split('-')))
\ No newline at end of file
+# remove weekends
+dates = ['.'.join(str(date.date()).split('-')) for date in dates if date.weekday() not in (5, 6)]
+
+# Spread the requests over the terminals
+endpoints = []
+for endpoint in in_args.endpoints:
+    host, port = endpoint.rsplit(':', 1)
+    endpoints.append({'_host': host, '_PUSH_PORT': int(port), '_PULL_PORT': int(port) + 1, '_SUB_PORT': int(port) + 2})
+rates = rates_historic_pool(endpoints=endpoints, max_in_flight=in_args.max_in_flight)
+
+# Create a downloader, only the days missing from its manifest are requested
+dl = history_downloader(save_to=in_args.save_to, raw_data_type=in_args.raw_data_type, max_in_flight=in_args.max_in_flight * len(endpoints), rates=rates)
+n_saved, n_failed = dl.download(cps, dates, force=in_args.force)
+print(f'>> DWX MESSAGE >> Saved {n_saved} files, {n_failed} requests failed')
+dl.stop()
@@ -47,9 +47,27 @@ Options:
     
     -sl, --save_logs           : boolean flag, if True, the program logs are saved to
                                  'data\\logs\\preprocessing_logs.txt' file
+
+    -w, --workers              : number of processes the raw data files are preprocessed in
+                                 (0 uses a process per CPU core).
+
+    -f, --force                : boolean flag, if True, all the raw data files are preprocessed
+                                 again, otherwise only the files that are new or changed since the
+                                 last run (according to 'data\\preprocessing_manifest.json').
+
+    -sf, --storage_format      : format of the timeframe files:
+                                    - csv     : text files (default).
+                                    - npz     : numpy arrays, loads ~3x faster than csv.
+                                    - feather : Apache Arrow files (requires pyarrow).
+                                    - parquet : Apache Parquet files (requires pyarrow).
+
+    -c, --compact              : boolean flag, if True, the timeframe files are written without the
+                                 price samples, with float32 prices and int32 tick volumes.
 """
 
 doc = __doc__
+# checked before the imports, fxmanager modules copy their metadata (its '__name__' included) into '__main__'
+is_main = __name__ == '__main__'
 
 from os import getcwd
 from os.path import join
@@ -68,6 +86,10 @@ parser.add_argument('-v','--version', action='version', version=__version__)
 parser.add_argument('-at','--app_type', type=str, default = 'all_in_one')
 parser.add_argument('-rdt','--raw_data_type', type=str, default = 'daily_candles')
 parser.add_argument('-sl','--save_logs', default=False, action='store_true')
+parser.add_argument('-w','--workers', type=int, default = 1)
+parser.add_argument('-f','--force', default=False, action='store_true')
+parser.add_argument('-sf','--storage_format', type=str, default = 'csv')
+parser.add_argument('-c','--compact', default=False, action='store_true')
 
 # Parse arguments
 in_args = parser.parse_args()
@@ -89,8 +111,14 @@ elif in_args.raw_data_type == 'period_candles':
 else:
     pass 
 
-preprocess(app_type = in_args.app_type,
-            raw_data_type = in_args.raw_data_type,
-            raw_data_format = raw_data_format,
-            save_logs = in_args.save_logs)
+# the guard keeps worker processes started with 'spawn' (Windows) from running the script again
+if is_main:
+    preprocess(app_type = in_args.app_type,
+                raw_data_type = in_args.raw_data_type,
+                raw_data_format = raw_data_format,
+                save_logs = in_args.save_logs,
+                workers = in_args.workers or None,
+                force = in_args.force,
+                storage_format = in_args.storage_format,
+                compact = in_args.compact)
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+"""
+This script is used for running a local stand-in for the MT4 terminal with the DWX ZeroMQ Server EA.
+
+The stand-in speaks the same PUSH/PULL/PUB protocol the EA speaks, so live simulations, data
+collection and benchmarks can run without MT4 (e.g. in CI or on a headless Linux box).
+Ticks are replayed from the preprocessed 1-min data of a given day (2 ticks per candle) or
+from raw 'daily_bid_ask' files, and HIST commands are answered from 1-min candle files saved
+by 'fx_data_collector'.
+
+Usage:
+      fx_stand_in_server [options]
+
+Options:
+      -h, --help            : show this help message and exit.
+
+      -v, --version         : show the version of FX-Manager and exit.
+
+      -dd, --data_dir       : path to the project data directory, the ticks of day (--day) are
+                              loaded from 'data_dir\\time_frames\\<day>\\1min'.
+
+      -d, --day             : day number of the preprocessed data to replay.
+
+      -rtd, --raw_ticks_dir : path to a directory with raw 'daily_bid_ask' files to replay
+                              instead of the preprocessed data (one file per currency pair).
+
+      -hd, --hist_dir       : path to a directory with 1-min candle files used to answer HIST
+                              commands.
+
+      -r, --rate            : number of ticks published per second, 0 publishes as fast as
+                              possible.
+
+      -nl, --no_loop        : boolean flag, if True, the ticks are published only once.
+
+      -pp, --push_port      : client's PUSH port (the stand-in receives commands on it).
+
+      -plp, --pull_port     : client's PULL port (the stand-in replies on it).
+
+      -sp, --sub_port       : client's SUB port (the stand-in publishes prices on it).
+"""
+
+doc = __doc__
+
+import json
+import argparse
+from os import getcwd, listdir
+from os.path import join
+from time import sleep
+from fxmanager.dwx.stand_in_server import stand_in_server, load_preprocessed_ticks, load_raw_ticks, load_history
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+# Add Optional arguments
+parser = argparse.ArgumentParser(add_help=False)
+parser.add_argument('-h','--help', default=False, action='store_true')
+parser.add_argument('-v','--version', action='version', version=__version__)
+parser.add_argument('-dd','--data_dir', type=str, default = join(getcwd(), 'data'))
+parser.add_argument('-d','--day', type=int, default = 0)
+parser.add_argument('-rtd','--raw_ticks_dir', type=str, default = '')
+parser.add_argument('-hd','--hist_dir', type=str, default = '')
+parser.add_argument('-r','--rate', type=float, default = 1000.0)
+parser.add_argument('-nl','--no_loop', default=False, action='store_true')
+parser.add_argument('-pp','--push_port', type=int, default = 32768)
+parser.add_argument('-plp','--pull_port', type=int, default = 32769)
+parser.add_argument('-sp','--sub_port', type=int, default = 32770)
+
+# Parse arguments
+in_args = parser.parse_args()
+
+if in_args.help:
+    import sys
+    print(doc)
+    sys.exit()
+
+if in_args.raw_ticks_dir:
+    with open('raw_data_formats.json') as f:
+        raw_data_format = json.load(f)['daily_bid_ask']
+    ticks = {f[:6]: load_raw_ticks(join(in_args.raw_ticks_dir, f), raw_data_format) for f in listdir(in_args.raw_ticks_dir)}
+else:
+    ticks = load_preprocessed_ticks(data_dir=in_args.data_dir, day=in_args.day)
+
+history = load_history(in_args.hist_dir) if in_args.hist_dir else {}
+
+server = stand_in_server(_ticks=ticks,
+                         _history=history,
+                         _rate=in_args.rate,
+                         _loop=not in_args.no_loop,
+                         _PUSH_PORT=in_args.push_port,
+                         _PULL_PORT=in_args.pull_port,
+                         _SUB_PORT=in_args.sub_port)
+server.run()
+try:
+    while True:
+        sleep(1)
+except KeyboardInterrupt:
+    server.stop()
@@ -62,6 +62,9 @@ Options:
         -sl, --save_logs             : boolean flag, if True, the program logs are saved to
                                        'data\\logs\\preprocessing_logs.txt' file.
 
+        -c, --compact                : boolean flag, if True, the prices of every day are kept as
+                                       float32 (half the memory, see 'fxmanager.basic.storage').
+
 ===========================================================================================
 ===========================================================================================
 
@@ -105,6 +108,7 @@ parser.add_argument('-nd','--num_days', type=int, default = 2)
 parser.add_argument('-ops','--optimized_portfolios', default=False, action='store_true')
 parser.add_argument('-usp','--use_single_porfolio', default=False, action='store_true')
 parser.add_argument('-sl','--save_logs', default=False, action='store_true')
+parser.add_argument('-c','--compact', default=False, action='store_true')
 
 # Parse arguments
 in_args = parser.parse_args()
@@ -142,5 +146,6 @@ sim.run(account = acc,
         risk_factor = in_args.risk_factor,
         dynamic_sltp = in_args.dynamic_sltp,
         save_logs = in_args.save_logs,
+        compact = in_args.compact,
         **kwargs)
 
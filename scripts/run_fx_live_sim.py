@@ -92,6 +92,38 @@ Options:
         -sl, --save_logs             : boolean flag, if True, the program logs are saved to
                                        'data\\logs\\preprocessing_logs.txt' file.
 
+        -ls, --latency_stats         : boolean flag, if True, tick-to-decision latency histograms
+                                       (p50, p99 and max per currency pair) are recorded and
+                                       dumped to 'data\\logs\\live_latency.csv' file.
+
+        -cm, --connector_metrics     : boolean flag, if True, message rates, parse errors, handler
+                                       times and send retries of the price feed connector are
+                                       dumped to 'data\\logs\\connector_metrics.csv' file.
+
+        -rt, --record_ticks          : boolean flag, if True, every received tick is recorded to
+                                       binary files in 'data\\tick_records' directory.
+
+        -rpd, --replay_day           : day number of the preprocessed data in 'data\\time_frames' to
+                                       replay on a virtual clock instead of connecting to MT4
+                                       (a whole day runs in seconds).
+
+        -rpr, --replay_records       : path to a directory with tick records (see --record_ticks)
+                                       to replay on a virtual clock instead of connecting to MT4.
+
+        -ro, --reoptimize_every      : number of minutes between two background re-optimizations of
+                                       the portfolio using the prices collected so far in the
+                                       session (0 disables re-optimization).
+
+        -rx, --reactor               : boolean flag, if True, the ZeroMQ connector blocks only in
+                                       poll() and drains all ready ticks without sleeping.
+
+        -cf, --conflate              : boolean flag, if True, bursts of ticks are collapsed to the
+                                       latest quote of every currency pair before the handlers run
+                                       (tick recording still gets every tick).
+
+        -c, --compact                : boolean flag, if True, the replayed prices (see --replay_day
+                                       and --replay_records) are kept as float32.
+
 ===========================================================================================
 ===========================================================================================
 
@@ -105,10 +137,13 @@ Saved Results:
 """
 
 doc = __doc__
+# checked before the imports, fxmanager modules copy their metadata (its '__name__' included) into '__main__'
+is_main = __name__ == '__main__'
 
 import argparse
 import sys
-from os import getcwd
+from os import getcwd, listdir
+from os.path import join
 sys.path.append(getcwd())
 import json
 from fxmanager.basic.account import Account
@@ -116,6 +151,7 @@ from fxmanager.basic.util import get_portfolios
 from fxmanager.strategies.template import strategy_template
 from fxmanager.strategies.naieve_momentum import get_orders
 import fxmanager.simulation.live as sim
+from fxmanager.simulation.replay import replay_feed
 import fxmanager._metadata as md
 import strategy as srtg
 from __main__ import __dict__
@@ -148,6 +184,15 @@ parser.add_argument('-st','--sleep_time', type=float, default = 1.0)
 parser.add_argument('-rf','--risk_factor', type=float, default = 0.98)
 parser.add_argument('-sz','--sync_zero', default=False, action='store_true')
 parser.add_argument('-sl','--save_logs', default=False, action='store_true')
+parser.add_argument('-ls','--latency_stats', default=False, action='store_true')
+parser.add_argument('-cm','--connector_metrics', default=False, action='store_true')
+parser.add_argument('-rt','--record_ticks', default=False, action='store_true')
+parser.add_argument('-rpd','--replay_day', type=int, default = None)
+parser.add_argument('-rpr','--replay_records', type=str, default = '')
+parser.add_argument('-ro','--reoptimize_every', type=float, default = 0)
+parser.add_argument('-rx','--reactor', default=False, action='store_true')
+parser.add_argument('-cf','--conflate', default=False, action='store_true')
+parser.add_argument('-c','--compact', default=False, action='store_true')
 
 # Parse arguments
 in_args = parser.parse_args()
@@ -192,19 +237,36 @@ else:
         strategy = strategy_template(get_orders, take_all_prices=in_args.take_all_prices)
         kwargs = {'look_back':3}
 
-# Run Simulation
-sim.run(account=acc,
-        strategy=strategy,
-        construct_portfolio=in_args.construct_portfolio,
-        portfolio=portfolio,
-        weight_optimization=weight_optimization,
-        is_preprocessed=in_args.construct_portfolio,
-        raw_data_format=raw_data_format,
-        optimization_method=in_args.optimization_method,
-        optimization_objective=in_args.optimization_objective,
-        sleep_time=in_args.sleep_time, ## In Minutes
-        risk_factor=in_args.risk_factor, ## percentage of money to be invested from account balance during simulation
-        dynamic_sltp = in_args.dynamic_sltp,
-        sync_zero=in_args.sync_zero,
-        save_logs=in_args.save_logs,
-        **kwargs) ## Multiple of the timeframe (i.e. if an order to be placed in 10 min tf, look back would be 30 minutes with check every 10min)
\ No newline at end of file
+# Create a replay price feed (used only if a replay source is given)
+if in_args.replay_records:
+    price_feed = replay_feed.from_recording(in_args.replay_records, compact=in_args.compact)
+elif in_args.replay_day is not None:
+    data_dir = join(getcwd(), 'data')
+    currency_pairs = [x[:6] for x in listdir(join(data_dir, 'time_frames', str(in_args.replay_day), '1min'))]
+    price_feed = replay_feed.from_time_frames(data_dir=data_dir, day=in_args.replay_day, currency_pairs=currency_pairs, compact=in_args.compact)
+else:
+    price_feed = None
+
+# Run Simulation, the guard keeps the reoptimization worker process started with 'spawn' (Windows) from running the script again
+if is_main:
+    sim.run(account=acc,
+            strategy=strategy,
+            construct_portfolio=in_args.construct_portfolio,
+            portfolio=portfolio,
+            weight_optimization=weight_optimization,
+            is_preprocessed=in_args.construct_portfolio,
+            raw_data_format=raw_data_format,
+            optimization_method=in_args.optimization_method,
+            optimization_objective=in_args.optimization_objective,
+            sleep_time=in_args.sleep_time, ## In Minutes
+            risk_factor=in_args.risk_factor, ## percentage of money to be invested from account balance during simulation
+            dynamic_sltp = in_args.dynamic_sltp,
+            sync_zero=in_args.sync_zero,
+            save_logs=in_args.save_logs,
+            latency_stats=in_args.latency_stats,
+            record_ticks=in_args.record_ticks,
+            price_feed=price_feed,
+            reoptimize_every=in_args.reoptimize_every,
+            zmq_options={'_reactor': in_args.reactor, '_conflate': in_args.conflate},
+            connector_metrics=in_args.connector_metrics,
+            **kwargs) ## Multiple of the timeframe (i.e. if an order to be placed in 10 min tf, look back would be 30 minutes with check every 10min)
\ No newline at end of file
@@ -22,16 +22,17 @@ try:
         scripts = ['scripts\\create_fx_proj.py',
                         'scripts\\fx_data_collector.py', 
                         'scripts\\fx_pp.py',
+                        'scripts\\fx_stand_in_server.py',
                         'scripts\\run_fx_hist_sim.py', 
                         'scripts\\run_fx_live_sim.py', 
                         'scripts\\run_fx_opt_test.py'],
         package_dir = {'':'src'},
         packages = find_packages(where='src'),
         install_requires = ['zmq',
-                        'pandas>=0.25.1',
-                        'numpy>=1.16.5',
+                        'pandas>=2.0',
+                        'numpy>=1.20.3',
                         'matplotlib>=3.1.1'],
-        python_requires = '>=3.7'
+        python_requires = '>=3.9'
     )
 except:
     print('Error!')
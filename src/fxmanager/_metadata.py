@@ -6,7 +6,7 @@ __description__                  = 'Python package for developing and testing fo
 __long_description_content_type__= "text/markdown"
 __url__                          = 'https://github.com/AbdullahBahi/fxmanager'
 __keywords__                     = ['forex', 'forex trading', 'algorethmic trading', 'backtesting']
-__python_requires__              = '>=3.7'
+__python_requires__              = '>=3.9'
 __copyright__                    = "Copyright © 2021 Abdullah Bahi"
 __credits__                      = ["Darwinex"]
 __license__                      = "GNU General Public License (GPL)"
@@ -32,7 +32,7 @@ __package_dir__      = {'':'src'}
 __packages__         = ['fxmanager', 'fxmanager.basic', 'fxmanager.dwx', 'fxmanager.optimization', 'fxmanager.simulation', 'fxmanager.strategies']
 
 __install_requires__ =['zmq',
-                        'pandas>=0.25.1',
-                        'numpy>=1.16.5',
+                        'pandas>=2.0',
+                        'numpy>=1.20.3',
                         'matplotlib>=3.1.1']
 
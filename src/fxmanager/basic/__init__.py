@@ -7,10 +7,19 @@ Modules:
     - util    : This module contains helper functions used internally in other fxmanager sub-packages. it also includes public functions to be used by the user to setup fxmanager project structure and pre-process the data.
 
     - account : This module contains 'Account' class which is used for creating a fully functional virtual forex trading accounts.
+
+    - latency : This module contains classes used for recording tick-to-decision latency histograms in the live simulator.
+
+    - storage : This module contains the functions used for writing and reading the preprocessed timeframe files in CSV or binary columnar formats.
+
+    - times   : This module contains the functions used for parsing the times of the raw data files and placing their rows in the 1-min slots of whole days.
 """
 
 from . import util
 from . import account
+from . import latency
+from . import storage
+from . import times
 import fxmanager._metadata as md
 from __main__ import __dict__
 
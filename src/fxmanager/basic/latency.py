@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""
+This module contains classes used for measuring how stale a price is by the time the live simulator acts on it.
+
+every tick received by the DWX connector is stamped with a monotonic nanoseconds time on receipt, the live simulator then records the delay between that stamp and each decision stage (bar completion, strategy return, position open and close) in HDR-style histograms kept per currency pair.
+
+Classes:
+    - LatencyHistogram: log-linear histogram of nanosecond delays with bounded relative error.
+    - LatencyRecorder : collection of LatencyHistogram objects keyed by currency pair and stage, with percentiles summary and periodic dumping.
+"""
+
+from time import monotonic_ns
+import numpy as np
+import pandas as pd
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+class LatencyHistogram():
+    """
+    log-linear histogram of nanosecond delays with bounded relative error.
+
+    values lower than 2**sub_bits are counted exactly, larger values are counted in buckets of width 2**(shift) where shift grows with the magnitude of the value, so the relative error of any reported value is below 1 / 2**(sub_bits-1).
+
+    Args:
+        - sub_bits : integer number of bits used for the linear part of every bucket, 7 bits gives less than 1.6% relative error.
+        - max_bits : integer number of bits of the largest recordable value, larger values are clipped to the last bucket (default 2**42 ns ~ 73 minutes).
+
+    Public Methods:
+        - record()    : counts a new delay value.
+        - percentile(): returns the value at the given percentile.
+        - reset()     : clears all counts.
+    """
+
+    def __init__(self, sub_bits=7, max_bits=42):
+        self._SUB_BITS = sub_bits
+        self._SUB_COUNT = 1 << sub_bits
+        self._HALF_COUNT = 1 << (sub_bits - 1)
+        self._MAX_VALUE = (1 << max_bits) - 1
+        self._counts = np.zeros(self._index(self._MAX_VALUE) + 1, dtype=np.int64)
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    def _index(self, value):
+        if value < self._SUB_COUNT:
+            return value
+        shift = value.bit_length() - self._SUB_BITS
+        return self._SUB_COUNT + (shift - 1) * self._HALF_COUNT + ((value >> shift) - self._HALF_COUNT)
+
+    def _highest_value(self, idx):
+        if idx < self._SUB_COUNT:
+            return idx
+        shift = (idx - self._SUB_COUNT) // self._HALF_COUNT + 1
+        mantissa = (idx - self._SUB_COUNT) % self._HALF_COUNT + self._HALF_COUNT
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        counts a new delay value (integer nanoseconds), negative values are counted as 0.
+        """
+        value = min(max(int(value), 0), self._MAX_VALUE)
+        self._counts[self._index(value)] += 1
+        self._total += 1
+        if self._min is None or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def percentile(self, q):
+        """
+        returns the value (in nanoseconds) at percentile q (0 to 100), or None if nothing is recorded yet.
+        """
+        if self._total == 0:
+            return None
+        rank = max(int(np.ceil(q / 100 * self._total)), 1)
+        idx = int(np.searchsorted(np.cumsum(self._counts), rank))
+        return min(self._highest_value(idx), self._max)
+
+    def count(self):
+        return self._total
+
+    def min(self):
+        return self._min
+
+    def max(self):
+        return self._max if self._total else None
+
+    def reset(self):
+        self._counts[:] = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+class LatencyRecorder():
+    """
+    collection of LatencyHistogram objects keyed by currency pair and stage.
+
+    the recorder keeps the receipt time of the tick each bar closed on, so every later stage of the same bar is measured against the same tick.
+
+    Args:
+        - dump_path : string with the full path of the CSV file the summary is dumped to, if None, periodic dumping is disabled.
+        - dump_every: float indicating the minimum number of seconds between two dumps made by 'maybe_dump()'.
+
+    Public Methods:
+        - bar_complete(): stores the receipt times of the ticks the current bar closed on and records the 'bar' stage.
+        - record()      : records the delay from the current bar tick of a currency pair to now for the given stage.
+        - summary()     : returns a pandas dataframe with count, p50, p99 and max (in milliseconds) for every currency pair and stage.
+        - dump()        : writes the summary to 'dump_path'.
+        - maybe_dump()  : calls dump() if 'dump_every' seconds passed since the last dump.
+    """
+
+    STAGES = ('bar', 'strategy', 'open', 'close')
+
+    def __init__(self, dump_path=None, dump_every=60):
+        self._dump_path = dump_path
+        self._dump_every_ns = int(dump_every * 1e9)
+        self._last_dump_ns = monotonic_ns()
+        self._histograms = {}   # {(SYMBOL, STAGE): LatencyHistogram}
+        self._bar_ticks = {}    # {SYMBOL: monotonic ns of the tick the current bar closed on}
+
+    def _histogram(self, symbol, stage):
+        key = (symbol, stage)
+        if key not in self._histograms:
+            self._histograms[key] = LatencyHistogram()
+        return self._histograms[key]
+
+    def bar_complete(self, tick_ns):
+        """
+        stores the receipt times of the ticks the current bar closed on and records the 'bar' stage.
+
+        Args:
+            - tick_ns: dictionary with currency pairs as keys and the monotonic ns receipt time of their last tick as values.
+        """
+        now = monotonic_ns()
+        self._bar_ticks = dict(tick_ns)
+        for symbol, t in self._bar_ticks.items():
+            if t is not None:
+                self._histogram(symbol, 'bar').record(now - t)
+
+    def record(self, symbol, stage):
+        """
+        records the delay from the tick the current bar of 'symbol' closed on to now, under the given stage.
+        """
+        t = self._bar_ticks.get(symbol)
+        if t is not None:
+            self._histogram(symbol, stage).record(monotonic_ns() - t)
+
+    def summary(self):
+        """
+        returns a pandas dataframe with columns (symbol, stage, count, p50_ms, p99_ms, max_ms), one row for each currency pair and stage recorded so far.
+        """
+        rows = []
+        for (symbol, stage), hist in sorted(self._histograms.items(), key=lambda x: (x[0][0], self.STAGES.index(x[0][1]))):
+            rows.append({'symbol': symbol,
+                         'stage': stage,
+                         'count': hist.count(),
+                         'p50_ms': hist.percentile(50) / 1e6,
+                         'p99_ms': hist.percentile(99) / 1e6,
+                         'max_ms': hist.max() / 1e6})
+        return pd.DataFrame(rows, columns=['symbol', 'stage', 'count', 'p50_ms', 'p99_ms', 'max_ms'])
+
+    def dump(self, path=None):
+        """
+        writes the summary to the given path (or 'dump_path' if None) as a CSV file.
+        """
+        path = self._dump_path if path is None else path
+        if path is not None:
+            self.summary().to_csv(path, index=False)
+        self._last_dump_ns = monotonic_ns()
+
+    def maybe_dump(self):
+        """
+        calls dump() if at least 'dump_every' seconds passed since the last dump.
+        """
+        if self._dump_path is not None and (monotonic_ns() - self._last_dump_ns) >= self._dump_every_ns:
+            self.dump()
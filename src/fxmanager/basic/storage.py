@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+"""
+This module contains the functions used for writing and reading the preprocessed timeframe files ('data_dir\\time_frames\\<day>\\<tf>\\<currency_pair>_<tf>.<ext>').
+
+the files are written in one of the following storage formats, the readers find the format of a file from its extension so every reader works with any of them:
+    - csv     : text files (the default), readable by any tool but every read parses the numbers and timestamps again.
+    - npz     : numpy '.npz' archives with an array per column (the times as datetime64), columns are loaded without parsing and only the requested ones are read.
+    - feather : Apache Arrow feather files, requires 'pyarrow'.
+    - parquet : Apache Parquet files, requires 'pyarrow'.
+
+in compact mode ('compact=True' in the writer and the readers) the columns no loader or simulator reads (COMPACT_DROP, the price samples) are dropped, the prices and returns are float32 and the tick volumes int32, which takes ~40% of the memory of the full frames (~60% for the prices alone, the datetime index stays int64).
+precision guarantees of float32 (24 bit mantissa, relative error below 6e-8):
+    - 5-decimal quotes below 128 and 3-decimal quotes (JPY pairs) below 16384 are recovered exactly by rounding ('np.round(prices, 5)'), a stored price below 2 is off by less than 6e-8 (0.0006 pip).
+    - arithmetic on float32 prices stays in float32, the difference of two prices below 2 is off by up to ~1.2e-7 (0.0012 pip), relative errors of returns are below 1e-6.
+    - csv files store the shortest text of the float32 values, which is the text of the quote for quotes of up to 7 significant digits, so they read back exactly in full mode.
+
+Public Functions:
+    - storage_formats()  : returns the storage formats available in the current environment.
+    - write_time_frame() : writes the dataframe of a timeframe in the given storage format.
+    - time_frame_path()  : finds the file of a timeframe whatever its storage format.
+    - read_time_frame()  : reads (some of the columns of) the file of a timeframe.
+    - compact_frame()    : returns a dataframe in compact mode.
+"""
+
+from importlib.util import find_spec
+from os import remove
+from os.path import isfile
+import numpy as np
+import pandas as pd
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+# file extension of every storage format
+EXTENSIONS = {'csv': '.csv', 'npz': '.npz', 'feather': '.feather', 'parquet': '.parquet'}
+
+# columns dropped in compact mode, no loader or simulator reads them
+COMPACT_DROP = ['ask_sample1', 'bid_sample1', 'ask_sample2', 'bid_sample2']
+
+def storage_formats():
+    """
+    returns the list of the storage formats available in the current environment ('feather' and 'parquet' require 'pyarrow').
+    """
+    formats = ['csv', 'npz']
+    if find_spec('pyarrow') is not None:
+        formats += ['feather', 'parquet']
+    return formats
+
+def _cast(df, float_dtype, int_dtype):
+    """
+    returns 'df' with its float columns as 'float_dtype' and its integer columns as 'int_dtype' (no copy of the columns that already are).
+    """
+    dtypes = {col: float_dtype if kind == 'f' else int_dtype for col, kind in zip(df.columns, df.dtypes.map(lambda dtype: dtype.kind)) if kind in 'fiu'}
+    if all(df[col].dtype == dtype for col, dtype in dtypes.items()):
+        return df
+    return df.astype(dtypes)
+
+def compact_frame(df, drop=True):
+    """
+    returns 'df' in compact mode: float columns as float32 and integer columns as int32, and if 'drop' is True, without the columns of COMPACT_DROP.
+    """
+    if drop:
+        df = df.drop(columns=[col for col in COMPACT_DROP if col in df.columns])
+    return _cast(df, np.float32, np.int32)
+
+def write_time_frame(df, path, storage_format='csv', compact=False):
+    """
+    writes the dataframe of a timeframe (datetime index named 'time') to 'path' with the extension of 'storage_format', the files of the same timeframe in the other storage formats are removed so a directory never lists a currency pair twice.
+
+    Args:
+        - df            : pandas dataframe to be written.
+        - path          : string with the full path of the file without extension.
+        - storage_format: string with the storage format ('csv', 'npz', 'feather' or 'parquet').
+        - compact       : boolean flag, if True, the dataframe is written in compact mode (see 'compact_frame()').
+    Returns:
+        - path: string with the full path of the written file.
+    """
+    if storage_format not in EXTENSIONS:
+        raise ValueError(f'unknown storage format: {storage_format!r}, supported formats are {list(EXTENSIONS)}')
+    if storage_format not in storage_formats():
+        raise ImportError(f'the {storage_format!r} storage format requires pyarrow')
+    if compact:
+        df = compact_frame(df)
+    base, path = path, path + EXTENSIONS[storage_format]
+    if storage_format == 'csv':
+        df.to_csv(path)
+    elif storage_format == 'npz':
+        # np.savez adds '.npz' to a path without it, the file object keeps the given name
+        with open(path, 'wb') as f:
+            np.savez(f, time=pd.DatetimeIndex(df.index).as_unit('ns').to_numpy(), **{col: df[col].to_numpy() for col in df.columns})
+    elif storage_format == 'feather':
+        df.reset_index().to_feather(path)
+    else:
+        df.to_parquet(path)
+    for fmt, ext in EXTENSIONS.items():
+        if fmt != storage_format and isfile(base + ext):
+            remove(base + ext)
+    return path
+
+def time_frame_path(path):
+    """
+    returns the full path of the file of a timeframe given its path without extension.
+
+    Raises:
+        - FileNotFoundError: if there is no file in any storage format.
+    """
+    for ext in EXTENSIONS.values():
+        if isfile(path + ext):
+            return path + ext
+    raise FileNotFoundError(f'no preprocessed file found for {path} ({", ".join(EXTENSIONS.values())})')
+
+def read_time_frame(path, columns=None, compact=False):
+    """
+    reads the file of a timeframe written by 'write_time_frame()' in any storage format and mode.
+
+    Args:
+        - path   : string with the full path of the file, with or without extension.
+        - columns: list of the columns to read, if None, all the columns are read (but the columns of COMPACT_DROP in compact mode).
+        - compact: boolean flag, if True, the columns are float32 and int32 (see 'compact_frame()'), else float64 and int64 whatever the mode the file was written in.
+    Returns:
+        - df: pandas dataframe with the requested columns and a datetime index (ns) named 'time'.
+    """
+    df = _read(path, columns)
+    if compact:
+        return compact_frame(df, drop=columns is None)
+    return _cast(df, np.float64, np.int64)
+
+def _read(path, columns):
+    """
+    helper function for 'fxmanager.basic.storage.read_time_frame()' function, reads the columns as they are stored.
+    """
+    if not path.endswith(tuple(EXTENSIONS.values())):
+        path = time_frame_path(path)
+    if path.endswith('.npz'):
+        # the times are stored in ns, no conversion is needed
+        with np.load(path) as npz:
+            names = [name for name in npz.files if name != 'time'] if columns is None else list(columns)
+            return pd.DataFrame({name: npz[name] for name in names}, index=pd.DatetimeIndex(npz['time'], name='time'))
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, index_col='time', usecols=None if columns is None else ['time'] + list(columns))
+        df.index = pd.to_datetime(df.index, format='ISO8601')
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path, columns=None if columns is None else ['time'] + list(columns)).set_index('time')
+    else:
+        df = pd.read_parquet(path, columns=columns)
+    # the same index whatever the format (the resolution of parsed and stored times differ)
+    df.index = pd.DatetimeIndex(df.index, name='time').as_unit('ns')
+    return df
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+This module contains the functions used for parsing the times of the raw data files and placing their rows in the 1-min slots of whole days, used by 'fxmanager.basic.util.preprocess()'.
+
+times are handled as int64 nanoseconds since the epoch, so days and minute slots are computed arithmetically and the gaps are filled with array operations instead of building and reindexing a datetime index for every file. the date strings of the formats made of fixed width numbers (e.g. '%d.%m.%Y %H:%M:%S.%f' or '%Y.%m.%d %H:%M') are parsed straight from their bytes, any other format (or string that does not fit the format) goes through 'pd.to_datetime()'.
+
+Public Functions:
+    - parse_times()    : parses date strings to int64 nanoseconds since the epoch.
+    - business_days()  : returns the start times of the business days starting at the day of a given time.
+    - reindex_minutes(): places rows in the 1-min slots of a day, filling the empty slots with the previous (or next) row.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+NS_PER_SEC = 10**9
+NS_PER_MIN = 60 * NS_PER_SEC
+NS_PER_DAY = 1440 * NS_PER_MIN
+
+# width of the fixed width directives, '%f' takes the remaining characters (1 to 9 digits)
+_WIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+
+def _fields(date_format, length):
+    """
+    helper function for 'fxmanager.basic.times.parse_times()' function.
+
+    returns the columns of every directive ({directive: (start, end)}) and the literal characters ({column: byte}) of strings of 'length' characters in 'date_format', or None if the format is not made of fixed width numbers.
+    """
+    tokens = re.findall(r'%.|[^%]', date_format)
+    fixed = sum(_WIDTHS.get(token[1], 0) if token.startswith('%') else len(token.encode()) for token in tokens)
+    fields, literals, column = {}, {}, 0
+    for token in tokens:
+        if token.startswith('%'):
+            directive = token[1]
+            if directive == 'f' and 0 < length - fixed <= 9:
+                width = length - fixed
+            elif directive in _WIDTHS:
+                width = _WIDTHS[directive]
+            else:
+                return None
+            if directive in fields:
+                return None
+            fields[directive] = (column, column + width)
+            column += width
+        else:
+            for byte in token.encode():
+                literals[column] = byte
+                column += 1
+    if column != length or not {'Y', 'm', 'd'} <= fields.keys():
+        return None
+    return fields, literals
+
+def _parse_fixed_width(values, date_format):
+    """
+    helper function for 'fxmanager.basic.times.parse_times()' function.
+
+    parses the date strings from their bytes, returns None if they can not be parsed this way (not ASCII, not all of the same length, not fitting the format or out of range).
+    """
+    try:
+        raw = np.asarray(values).astype(np.bytes_)
+    except (UnicodeEncodeError, ValueError):
+        return None
+    length = raw.dtype.itemsize
+    layout = _fields(date_format, length) if len(raw) else None
+    if layout is None:
+        return None
+    fields, literals = layout
+    chars = raw.view(np.uint8).reshape(len(raw), length)
+    if literals:
+        columns = list(literals)
+        if not (chars[:, columns] == np.array(list(literals.values()), dtype=np.uint8)).all():
+            return None
+    numbers = {}
+    for directive, (start, end) in fields.items():
+        digits = chars[:, start:end] - np.uint8(ord('0'))
+        # shorter strings end with NUL bytes, which are not digits either
+        if (digits > 9).any():
+            return None
+        numbers[directive] = digits.astype(np.int64) @ 10 ** np.arange(end - start - 1, -1, -1, dtype=np.int64)
+    year, month, day = numbers['Y'], numbers['m'], numbers['d']
+    hour, minute, second = numbers.get('H', 0), numbers.get('M', 0), numbers.get('S', 0)
+    if ((month < 1) | (month > 12) | (day < 1) | (np.asarray(hour) > 23) | (np.asarray(minute) > 59) | (np.asarray(second) > 59)).any():
+        return None
+    months = (year - 1970) * 12 + month - 1
+    month_start = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    month_end = (months + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    if (month_start + day - 1 >= month_end).any():
+        return None
+    times = (month_start + day - 1) * NS_PER_DAY + (hour * 3600 + minute * 60 + second) * NS_PER_SEC
+    if 'f' in fields:
+        start, end = fields['f']
+        times = times + numbers['f'] * 10 ** (9 - (end - start))
+    return times
+
+def parse_times(values, date_format):
+    """
+    parses date strings to int64 nanoseconds since the epoch, the same times 'pd.to_datetime(values, format=date_format)' gives.
+
+    Args:
+        - values     : array-like of date strings (e.g. a column of a raw data file).
+        - date_format: string with the strftime format of the dates.
+    Returns:
+        - times: numpy int64 array of nanoseconds since the epoch.
+    """
+    times = _parse_fixed_width(values, date_format)
+    if times is None:
+        times = pd.DatetimeIndex(pd.to_datetime(values, format=date_format)).as_unit('ns').asi8
+    return times
+
+def business_days(time, num_days):
+    """
+    returns the start times (int64 ns) of 'num_days' business days starting at the day of 'time' (or the next Monday if it falls on a weekend), like 'pd.date_range(day, freq='B', periods=num_days)'.
+    """
+    first_day = np.datetime64(int(time) // NS_PER_DAY, 'D')
+    days = np.busday_offset(first_day, np.arange(num_days), roll='forward')
+    return days.astype('datetime64[ns]').astype(np.int64)
+
+def _bfill(values):
+    """
+    helper function for 'fxmanager.basic.times.reindex_minutes()' function, fills the NaN values of every column of a 2D array with the next value of the column like 'DataFrame.bfill()'.
+    """
+    n = len(values)
+    rows = np.where(np.isnan(values), n, np.arange(n)[:, None])
+    rows = np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+    filled = values[np.minimum(rows, n - 1), np.arange(values.shape[1])]
+    filled[rows == n] = np.nan
+    return filled
+
+def reindex_minutes(times, values, day_start, periods=1440, bfill=False):
+    """
+    places rows in the 1-min slots of a day, like 'df.reindex(pd.date_range(day_start, freq='min', periods=periods), method='ffill')': every slot takes the last row at or before its time (the last of the rows with the same time), the slots before the first row are NaN, or if 'bfill' is True, every NaN takes the next value of its column.
+
+    Args:
+        - times    : numpy int64 array of the times (ns) of the rows, sorted ascending.
+        - values   : 2D numpy float array with a row per time.
+        - day_start: integer time (ns) of the first slot.
+        - periods  : integer number of slots.
+        - bfill    : boolean flag, if True, the NaN values are filled with the next value of their column.
+    Returns:
+        - slots : numpy int64 array of the times (ns) of the slots.
+        - values: 2D numpy float array with a row per slot.
+    Raises:
+        - ValueError: if the times are not sorted.
+    """
+    if len(times) > 1 and (np.diff(times) < 0).any():
+        raise ValueError('the times of the rows must be sorted ascending to be placed in 1-min slots')
+    slots = day_start + np.arange(periods, dtype=np.int64) * NS_PER_MIN
+    positions = np.searchsorted(times, slots, side='right') - 1
+    if len(times) == 0:
+        filled = np.full((periods, values.shape[1]), np.nan)
+    else:
+        filled = values[np.maximum(positions, 0)].astype(np.float64)
+        filled[positions < 0] = np.nan
+    if bfill:
+        filled = _bfill(filled)
+    return slots, filled
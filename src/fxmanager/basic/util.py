@@ -11,22 +11,29 @@ Public Functions:
 
 import sys
 import json
-from os import getcwd, mkdir, listdir
-from os.path import join, isfile
+import hashlib
+from os import getcwd, mkdir, listdir, cpu_count, replace
+from os.path import join, isfile, basename, relpath, getsize, getmtime
 from time import sleep
 import operator as op
 from functools import reduce
 from shutil import copyfile
 import inspect
 from textwrap import dedent
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from fxmanager.strategies.template import strategy_template
+from fxmanager.basic.storage import write_time_frame, read_time_frame
+from fxmanager.basic.times import NS_PER_DAY, parse_times, business_days, reindex_minutes
 import fxmanager._metadata as md
 from __main__ import __dict__
 
 __dict__.update(md.__dict__)
 
+# version of the preprocessed files, part of the preprocessing manifest parameters so a change of the columns reprocesses every file
+_PREPROCESSING_VERSION = 2
+
 def get_avg_rets(day, data_dir=None, time_frames=[], currency_pairs=[]):
     """
     gets the average best & worst returns of the passed currency pairs & timeframes from the preprocessed data in the 'data_dir\\time_frames' directory.
@@ -53,7 +60,7 @@ def get_avg_rets(day, data_dir=None, time_frames=[], currency_pairs=[]):
     for i in time_frames:
         tf_rets = pd.DataFrame()
         for cp in currency_pairs:
-            df = pd.read_csv(join(data_dir, 'time_frames', str(day), i , cp+'_'+i+'.csv'), parse_dates=True) 
+            df = read_time_frame(join(data_dir, 'time_frames', str(day), i, cp+'_'+i), columns=['best_rets', 'wrst_rets'])
             # Calculate average returns
             comp_best_rets = (df['best_rets']).mean()
             comp_wrst_rets = (df['wrst_rets']).mean()
@@ -270,8 +277,7 @@ def expected_return(day=0, data_dir=None, time_frames=[], currency_pairs=[], wei
     for i in range(n_scenarios):
         scenario_rets = 0
         for tf, cp, weight in zip(time_frames, currency_pairs, weights):
-            file_name = cp + '_' + tf + '.csv'
-            df = pd.read_csv(join(data_dir, 'time_frames', str(day), tf, file_name))
+            df = read_time_frame(join(data_dir, 'time_frames', str(day), tf, cp + '_' + tf), columns=['best_rets', 'wrst_rets'])
             df.loc[:, ('best_rets', 'wrst_rets')] /= leverage
             num_wins = int(win_rate * df.shape[0])
             num_losses = df.shape[0] - num_wins
@@ -406,7 +412,7 @@ def setup(app_type='', raw_data_dir='', live_raw_data_dir='', raw_data_type='',
             for i in range(1,num_tfs+1):
                 mkdir(join(cwd,'data', 'live_data', 'time_frames', str(i)+'min'))
             
-            raw_file_names = [f for f in listdir(live_raw_data_dir)]
+            raw_file_names = _data_file_names(live_raw_data_dir)
             for file_name in raw_file_names:
                 currency_pair = ''.join([file_name[n] for n,m in enumerate(file_name_format) if m =='c'])
                 new_file_name = currency_pair + '.csv'
@@ -415,7 +421,7 @@ def setup(app_type='', raw_data_dir='', live_raw_data_dir='', raw_data_type='',
         print('>> SYSTEM MESSAGE >> All Necessary Folders And Files Are Created Successfully! ..\n')
         print('>> SYSTEM MESSAGE >> STAGE 2: Coppying Raw Data Files ..\n')
         
-        raw_file_names = [f for f in listdir(raw_data_dir)]
+        raw_file_names = _data_file_names(raw_data_dir)
         if raw_data_type == 'daily_bid_ask' or raw_data_type == 'daily_candles':
             dates = []
             for file_name in raw_file_names:
@@ -460,7 +466,7 @@ def setup(app_type='', raw_data_dir='', live_raw_data_dir='', raw_data_type='',
         print('>> SYSTEM MESSAGE >> All Necessary Folders Are Created Successfully! ..\n')
         print('>> SYSTEM MESSAGE >> STAGE 2: Coppying Raw Data Files ..\n')
 
-        raw_file_names = [f for f in listdir(live_raw_data_dir)]
+        raw_file_names = _data_file_names(live_raw_data_dir)
         for file_name in raw_file_names:
             currency_pair = ''.join([file_name[n] for n,m in enumerate(file_name_format) if m =='c'])
             new_file_name = currency_pair + '.csv'
@@ -473,204 +479,386 @@ def setup(app_type='', raw_data_dir='', live_raw_data_dir='', raw_data_type='',
     
     print('>> SYSTEM MESSAGE >> Finishing ..\n')
 
+def _time_buckets(index, tf):
+    """
+    helper function for 'fxmanager.basic.util.process_daily_bid_ask()' and 'fxmanager.basic.util.process_ohlc()' functions.
+
+    assigns the rows of a DatetimeIndex to the buckets 'pd.Grouper(freq=tf)' groups them in (origin at midnight of the first day, rows in time order within a bucket) without building the groups.
+
+    Returns:
+        - times    : DatetimeIndex (named 'time') of all the buckets from the first to the last non-empty one.
+        - positions: numpy array with the positions of the non-empty buckets in 'times'.
+        - first    : numpy array with the position of the first row of every non-empty bucket in 'index'.
+        - last     : numpy array with the position of the last row of every non-empty bucket in 'index'.
+    """
+    step = pd.Timedelta(pd.tseries.frequencies.to_offset(tf))
+    if len(index) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return pd.DatetimeIndex([], name='time'), empty, empty, empty
+    index = pd.DatetimeIndex(index)
+    origin = index.min().normalize()
+    # integer arithmetic in the resolution of the index (ns, us, ..)
+    stamps = index.asi8 - origin.as_unit(index.unit).asm8.astype(np.int64)
+    unit_step = step.as_unit(index.unit).asm8.astype(np.int64)
+
+    # evenly spaced rows (e.g. complete 1-min candles) whose spacing divides the timeframe: every bucket is a fixed number of rows
+    spacing = stamps[1] - stamps[0] if len(stamps) > 1 else unit_step
+    if spacing > 0 and unit_step % spacing == 0 and (len(stamps) == 1 or (np.diff(stamps) == spacing).all()):
+        width = unit_step // spacing
+        skip = (stamps[0] % unit_step) // spacing
+        starts = np.r_[0, np.arange(width - skip, len(stamps), width)] if skip else np.arange(0, len(stamps), width)
+        ends = np.r_[starts[1:], len(stamps)] - 1
+        times = pd.date_range(start=origin + (stamps[0] // unit_step) * step, periods=len(starts), freq=step, name='time')
+        return times, np.arange(len(starts)), starts, ends
+
+    codes = stamps // unit_step
+    # rows are usually sorted already, unsorted rows are sorted by time like pd.Grouper does
+    order = np.argsort(stamps, kind='stable') if (stamps[1:] < stamps[:-1]).any() else None
+    if order is not None:
+        codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)] - 1
+    times = pd.date_range(start=origin + codes[0] * step, periods=codes[-1] - codes[0] + 1, freq=step, name='time')
+    positions = codes[starts] - codes[0]
+    if order is not None:
+        starts, ends = order[starts], order[ends]
+    return times, positions, starts, ends
+
+def _bucket_values(values, positions, n, fill=None):
+    """
+    helper function for 'fxmanager.basic.util.process_daily_bid_ask()' and 'fxmanager.basic.util.process_ohlc()' functions.
+
+    spreads the values of the non-empty buckets over all the 'n' buckets, the empty ones take the value of 'fill' (an array of n values) at the same bucket or, if 'fill' is None, the value of the previous non-empty bucket.
+    """
+    if fill is not None:
+        out = np.array(fill, dtype=np.float64)
+        out[positions] = values
+        return out
+    filled = np.zeros(n, dtype=np.int64)
+    filled[positions] = positions
+    return np.asarray(values, dtype=np.float64)[np.searchsorted(positions, np.maximum.accumulate(filled))]
+
+def _time_frame_buckets(index, time_frames):
+    """
+    helper function for 'fxmanager.basic.util.process_daily_bid_ask_time_frames()' and 'fxmanager.basic.util.process_ohlc_time_frames()' functions.
+
+    computes '_time_buckets()' of every timeframe of 'time_frames' (from the finest to the coarsest), a timeframe that is a multiple of a finer one is built from the non-empty buckets of the coarsest such timeframe instead of the rows of 'index' (the buckets of both start at the same midnight, so every coarse bucket is a run of whole fine buckets and its first/last rows are the first row of its first fine bucket and the last row of its last fine bucket).
+
+    Returns:
+        - buckets: dictionary {tf: (times, positions, first, last, parent, starts)}, ordered from the finest timeframe, with the same (times, positions, first, last) as '_time_buckets(index, tf)', 'parent' is the timeframe the buckets are built from (None if built from the rows) and 'starts' the position of the first non-empty bucket of the parent (or the first row) of every non-empty bucket.
+    """
+    steps = {tf: pd.Timedelta(pd.tseries.frequencies.to_offset(tf)) for tf in time_frames}
+    buckets = {}
+    for tf in sorted(steps, key=steps.get):
+        finer = [f for f in buckets if steps[tf] % steps[f] == pd.Timedelta(0)]
+        if not finer:
+            times, positions, first, last = _time_buckets(index, tf)
+            buckets[tf] = (times, positions, first, last, None, first)
+            continue
+        parent = max(finer, key=steps.get)
+        times, positions, first, last = buckets[parent][:4]
+        coarse_times, coarse_positions, coarse_first, coarse_last = _time_buckets(times[positions], tf)
+        buckets[tf] = (coarse_times, coarse_positions, first[coarse_first], last[coarse_last], parent, coarse_first)
+    return buckets
+
+def _extremes(values, at, starts, ufunc):
+    """
+    helper function for 'fxmanager.basic.util._aggregate_time_frames()' function.
+
+    reduces the runs of 'values' beginning at 'starts' with 'ufunc' (np.maximum or np.minimum) and returns the extremes with the 'at' (row position) of the first value of every run that reaches its extreme, like 'idxmax()' and 'idxmin()'.
+    """
+    if len(starts) == 0:
+        return values[:0], at[:0]
+    extremes = ufunc.reduceat(values, starts)
+    reached = values == np.repeat(extremes, np.diff(np.r_[starts, len(values)]))
+    first_reached = np.minimum.reduceat(np.where(reached, np.arange(len(values)), len(values)), starts)
+    return extremes, at[first_reached]
+
+def _aggregate_time_frames(index, time_frames, ask_open, bid_open, ask_close, bid_close, ask_high, bid_high, ask_low, bid_low, tick_volume, seed=0):
+    """
+    helper function for 'fxmanager.basic.util.process_daily_bid_ask_time_frames()' and 'fxmanager.basic.util.process_ohlc_time_frames()' functions.
+
+    groups the Bid/Ask prices of the rows of 'index' (ticks or 1-min candles) by every timeframe of 'time_frames' and builds the dataframe of every timeframe:
+        - ask/bid open and close  : the first open and last close of every candle.
+        - best_rets               : if the highest Bid is above the lowest Ask, the return of buying at the lowest Ask and selling at the highest Bid, relative to the lowest Ask if the highest Bid comes after it or to the highest Bid if it comes first, else 0.
+        - wrst_rets               : the return of buying at the highest Ask and selling at the lowest Bid, relative to the lowest Bid or the highest Ask following the order of the extremes used by 'best_rets' (or of the lowest Bid and the highest Ask if 'best_rets' is 0).
+        - ask/bid sample1, sample2: the open prices of a random row in the first half of the candle and the close prices of a random row in the second half (the halves share the first row at or after the middle time), the random rows are drawn with 'seed' so the output is reproducible.
+        - tick_volume             : the sum of 'tick_volume' in every candle.
+    candles without rows take the close price of the previous candle as open, close and sample prices, 0 'best_rets' and 'tick_volume' and the spread of that close as 'wrst_rets'.
+
+    the extremes and volumes of a timeframe built from a finer one (see '_time_frame_buckets()') are reduced from the candles of the finer timeframe.
+    """
+    # rows in time order like pd.Grouper (so every bucket is a run of rows)
+    index = pd.DatetimeIndex(index)
+    if not index.is_monotonic_increasing:
+        order = np.argsort(index.asi8, kind='stable')
+        index = index[order]
+        ask_open, bid_open, ask_close, bid_close = ask_open[order], bid_open[order], ask_close[order], bid_close[order]
+        ask_high, bid_high, ask_low, bid_low, tick_volume = ask_high[order], bid_high[order], ask_low[order], bid_low[order], tick_volume[order]
+    stamps = index.asi8
+    rows = np.arange(len(index))
+
+    tf_dfs = {}
+    levels = {None: (bid_high, rows, ask_low, rows, bid_low, rows, ask_high, rows, tick_volume)}
+    for tf, (times, positions, first, last, parent, starts) in _time_frame_buckets(index, time_frames).items():
+        p_bid_high, p_bid_high_at, p_ask_low, p_ask_low_at, p_bid_low, p_bid_low_at, p_ask_high, p_ask_high_at, p_volume = levels[parent]
+        b_bid_high, b_bid_high_at = _extremes(p_bid_high, p_bid_high_at, starts, np.maximum)
+        b_ask_low, b_ask_low_at = _extremes(p_ask_low, p_ask_low_at, starts, np.minimum)
+        b_bid_low, b_bid_low_at = _extremes(p_bid_low, p_bid_low_at, starts, np.minimum)
+        b_ask_high, b_ask_high_at = _extremes(p_ask_high, p_ask_high_at, starts, np.maximum)
+        b_volume = np.add.reduceat(p_volume, starts) if len(starts) else p_volume[:0]
+        levels[tf] = (b_bid_high, b_bid_high_at, b_ask_low, b_ask_low_at, b_bid_low, b_bid_low_at, b_ask_high, b_ask_high_at, b_volume)
+
+        # best and worst returns, the order of the extremes decides whether the trade is a buy or a sell
+        profitable = b_bid_high > b_ask_low
+        buy_first = stamps[b_bid_high_at] >= stamps[b_ask_low_at]
+        best_rets = np.where(profitable, (b_bid_high - b_ask_low) / np.where(buy_first, b_ask_low, b_bid_high), 0.0)
+        worst_buy_first = np.where(profitable, buy_first, stamps[b_bid_low_at] >= stamps[b_ask_high_at])
+        wrst_rets = (b_bid_low - b_ask_high) / np.where(worst_buy_first, b_bid_low, b_ask_high)
+
+        # a random row in each half of every candle
+        middle = np.searchsorted(stamps, stamps[first] + (stamps[last] - stamps[first]) // 2)
+        draws = np.random.default_rng(seed).random((2, len(first)))
+        sample1 = first + (draws[0] * (middle - first + 1)).astype(np.int64)
+        sample2 = middle + (draws[1] * (last - middle + 1)).astype(np.int64)
+
+        n = len(times)
+        ask_close_tf = _bucket_values(ask_close[last], positions, n)
+        bid_close_tf = _bucket_values(bid_close[last], positions, n)
+        final_df = pd.DataFrame({'best_rets':_bucket_values(best_rets, positions, n, fill=np.zeros(n)),
+                                 'wrst_rets':_bucket_values(wrst_rets, positions, n, fill=(bid_close_tf - ask_close_tf) / bid_close_tf),
+                                 'ask_open':_bucket_values(ask_open[first], positions, n, fill=ask_close_tf),
+                                 'bid_open':_bucket_values(bid_open[first], positions, n, fill=bid_close_tf),
+                                 'ask_close':ask_close_tf,
+                                 'bid_close':bid_close_tf,
+                                 'ask_sample1':_bucket_values(ask_open[sample1], positions, n, fill=ask_close_tf),
+                                 'bid_sample1':_bucket_values(bid_open[sample1], positions, n, fill=bid_close_tf),
+                                 'ask_sample2':_bucket_values(ask_close[sample2], positions, n, fill=ask_close_tf),
+                                 'bid_sample2':_bucket_values(bid_close[sample2], positions, n, fill=bid_close_tf),
+                                 'tick_volume':_bucket_values(b_volume, positions, n, fill=np.zeros(n)).astype(np.int64)
+                                }, index=times)
+        tf_dfs[tf] = final_df
+    return tf_dfs
+
+def process_daily_bid_ask_time_frames(df, time_frames):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    used to group the given Bid/Ask data by every timeframe of 'time_frames' in a single pass and calculate the candle sticks of every timeframe (see 'process_daily_bid_ask()').
+
+    Returns:
+        - tf_dfs: dictionary {tf: dataframe} with the same dataframes as 'process_daily_bid_ask(df, tf)'.
+    """
+    ask = df['ask'].to_numpy(dtype=np.float64)
+    bid = df['bid'].to_numpy(dtype=np.float64)
+    return _aggregate_time_frames(df.index, time_frames, ask, bid, ask, bid, ask, bid, ask, bid, np.ones(len(df), dtype=np.int64))
+
 def process_daily_bid_ask(df, tf):
     """
     helper function for 'fxmanager.basic.util.preprocess()' function.
     
-    used to group the given Bid/Ask data by the given timeframe and calculate open and close prices for the new candle sticks in the new timeframe.
-    """
-    # initialize placeholders for final data
-    ask_open = []
-    bid_open = []
-    ask_close = []
-    bid_close = []
-    # ask_high = []
-    # bid_high = []
-    # ask_low	= []
-    # bid_low = []
-    # ask_sample1 = []
-    # bid_sample1 = []
-    # ask_sample2 = []
-    # bid_sample2 = []
-    # best_rets = []
-    # wrst_rets = []
-    # tick_volume = []
-
-    # get a DataFrame that is grouped by the specified timeframe
-    grouped = pd.DataFrame(df.groupby(pd.Grouper(freq=tf)), columns=['time', 'sub_dataframes'])
-
-    for dataframe in grouped['sub_dataframes']:
-        # tick_volume.append(dataframe.shape[0])
-        if dataframe.shape[0] != 0:
-            ask_open.append(dataframe['ask'][0])
-            bid_open.append(dataframe['bid'][0])
-            ask_close.append(dataframe['ask'][-1])
-            bid_close.append(dataframe['bid'][-1])
-            # ask_high.append(dataframe['ask'].max())
-            # bid_high.append(dataframe['bid'].max())
-            # ask_low.append(dataframe['ask'].min())
-            # bid_low.append(dataframe['bid'].min())
-            
-            # delta_t = (dataframe.index[-1]-dataframe.index[0])/2
-            # open_plus_delta = delta_t + dataframe.index[0]
-            # idx_diff = dataframe.index - open_plus_delta
-            # pos_idx_diff = [a for a in idx_diff if a.days==0]
-            # idx = min(pos_idx_diff) + open_plus_delta
-
-            # ask_sample1.append(dataframe.loc[dataframe.index[0]:idx]['ask'].sample().values[0])
-            # bid_sample1.append(dataframe.loc[dataframe.index[0]:idx]['bid'].sample().values[0])
-            # ask_sample2.append(dataframe.loc[idx:dataframe.index[-1]]['ask'].sample().values[0])
-            # bid_sample2.append(dataframe.loc[idx:dataframe.index[-1]]['bid'].sample().values[0])
-            
-            # if bid_high[-1] > ask_low[-1]:
-            #     ## if minimum ask price comes first >> buy >> devide by ask_low
-            #     if max(dataframe['bid'].idxmax(), dataframe['ask'].idxmin()) == dataframe['bid'].idxmax():
-            #         best_rets.append((bid_high[-1]-ask_low[-1]) / ask_low[-1])
-            #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / bid_low[-1])
-            #     ## if maximum bid price comes first >> sell >> devide by bid_high
-            #     else:
-            #         best_rets.append((bid_high[-1]-ask_low[-1]) / bid_high[-1])
-            #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / ask_high[-1])
-
-            # else:
-            #     best_rets.append(0)
-            #     if max(dataframe['bid'].idxmin(), dataframe['ask'].idxmax()) == dataframe['bid'].idxmin():
-            #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / bid_low[-1])
-            #     else:
-            #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / ask_high[-1])
-            
-        else:
-            ask_open.append(ask_close[-1])
-            bid_open.append(bid_close[-1])
-            ask_close.append(ask_close[-1])
-            bid_close.append(bid_close[-1])
-            # ask_high.append(ask_close[-1])
-            # bid_high.append(bid_close[-1])
-            # ask_low.append(ask_close[-1])
-            # bid_low.append(bid_close[-1])
-            # ask_sample1.append(ask_close[-1])
-            # bid_sample1.append(bid_close[-1])
-            # ask_sample2.append(ask_close[-1])
-            # bid_sample2.append(bid_close[-1])
-            # best_rets.append(0)
-            # wrst_rets.append((bid_low[-1]-ask_high[-1]) / bid_low[-1])
-    dummy = [0,]*len(grouped)
-    final_df = pd.DataFrame({'best_rets':dummy,
-                             'wrst_rets':dummy,
-                             'ask_open':ask_open,
-                             'bid_open':bid_open,
-                             'ask_close':ask_close,
-                             'bid_close':bid_close,
-                             'ask_sample1':dummy,
-                             'bid_sample1':dummy,
-                             'ask_sample2':dummy,
-                             'bid_sample2':dummy,
-                             'tick_volume':dummy
-                            }, index=pd.to_datetime(grouped['time']))
-    return final_df
+    used to group the given Bid/Ask data by the given timeframe and calculate open and close prices, best and worst returns, price samples and tick volumes for the new candle sticks in the new timeframe.
 
-def process_ohlc(df, tf):
+    the open and close prices are the first and last ticks of every candle, the tick volume is the number of ticks, candles without ticks take the close price of the previous candle as open and close prices (see '_aggregate_time_frames()' for the other columns).
+    """
+    return process_daily_bid_ask_time_frames(df, [tf])[tf]
+
+def process_ohlc_time_frames(df, time_frames):
     """
     helper function for 'fxmanager.basic.util.preprocess()' function.
 
-    used to group the given OHLCV data by the given timeframe and calculate open and close prices for the new candle sticks in the new timeframe.
-    """
-
-    # initialize placeholders for final data
-    ask_open = []
-    bid_open = []
-    ask_close = []
-    bid_close = []
-    # ask_high = []
-    # bid_high = []
-    # ask_low	= []
-    # bid_low = []
-    # ask_sample1 = []
-    # bid_sample1 = []
-    # ask_sample2 = []
-    # bid_sample2 = []
-    # best_rets = []
-    # wrst_rets = []
-    # tick_volume = []
-
-    # Calculate spread using Corwin-Schultz model
-    l = df['low']
-    h = df['high']
-    gamma = (np.log(h.rolling(2).max()/l.rolling(2).min()))**2
-    beta = (np.log(h/l))**2 + (np.log(h.shift(1)/l.shift(1)))**2
+    used to group the given OHLCV data by every timeframe of 'time_frames' in a single pass and calculate the candle sticks of every timeframe (see 'process_ohlc()'), the spread is calculated once for all the timeframes.
+
+    Returns:
+        - tf_dfs: dictionary {tf: dataframe} with the same dataframes as 'process_ohlc(df, tf)'.
+    """
+
+    # Calculate spread using Corwin-Schultz model (on arrays, the candles of the previous minute are shifted in with a NaN first)
+    l = df['low'].to_numpy(dtype=np.float64)
+    h = df['high'].to_numpy(dtype=np.float64)
+    l_prev = np.r_[np.nan, l[:-1]]
+    h_prev = np.r_[np.nan, h[:-1]]
+    gamma = (np.log(np.maximum(h, h_prev)/np.minimum(l, l_prev)))**2
+    beta = (np.log(h/l))**2 + (np.log(h_prev/l_prev))**2
     alpha = ((np.sqrt(2*beta) - np.sqrt(beta)) / (3-(2*np.sqrt(2)))) - np.sqrt(gamma / (3-(2*np.sqrt(2))))
     s = 2*(np.exp(alpha)-1) / (1+np.exp(alpha))
-    s = abs(s).round(5)
+    s = np.abs(s).round(5)
     s[0] = s[1]
 
-    # Add bid/ask column to df 
-    df = pd.DataFrame({'bid_open': df['open'].values,
-                       'ask_open': (df['open'].to_numpy()+s).round(5),
-                       'bid_close': df['close'].values,
-                       'ask_close': (df['close'].to_numpy()+s).round(5),
-                       'bid_high': df['high'].values,
-                       'ask_high': (df['high'].to_numpy()+s).round(5),
-                       'bid_low': df['low'].values,
-                       'ask_low': (df['low'].to_numpy()+s).round(5),
-                       'tick_volume':df['tick_volume'].values}, index=df.index)
-    
-    # get a DataFrame that is grouped by the specified timeframe
-    grouped = pd.DataFrame(df.groupby(pd.Grouper(freq=tf)), columns=['time', 'sub_dataframes'])
-
-    for dataframe in grouped['sub_dataframes']:
-        # tick_volume.append(dataframe['tick_volume'].sum())
-        ask_open.append(dataframe['ask_open'][0])
-        bid_open.append(dataframe['bid_open'][0])
-        ask_close.append(dataframe['ask_close'][-1])
-        bid_close.append(dataframe['bid_close'][-1])
-        # ask_high.append(dataframe['ask_high'].max())
-        # bid_high.append(dataframe['bid_high'].max())
-        # ask_low.append((dataframe['ask_low'].min()))
-        # bid_low.append(dataframe['ask_low'].min())
-        
-        # delta_t = (dataframe.index[-1]-dataframe.index[0])/2
-        # open_plus_delta = delta_t + dataframe.index[0]
-        # idx_diff = dataframe.index - open_plus_delta
-        # pos_idx_diff = [a for a in idx_diff if a.days==0]
-        # idx = min(pos_idx_diff) + open_plus_delta
-
-        # ask_sample1.append(dataframe.loc[:idx]['ask_open'].sample().values[0])
-        # bid_sample1.append(dataframe.loc[:idx]['bid_open'].sample().values[0])
-        # ask_sample2.append(dataframe.loc[idx:]['ask_close'].sample().values[0])
-        # bid_sample2.append(dataframe.loc[idx:]['bid_close'].sample().values[0])
-        
-        # if bid_high[-1] > ask_low[-1]:
-        #     ## if minimum ask price comes first >> buy >> devide by ask_low
-        #     if max(dataframe['bid_high'].idxmax(), dataframe['ask_low'].idxmin()) == dataframe['bid_high'].idxmax():
-        #         best_rets.append((bid_high[-1]-ask_low[-1]) / ask_low[-1])
-        #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / bid_low[-1])
-        #     ## if maximum bid price comes first >> sell >> devide by bid_high
-        #     else:
-        #         best_rets.append((bid_high[-1]-ask_low[-1]) / bid_high[-1])
-        #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / ask_high[-1])
-        # else:
-        #     best_rets.append(0)
-        #     if max(dataframe['bid_low'].idxmin(), dataframe['ask_high'].idxmax()) == dataframe['bid_low'].idxmin():
-        #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / bid_low[-1])
-        #     else:
-        #         wrst_rets.append((bid_low[-1]-ask_high[-1]) / ask_high[-1])
-    
-    dummy = [0,]*len(grouped)
-    final_df = pd.DataFrame({'best_rets':dummy,
-                             'wrst_rets':dummy,
-                             'ask_open':ask_open,
-                             'bid_open':bid_open,
-                             'ask_close':ask_close,
-                             'bid_close':bid_close,
-                             'ask_sample1':dummy,
-                             'bid_sample1':dummy,
-                             'ask_sample2':dummy,
-                             'bid_sample2':dummy,
-                             'tick_volume':dummy
-                            }, index=pd.to_datetime(grouped['time']))
-    return final_df
-
-def preprocess(data_dir=None, app_type='', raw_data_type='', raw_data_format={}, save_logs=True):
+    # Bid/Ask prices of the 1-min candles
+    bid_open = df['open'].to_numpy(dtype=np.float64)
+    bid_close = df['close'].to_numpy(dtype=np.float64)
+    return _aggregate_time_frames(df.index, time_frames,
+                                  ask_open=(bid_open+s).round(5),
+                                  bid_open=bid_open,
+                                  ask_close=(bid_close+s).round(5),
+                                  bid_close=bid_close,
+                                  ask_high=(h+s).round(5),
+                                  bid_high=h,
+                                  ask_low=(l+s).round(5),
+                                  bid_low=l,
+                                  tick_volume=df['tick_volume'].to_numpy(dtype=np.float64))
+
+def process_ohlc(df, tf):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    used to group the given OHLCV data by the given timeframe and calculate open and close prices, best and worst returns, price samples and tick volumes for the new candle sticks in the new timeframe.
+
+    the open and close prices are the first open and last close of the 1-min candles in every candle, the extremes are their highs and lows, the tick volume is the sum of their tick volumes, candles without 1-min candles take the close price of the previous candle as open and close prices (see '_aggregate_time_frames()' for the other columns).
+    """
+    return process_ohlc_time_frames(df, [tf])[tf]
+
+def _data_file_names(data_dir):
+    """
+    helper function for 'fxmanager.basic.util.setup()' and 'fxmanager.basic.util.preprocess()' functions.
+
+    returns the sorted names of the files in a raw data folder, hidden files (e.g. the manifest of 'fxmanager.dwx.history_downloader' or '.DS_Store') are skipped.
+    """
+    return sorted(f for f in listdir(data_dir) if not f.startswith('.'))
+
+def _sorted_time_frames(tf_dir):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    returns the names of the timeframe folders in 'tf_dir' ('1min', '2min', ..) sorted by their number of minutes.
+    """
+    tf_list = listdir(tf_dir)
+    time_frames = []
+    for i in range(1, len(tf_list)+1):
+        for tf in tf_list:
+            if tf[1].isalpha():
+                x = int(tf[0])
+            else:
+                x = int(tf[:2])
+            if x == i:
+                time_frames.append(tf)
+    return time_frames
+
+def _file_signature(path):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    returns a dictionary with the size, mtime and sha1 hash of a file.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return {'size': getsize(path), 'mtime': getmtime(path), 'hash': sha1.hexdigest()}
+
+def _is_preprocessed(entry, path, params, data_dir):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    checks the manifest entry of a raw data file: the file is preprocessed if it was processed with the same parameters, all its outputs still exist and it did not change since (same size and mtime, or the same hash if only its mtime changed, in which case the mtime of the entry is updated).
+    """
+    if entry is None or entry['params'] != params:
+        return False
+    if not all(isfile(join(data_dir, output)) for output in entry['outputs']):
+        return False
+    if getsize(path) != entry['size']:
+        return False
+    if getmtime(path) == entry['mtime']:
+        return True
+    signature = _file_signature(path)
+    if signature['hash'] != entry['hash']:
+        return False
+    entry['mtime'] = signature['mtime']
+    return True
+
+def _save_manifest(manifest, manifest_path):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    writes the preprocessing manifest, through a temporary file so an interrupted run never leaves a broken manifest.
+    """
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=4)
+    replace(manifest_path + '.tmp', manifest_path)
+
+def _candles_rows(df, raw_data_format):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    returns the times (int64 ns, see 'fxmanager.basic.times.parse_times()') and the OHLCV values (a 2D float array with the columns open, high, low, close and tick_volume) of raw 1-min candles.
+    """
+    times = parse_times(df[raw_data_format['date_col']].to_numpy(), raw_data_format['date_format'])
+    values = np.column_stack([df[raw_data_format[key]].to_numpy(dtype=np.float64) for key in ['open_col', 'high_col', 'low_col', 'close_col', 'tick_vol_col']])
+    return times, values
+
+def _candles_frame(slots, values):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    returns the OHLCV values of the 1-min slots of a day (see 'fxmanager.basic.times.reindex_minutes()') as a dataframe with columns (open, high, low, close, tick_volume) and the times of the slots as index.
+    """
+    return pd.DataFrame(values, columns=['open', 'high', 'low', 'close', 'tick_volume'], index=pd.DatetimeIndex(slots.view('datetime64[ns]')))
+
+def _read_period_candles(path, raw_data_format, num_days, chunk_size=1440):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    reads a 'period_candles' raw data file in chunks of 'chunk_size' rows and yields the 1-min candles of its first 'num_days' business days (starting at the day of its first candle) one day at a time, every day has 1440 candles, the missing ones take the values of the previous candle (or the next one at the start of the file). only the rows of about a day are held in memory.
+    """
+    days = None         # start times (ns) of the business days to yield, known once the first chunk is read
+    day = 0
+    times = None        # rows not assigned to a yielded day yet, after the last row before them (the previous candle of the first missing minutes)
+    values = None
+    reader = pd.read_csv(path, chunksize=chunk_size)
+    while day < num_days:
+        chunk = next(reader, None)
+        if chunk is not None:
+            chunk_times, chunk_values = _candles_rows(chunk, raw_data_format)
+            if times is None:
+                days = business_days(chunk_times[0], num_days)
+                times, values = chunk_times, chunk_values
+            else:
+                times, values = np.concatenate([times, chunk_times]), np.concatenate([values, chunk_values])
+        # a day is complete once a later row is read or the file ends
+        while day < num_days and times is not None and (chunk is None or times[-1] >= days[day] + NS_PER_DAY):
+            n = np.searchsorted(times, days[day] + NS_PER_DAY)
+            slots, daily_values = reindex_minutes(times[:n], values[:n], days[day], bfill=day == 0)
+            times, values = times[max(n - 1, 0):], values[max(n - 1, 0):]
+            day += 1
+            yield _candles_frame(slots, daily_values)
+        if chunk is None:
+            break
+
+def _preprocess_file(path, out_dirs, raw_data_type, raw_data_format, time_frames, storage_format='csv', compact=False):
+    """
+    helper function for 'fxmanager.basic.util.preprocess()' function.
+
+    preprocesses a raw data file and writes the file of every timeframe to '<out_dir>\\<tf>\\<currency_pair>_<tf>.<ext>' in the given storage format and mode (see 'fxmanager.basic.storage'), 'out_dirs' has an output directory per day of the file (a single one for the daily raw data types). runs in the worker processes of 'preprocess()' so it only depends on its arguments.
+
+    Returns:
+        - entry: dictionary with the size, mtime and hash of the raw data file (taken before it is read) and the list of the written files ('outputs').
+    """
+    entry = _file_signature(path)
+    entry['outputs'] = []
+    file_name = basename(path)
+    if raw_data_type == 'daily_bid_ask':
+        df = pd.read_csv(path, usecols=[raw_data_format['date_col'], raw_data_format['ask_col'], raw_data_format['bid_col']])
+        times = parse_times(df[raw_data_format['date_col']].to_numpy(), raw_data_format['date_format'])
+        days = [pd.DataFrame({'ask': df[raw_data_format['ask_col']].to_numpy(), 'bid': df[raw_data_format['bid_col']].to_numpy()},
+                             index=pd.DatetimeIndex(times.view('datetime64[ns]')))]
+        process = process_daily_bid_ask_time_frames
+    elif raw_data_type == 'period_candles':
+        # streamed a day at a time, multi-year files are never loaded at once
+        days = _read_period_candles(path, raw_data_format, len(out_dirs))
+        process = process_ohlc_time_frames
+    else:
+        # the 1440 minutes of the day of the first candle, the missing ones take the previous candle (or the next one at the start of the day)
+        times, values = _candles_rows(pd.read_csv(path), raw_data_format)
+        days = [_candles_frame(*reindex_minutes(times, values, times[0] // NS_PER_DAY * NS_PER_DAY, bfill=True))]
+        process = process_ohlc_time_frames
+    for out_dir, daily_df in zip(out_dirs, days):
+        tf_dfs = process(df=daily_df, time_frames=time_frames)
+        for i in time_frames:
+            entry['outputs'].append(write_time_frame(tf_dfs[i], join(out_dir, i, file_name[:6]+'_'+i), storage_format, compact))
+    return entry
+
+def preprocess(data_dir=None, app_type='', raw_data_type='', raw_data_format={}, save_logs=True, workers=1, force=False, storage_format='csv', compact=False):
     """
     preprocesses the raw data files to prepare it for analysis and simumlations.
 
@@ -693,6 +881,14 @@ def preprocess(data_dir=None, app_type='', raw_data_type='', raw_data_format={},
             - daily_candles or period_candles: {'date_col':'time', 'date_format':'%Y.%m.%d %H:%M', 'open_col':'open', 'high_col':'high', 'low_col':'low', 'close_col':'close', 'tick_vol_col':'tick_volume'}
         
         - save_logs : boolean flag, if True, the program logs are saved to 'data_dir\\logs\\preprocessing_logs.txt' file.
+
+        - workers : integer number of processes the raw data files are preprocessed in, every file (a currency pair in a day, or a currency pair over the whole period for 'period_candles') is an independent unit. if 1, the files are preprocessed in this process, if None, a process per CPU core is used. the output files and logs are the same for any number of workers.
+
+        - force : boolean flag, if False, only the raw data files that are new, changed since they were last preprocessed or were preprocessed with other parameters (raw data type and format, timeframes, number of days) or by another version of the preprocessing are preprocessed, according to the manifest kept in 'data_dir\\preprocessing_manifest.json'. if True, all the files are preprocessed again.
+
+        - storage_format : string with the format the timeframe files are written in, 'csv', 'npz' (numpy arrays, much faster to load) or, if 'pyarrow' is installed, 'feather' or 'parquet'. all the readers of the timeframe files find the format on their own (see 'fxmanager.basic.storage').
+
+        - compact : boolean flag, if True, the timeframe files are written in compact mode: without the price samples, with float32 prices and returns and int32 tick volumes (see 'fxmanager.basic.storage' for the precision guarantees).
     Returns:
         - None
     """
@@ -702,222 +898,73 @@ def preprocess(data_dir=None, app_type='', raw_data_type='', raw_data_format={},
     if save_logs:
         sys.stdout = open(join(data_dir, 'logs','preprocessing_logs.txt'), 'w')
 
-    #############################################################################################################################
-    ##                                                  Daily Bid/Ask Data                                                     ##
-    #############################################################################################################################
-
-    if raw_data_type == 'daily_bid_ask':
-        # Extract formatting information 
-        date_col = raw_data_format['date_col']
-        date_format = raw_data_format['date_format']
-        ask_col = raw_data_format['ask_col']
-        bid_col = raw_data_format['bid_col']
-
-        #############################################################################################################################
-        
-        if app_type == 'back_tester' or app_type == 'portfolio_optimizer' or app_type == 'all_in_one':
-            # Find num_days and time_frames
-            num_days = len(listdir(join(data_dir, 'time_frames')))
-            tf_list = listdir(join(data_dir, 'time_frames', '0'))
-            time_frames = []
-            for i in range(1, len(tf_list)+1):
-                for tf in tf_list:
-                    if tf[1].isalpha():
-                        x = int(tf[0])
-                    else:
-                        x = int(tf[:2])
-                    if x == i:
-                        time_frames.append(tf)
+    # Find the raw data files and where to save their timeframes: a unit per (day, currency pair) file, or per currency pair for 'period_candles'
+    units = []      # [(LABEL, RAW_FILE_PATH, [OUTPUT_DIR_OF_EVERY_DAY])]
+    if app_type == 'back_tester' or app_type == 'portfolio_optimizer' or app_type == 'all_in_one':
+        num_days = len(listdir(join(data_dir, 'time_frames')))
+        time_frames = _sorted_time_frames(join(data_dir, 'time_frames', '0'))
+        if raw_data_type == 'period_candles':
+            for file_name in _data_file_names(join(data_dir, 'raw_data')):
+                units.append(('{} Currency pair in {} Days'.format(file_name[:6], num_days), join(data_dir, 'raw_data', file_name),
+                              [join(data_dir, 'time_frames', str(day)) for day in range(num_days)]))
+        else:
             for day in range(num_days):
-                print('-----------------------------------------------------------------------------------------------------------')
-                print('                                             >> Processing Day {} <<'.format(day))
-                print('-----------------------------------------------------------------------------------------------------------')
-
-                file_names = [f for f in listdir(join(data_dir, 'raw_data', str(day)))]
-                for file_name in file_names:
-                    print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                    df = pd.read_csv(join(data_dir, 'raw_data', str(day), file_name))
-                    df.index = pd.to_datetime(df[date_col], format=date_format)
-                    df = df[[ask_col, bid_col]]
-                    df.columns = ['ask', 'bid']
-                    for i in time_frames:
-                        print('\n>> PROCESS MESSAGE >>     Processing {} Timeframe ..'.format(i))
-                        tf_df = process_daily_bid_ask(df=df, tf=i)
-                        tf_df.to_csv(join(data_dir, 'time_frames', str(day), i, file_name[:6]+'_'+i+'.csv'))
-                    
-            print('\n>> SYSTEM MESSAGE >> all Days Are Processed Successfully!\n')            
-            
-            if app_type == 'all_in_one':
-                print('>> SYSTEM MESSAGE >> Processing Live App Data!')
-                
-                file_names = [f for f in listdir(join(data_dir, 'live_data', 'raw_data'))]
-                for file_name in file_names:
-                    print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                    df = pd.read_csv(join(data_dir, 'live_data', 'raw_data', file_name))
-                    df.index = pd.to_datetime(df[date_col], format=date_format)
-                    df = df[[ask_col, bid_col]]
-                    df.columns = ['ask', 'bid']
-                    for i in time_frames:
-                        print('\n>> PROCESS MESSAGE >>      Processing {} Timeframe ..'.format(i))
-                        tf_df = process_daily_bid_ask(df=df, tf=i)
-                        tf_df.to_csv(join(data_dir, 'live_data', 'time_frames', i, file_name[:6]+'_'+i+'.csv'))
-
-        #############################################################################################################################    
-        
-        elif app_type == 'live_simulator':
-            tf_list = listdir(join(data_dir, 'time_frames'))
-            time_frames = []
-            for i in range(1, len(tf_list)+1):
-                for tf in tf_list:
-                    if tf[1].isalpha():
-                        x = int(tf[0])
-                    else:
-                        x = int(tf[:2])
-                    if x == i:
-                        time_frames.append(tf)
-            print('>> SYSTEM MESSAGE >> Processing Live App Data!')
-            
-            file_names = [f for f in listdir(join(data_dir, 'raw_data'))]
-            for file_name in file_names:
-                print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                df = pd.read_csv(join(data_dir, 'raw_data', file_name))
-                df.index = pd.to_datetime(df[date_col], format=date_format)
-                df = df[[ask_col, bid_col]]
-                df.columns = ['ask', 'bid']
-                for i in time_frames:
-                    print('\n>> PROCESS MESSAGE >>      Processing {} Timeframe ..'.format(i))
-                    tf_df = process_daily_bid_ask(df=df, tf=i)
-                    tf_df.to_csv(join(data_dir, 'time_frames', i, file_name[:6]+'_'+i+'.csv'))
-                
-    #############################################################################################################################
-    ##                                                  OHLCV 1min-Candles Data                                                ##
-    #############################################################################################################################
-    
-    elif raw_data_type == 'daily_candles' or raw_data_type == 'period_candles':
-        # Extract formatting information 
-        date_col = raw_data_format['date_col']
-        date_format = raw_data_format['date_format']
-        open_col = raw_data_format['open_col']
-        close_col = raw_data_format['close_col']
-        low_col = raw_data_format['low_col']
-        high_col = raw_data_format['high_col']
-        tick_vol_col = raw_data_format['tick_vol_col']
-
-        #############################################################################################################################
-
-        if app_type == 'back_tester' or app_type == 'portfolio_optimizer' or app_type == 'all_in_one':
-            # Find num_days and time_frames
-            num_days = len(listdir(join(data_dir, 'time_frames')))
-            tf_list = listdir(join(data_dir, 'time_frames', '0'))
-            time_frames = []
-            for i in range(1, len(tf_list)+1):
-                for tf in tf_list:
-                    if tf[1].isalpha():
-                        x = int(tf[0])
-                    else:
-                        x = int(tf[:2])
-                    if x == i:
-                        time_frames.append(tf)
-            
-            if raw_data_type == 'daily_candles':
-                for day in range(num_days):
-                    print('-----------------------------------------------------------------------------------------------------------')
-                    print('                                      >> Processing Day {} <<'.format(day))
-                    print('-----------------------------------------------------------------------------------------------------------')
-                    file_names = [f for f in listdir(join(data_dir, 'raw_data', str(day)))]
-                    for file_name in file_names:
-                        print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                        df = pd.read_csv(join(data_dir, 'raw_data', str(day), file_name))
-                        df = pd.DataFrame({'open':df[open_col].values,
-                                           'high':df[high_col].values,
-                                           'low':df[low_col].values,
-                                           'close':df[close_col].values,
-                                           'tick_volume':df[tick_vol_col].values}, index=pd.to_datetime(df[date_col], format=date_format))
-                        idx = pd.date_range(df.index.date[0], freq='min', periods=1440)
-                        df = df.reindex(idx, method='ffill')
-                        df = df.replace(to_replace=np.nan, method='bfill')
-                        for i in time_frames:
-                            print('\n>> PROCESS MESSAGE >>     Processing {} Timeframe ..'.format(i))
-                            tf_df = process_ohlc(df=df, tf=i)
-                            tf_df.to_csv(join(data_dir, 'time_frames', str(day), i, file_name[:6]+'_'+i+'.csv'))
-            else:
-                file_names = [f for f in listdir(join(data_dir, 'raw_data'))]
-                for file_name in file_names:
-                    df = pd.read_csv(join(data_dir, 'raw_data', file_name))
-                    df = pd.DataFrame({'open':df[open_col].values,
-                                        'high':df[high_col].values,
-                                        'low':df[low_col].values,
-                                        'close':df[close_col].values,
-                                        'tick_volume':df[tick_vol_col].values}, index=pd.to_datetime(df[date_col], format=date_format))
-                    idxs = pd.date_range(df.index.date[0], freq='B', periods=num_days)
-                    idx = pd.date_range(idxs[0], freq='min', periods=1440)
-                    for date in idxs[1:]:
-                        idx = idx.union(pd.date_range(date, freq='min', periods=1440))
-                    df = df.reindex(idx, method='ffill')
-                    df = df.replace(to_replace=np.nan, method='bfill')
-                    
-                    for day in range(num_days):
-                        print('-----------------------------------------------------------------------------------------------------------')
-                        print('                              >> Processing Data of {} in Day {} <<'.format(file_name[:6], day))
-                        print('-----------------------------------------------------------------------------------------------------------')
-                        daily_df = df.iloc[day*1440:(day+1)*1440]
-                        for i in time_frames:
-                            print('\n>> PROCESS MESSAGE >>     Processing {} Timeframe ..'.format(i))
-                            daily_df = process_ohlc(df=daily_df, tf=i)
-                            daily_df.to_csv(join(data_dir, 'time_frames', str(day), i, file_name[:6]+'_'+i+'.csv'))
-            
-            print('\n>> SYSTEM MESSAGE >> all Days Are Processed Successfully!\n')            
-            
-            if app_type == 'all_in_one':
-                print('>> SYSTEM MESSAGE >> Processing Live App Data!\n')
-                file_names = [f for f in listdir(join(data_dir, 'live_data', 'raw_data'))]
-                for file_name in file_names:
-                    print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                    df = pd.read_csv(join(data_dir, 'live_data', 'raw_data', file_name))
-                    df = pd.DataFrame({'open':df[open_col].values,
-                                        'high':df[high_col].values,
-                                        'low':df[low_col].values,
-                                        'close':df[close_col].values,
-                                        'tick_volume':df[tick_vol_col].values}, index=pd.to_datetime(df[date_col], format=date_format))
-                    idx = pd.date_range(df.index.date[0], freq='min', periods=1440)
-                    df = df.reindex(idx, method='ffill')
-                    df = df.replace(to_replace=np.nan, method='bfill')
-                    for i in time_frames:
-                        print('\n>> PROCESS MESSAGE >>     Processing {} Timeframe ..'.format(i))
-                        td_df = process_ohlc(df=df, tf=i)
-                        td_df.to_csv(join(data_dir, 'time_frames', i, file_name[:6]+'_'+i+'.csv'))
-                            
-        #############################################################################################################################
-
-        elif app_type == 'live_simulator':
-            tf_list = listdir(join(data_dir, 'time_frames'))
-            time_frames = []
-            for i in range(1, len(tf_list)+1):
-                for tf in tf_list:
-                    if tf[1].isalpha():
-                        x = int(tf[0])
-                    else:
-                        x = int(tf[:2])
-                    if x == i:
-                        time_frames.append(tf)
-            print('>> SYSTEM MESSAGE >> Processing Live App Data!')
-            
-            file_names = [f for f in listdir(join(data_dir, 'raw_data'))]
-            for file_name in file_names:
-                print('>> PROCESS MESSAGE >> Processing {} Currency pair ..'.format(file_name[:6]))
-                df = pd.read_csv(join(data_dir, 'raw_data', file_name))
-                df = pd.DataFrame({'open':df[open_col].values,
-                                    'high':df[high_col].values,
-                                    'low':df[low_col].values,
-                                    'close':df[close_col].values,
-                                    'tick_volume':df[tick_vol_col].values}, index=pd.to_datetime(df[date_col], format=date_format))
-                idx = pd.date_range(df.index.date[0], freq='min', periods=1440)
-                df = df.reindex(idx, method='ffill')
-                df = df.replace(to_replace=np.nan, method='bfill')
-                for i in time_frames:
-                    print('\n>> PROCESS MESSAGE >>     Processing {} Timeframe ..'.format(i))
-                    td_df = process_ohlc(df=df, tf=i)
-                    td_df.to_csv(join(data_dir, 'time_frames', i, file_name[:6]+'_'+i+'.csv'))
+                for file_name in _data_file_names(join(data_dir, 'raw_data', str(day))):
+                    units.append(('{} Currency pair in Day {}'.format(file_name[:6], day), join(data_dir, 'raw_data', str(day), file_name),
+                                  [join(data_dir, 'time_frames', str(day))]))
+        if app_type == 'all_in_one':
+            for file_name in _data_file_names(join(data_dir, 'live_data', 'raw_data')):
+                units.append(('{} Currency pair of Live App Data'.format(file_name[:6]), join(data_dir, 'live_data', 'raw_data', file_name),
+                              [join(data_dir, 'live_data', 'time_frames')]))
+    elif app_type == 'live_simulator':
+        time_frames = _sorted_time_frames(join(data_dir, 'time_frames'))
+        for file_name in _data_file_names(join(data_dir, 'raw_data')):
+            units.append(('{} Currency pair of Live App Data'.format(file_name[:6]), join(data_dir, 'raw_data', file_name),
+                          [join(data_dir, 'time_frames')]))
+
+    # Skip the units preprocessed before with the same parameters whose raw data file did not change
+    manifest_path = join(data_dir, 'preprocessing_manifest.json')
+    manifest = {}       # {RAW_FILE_PATH (relative to data_dir): {size, mtime, hash, outputs, params}}
+    if isfile(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    todo = []
+    for label, path, out_dirs in units:
+        key = relpath(path, data_dir)
+        params = {'version': _PREPROCESSING_VERSION,
+                  'raw_data_type': raw_data_type,
+                  'raw_data_format': raw_data_format,
+                  'time_frames': time_frames,
+                  'storage_format': storage_format,
+                  'compact': compact,
+                  'out_dirs': [relpath(out_dir, data_dir) for out_dir in out_dirs]}
+        if not force and _is_preprocessed(manifest.get(key), path, params, data_dir):
+            continue
+        todo.append((label, path, out_dirs, key, params))
+
+    # Preprocess the units, results come back in the order of the units whatever the number of workers
+    print('>> SYSTEM MESSAGE >> Preprocessing {} Raw Data Files in {} Timeframes ({} Unchanged Files Skipped) ..\n'.format(len(todo), len(time_frames) if units else 0, len(units) - len(todo)))
+    args = [(path, out_dirs, raw_data_type, raw_data_format, time_frames, storage_format, compact) for _, path, out_dirs, _, _ in todo]
+    if workers == 1 or len(todo) <= 1:
+        executor = None
+        results = (_preprocess_file(*arg) for arg in args)
+    else:
+        n_workers = workers or cpu_count()
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+        results = executor.map(_preprocess_file, *zip(*args), chunksize=max(1, len(args) // (n_workers * 8)))
+    try:
+        for n, ((label, _, _, key, params), entry) in enumerate(zip(todo, results)):
+            entry['outputs'] = [relpath(output, data_dir) for output in entry['outputs']]
+            entry['params'] = params
+            manifest[key] = entry
+            print('>> PROCESS MESSAGE >> Processed {} ({}/{}) ..'.format(label, n+1, len(todo)))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # the units done so far are kept even if a unit failed
+        _save_manifest(manifest, manifest_path)
+
+    print('\n>> SYSTEM MESSAGE >> all Days Are Processed Successfully!\n')
     if save_logs:
         sys.stdout.close()
     return
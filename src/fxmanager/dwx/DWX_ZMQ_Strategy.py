@@ -32,7 +32,8 @@ class DWX_ZMQ_Strategy(object):
                  _broker_gmt=3,                 # Darwinex GMT offset
                  _pulldata_handlers = [],       # Handlers to process data received through PULL port.
                  _subdata_handlers = [],        # Handlers to process data received through SUB port.
-                 _verbose=False):               # Print ZeroMQ messages
+                 _verbose=False,                # Print ZeroMQ messages
+                 _zmq_options={}):              # Extra DWX_ZeroMQ_Connector arguments (e.g. ports, _reactor)
                  
         self._name = _name
         self._symbols = _symbols
@@ -41,7 +42,8 @@ class DWX_ZMQ_Strategy(object):
         # Not entirely necessary here.
         self._zmq = DWX_ZeroMQ_Connector(_pulldata_handlers=_pulldata_handlers,
                                          _subdata_handlers=_subdata_handlers,
-                                         _verbose=_verbose)
+                                         _verbose=_verbose,
+                                         **_zmq_options)
         
         # Modules
         self._execution = DWX_ZMQ_Execution(self._zmq)
@@ -14,9 +14,12 @@
 """
 
 import zmq
-from time import sleep
+from time import sleep, monotonic_ns, time_ns
 from pandas import DataFrame, Timestamp
 from threading import Thread
+from fxmanager.dwx.message_parser import parse_message, to_records
+from fxmanager.dwx.market_data import market_data_store
+from fxmanager.dwx.metrics import connector_metrics
 
 # 30-07-2019 10:58 CEST
 from zmq.utils.monitor import recv_monitor_message
@@ -39,7 +42,13 @@ class DWX_ZeroMQ_Connector():
                  _verbose=True,             # String delimiter
                  _poll_timeout=1000,        # ZMQ Poller Timeout (ms)
                  _sleep_delay=0.001,        # 1 ms for time.sleep()
-                 _monitor=False):           # Experimental ZeroMQ Socket Monitoring
+                 _monitor=False,            # Experimental ZeroMQ Socket Monitoring
+                 _reactor=False,            # Block only in poll() and drain all ready messages without sleeping
+                 _conflate=False,           # Handle only the latest of the ready SUB messages of every symbol
+                 _market_data_capacity=100000, # Ticks (and rates) kept per symbol in _Market_Data_DB
+                 _retain_history=True,      # Keep HIST replies in _History_DB (False if handlers save them)
+                 _metrics_dump_path=None,   # CSV file _Metrics is dumped to periodically (None disables dumping)
+                 _metrics_dump_every=60):   # Seconds between two dumps of _Metrics
     
         ######################################################################
         
@@ -108,13 +117,29 @@ class DWX_ZeroMQ_Connector():
         self._PUSH_Monitor_Thread = None
         self._PULL_Monitor_Thread = None
         
-        # Market Data Dictionary by Symbol (holds tick data)
-        self._Market_Data_DB = {}   # {SYMBOL: {TIMESTAMP: (BID, ASK)}}
+        # Market Data Ring Buffers by Symbol (holds the most recent tick & rate data, see fxmanager.dwx.market_data)
+        self._Market_Data_DB = market_data_store(_market_data_capacity)   # {SYMBOL: [(TIME_NS, BID, ASK), ..]}
+        
+        # Tick clock: monotonic ns plus a fixed offset to the epoch, so tick times are integers that never go backwards
+        self._clock_offset_ns = time_ns() - monotonic_ns()
+        
+        # Receipt Time of The Most Recent Tick by Symbol (monotonic ns, used for latency measurements)
+        self._Tick_Recv_NS = {}     # {SYMBOL: MONOTONIC_NS}
+        
+        # Receipt Time of The Most Recent Tick by Symbol (ns since epoch, UTC)
+        self._Tick_Time_NS = {}     # {SYMBOL: TIME_NS}
         
         # History Data Dictionary by Symbol (holds historic data of the last HIST request for each symbol)
+        # (kept as a list of dictionaries, the PULL handlers get the '_data' of HIST replies as NumPy columns, see fxmanager.dwx.message_parser)
         self._History_DB = {}   # {SYMBOL_TF: [{'time': TIME, 'open': OPEN_PRICE, 'high': HIGH_PRICE, 
                                 #               'low': LOW_PRICE, 'close': CLOSE_PRICE, 'tick_volume': TICK_VOLUME, 
                                 #               'spread': SPREAD, 'real_volume': REAL_VOLUME}, ...]}
+        
+        # Message, error, handler time and send counters (see fxmanager.dwx.metrics)
+        self._Metrics = connector_metrics(_metrics_dump_path, _metrics_dump_every)
+        
+        # If False, HIST replies are only passed to the PULL handlers and released once they return
+        self._retain_history = _retain_history
                                 
         # Temporary Order STRUCT for convenience wrappers later.
         self.temp_order_dict = self._generate_default_order_dict()
@@ -131,6 +156,14 @@ class DWX_ZeroMQ_Connector():
         # Global Sleep Delay
         self._sleep_delay = _sleep_delay
         
+        # Reactor Mode (max. messages drained per socket before polling again)
+        self._reactor = _reactor
+        self._reactor_batch = 1000
+        
+        # Conflation: ready SUB messages are drained and only the latest of every symbol is handled,
+        # SUB handlers with a True '_full_ticks' attribute (e.g. tick recorders) still get every message
+        self._conflate = _conflate
+        
         # Begin polling for PULL / SUB data
         self._MarketData_Thread = Thread(target=self._DWX_ZMQ_Poll_Data_, 
                                          args=(self._string_delimiter,
@@ -193,6 +226,9 @@ class DWX_ZeroMQ_Connector():
         if self._PULL_Monitor_Thread is not None:            
             self._PULL_Monitor_Thread.join()
         
+        # Dump the final counters (if a dump path is set)
+        self._Metrics.dump()
+        
         # Unregister sockets from Poller
         self._poller.unregister(self._PULL_SOCKET)
         self._poller.unregister(self._SUB_SOCKET)
@@ -222,11 +258,17 @@ class DWX_ZeroMQ_Connector():
         if self._PUSH_SOCKET_STATUS['state'] == True:
             try:
                 _socket.send_string(_data, zmq.DONTWAIT)
+                self._Metrics.on_send('sent')
+                return True
             except zmq.error.Again:
+                self._Metrics.on_send('again')
                 print("\nResource timeout.. please try again.")
                 sleep(self._sleep_delay)
         else:
+            self._Metrics.on_send('refused')
             print('\n[KERNEL] NO HANDSHAKE ON PUSH SOCKET.. Cannot SEND data')
+        
+        return False
       
     ##########################################################################
     
@@ -266,6 +308,7 @@ class DWX_ZeroMQ_Connector():
                 msg = _socket.recv_string(zmq.DONTWAIT)
                 return msg
             except zmq.error.Again:
+                self._Metrics.on_again('PULL')
                 print("\nResource timeout.. please try again.")
                 sleep(self._sleep_delay)
         else:
@@ -401,7 +444,7 @@ class DWX_ZeroMQ_Connector():
                                      _end)
 
         # Send via PUSH Socket
-        self.remote_send(self._PUSH_SOCKET, _msg)
+        return self.remote_send(self._PUSH_SOCKET, _msg)
     
     
     ##########################################################################
@@ -486,6 +529,86 @@ class DWX_ZeroMQ_Connector():
     
     ##########################################################################
     
+    """
+    Functions to handle a single response (PULL) or market data message (SUB)
+    """
+    
+    def _handle_pull_msg_(self, msg):
+        
+        # If data is returned, store as pandas Series
+        if msg != '' and msg != None:
+            
+            _recv_ns = monotonic_ns()
+            try:
+                _data = parse_message(msg)
+                if '_action' in _data and _data['_action'] == 'HIST':
+                    _symbol = _data['_symbol']
+                    if '_data' in _data.keys():
+                        if self._retain_history:
+                            # in the shape of the original connector
+                            _records = to_records(_data['_data'])
+                            self._History_DB[_symbol] = _records
+                    else:
+                        print('No data found. MT4 often needs multiple requests when accessing data of symbols without open charts.')
+                        print('message: ' + msg)
+                
+                # invokes data handlers on pull port
+                for hnd in self._pulldata_handlers:
+                    hnd.onPullData(_data)
+                
+                if self._retain_history and _data.get('_action') == 'HIST' and '_data' in _data:
+                    self._thread_data_output = {**_data, '_data': _records}
+                elif self._retain_history or '_data' not in _data:
+                    self._thread_data_output = _data
+                else:
+                    self._thread_data_output = {k: v for k, v in _data.items() if k != '_data'}
+                if self._verbose:
+                    print(_data) # default logic
+                
+                self._Metrics.on_message('PULL', _data.get('_symbol', ''), monotonic_ns() - _recv_ns)
+                    
+            except Exception as ex:
+                self._Metrics.on_error('PULL')
+                _exstr = "Exception Type {0}. Args:\n{1!r}"
+                _msg = _exstr.format(type(ex).__name__, ex.args)
+                print(_msg)
+    
+    def _handle_sub_msg_(self, msg, string_delimiter=';', _handlers=None):
+        
+        if msg != "":
+
+            _recv_ns = monotonic_ns()
+            _time_ns = _recv_ns + self._clock_offset_ns
+            _symbol, _data = msg.split(" ")
+            if len(_data.split(string_delimiter)) == 2:
+                _bid, _ask = _data.split(string_delimiter)   
+                                                       
+            
+                if self._verbose:
+                    print("\n[" + _symbol + "] " + str(Timestamp(_time_ns, tz='UTC'))[:-6] + " (" + _bid + "/" + _ask + ") BID/ASK")                    
+        
+                # Update Market Data DB
+                self._Market_Data_DB.append_tick(_symbol, _time_ns, float(_bid), float(_ask))
+
+            elif len(_data.split(string_delimiter)) == 8:
+                _time, _open, _high, _low, _close, _tick_vol, _spread, _real_vol = _data.split(string_delimiter)
+                if self._verbose:
+                    print("\n[" + _symbol + "] " + str(Timestamp(_time_ns, tz='UTC'))[:-6] + " (" + _time + "/" + _open + "/" + _high + "/" + _low + "/" + _close + "/" + _tick_vol + "/" + _spread + "/" + _real_vol + ") TIME/OPEN/HIGH/LOW/CLOSE/TICKVOL/SPREAD/VOLUME")                    
+                # Update Market Rate DB
+                self._Market_Data_DB.append_rate(_symbol, _time_ns, (int(_time), float(_open), float(_high), float(_low), float(_close), int(_tick_vol), int(_spread), int(_real_vol)))
+
+            self._Tick_Recv_NS[_symbol] = _recv_ns
+            self._Tick_Time_NS[_symbol] = _time_ns
+
+            # invokes data handlers on sub port
+            for hnd in (self._subdata_handlers if _handlers is None else _handlers):
+                hnd.onSubData(msg)
+            
+            _done_ns = monotonic_ns()
+            self._Metrics.on_message('SUB', _symbol, _done_ns - _recv_ns, _done_ns)
+    
+    ##########################################################################
+    
     """
     Function to check Poller for new reponses (PULL) and market data (SUB)
     """
@@ -494,6 +617,9 @@ class DWX_ZeroMQ_Connector():
                            string_delimiter=';',
                            poll_timeout=1000):
         
+        if self._reactor:
+            return self._DWX_ZMQ_Reactor_(string_delimiter, poll_timeout)
+        
         while self._ACTIVE:
             
             sleep(self._sleep_delay) # poll timeout is in ms, sleep() is s.
@@ -508,90 +634,123 @@ class DWX_ZeroMQ_Connector():
                         
                         # msg = self._PULL_SOCKET.recv_string(zmq.DONTWAIT)
                         msg = self.remote_recv(self._PULL_SOCKET)
-                        
-                        # If data is returned, store as pandas Series
-                        if msg != '' and msg != None:
-                            
-                            try:
-                                _data = eval(msg)
-                                if '_action' in _data and _data['_action'] == 'HIST':
-                                    _symbol = _data['_symbol']
-                                    if '_data' in _data.keys():
-                                        if _symbol not in self._History_DB.keys():
-                                            self._History_DB[_symbol] = {}
-                                        self._History_DB[_symbol] = _data['_data']
-                                    else:
-                                        print('No data found. MT4 often needs multiple requests when accessing data of symbols without open charts.')
-                                        print('message: ' + msg)
-                                
-                                # invokes data handlers on pull port
-                                for hnd in self._pulldata_handlers:
-                                    hnd.onPullData(_data)
-                                
-                                self._thread_data_output = _data
-                                if self._verbose:
-                                    print(_data) # default logic
-                                    
-                            except Exception as ex:
-                                _exstr = "Exception Type {0}. Args:\n{1!r}"
-                                _msg = _exstr.format(type(ex).__name__, ex.args)
-                                print(_msg)
+                        self._handle_pull_msg_(msg)
                    
                     except zmq.error.Again:
-                        pass # resource temporarily unavailable, nothing to print
+                        self._Metrics.on_again('PULL') # resource temporarily unavailable, nothing to print
                     except ValueError:
-                        pass # No data returned, passing iteration.
+                        self._Metrics.on_error('PULL') # No data returned, passing iteration.
                     except UnboundLocalError:
-                        pass # _symbol may sometimes get referenced before being assigned.
+                        self._Metrics.on_error('PULL') # _symbol may sometimes get referenced before being assigned.
                 
                 else:
                     print('\r[KERNEL] NO HANDSHAKE on PULL SOCKET.. Cannot READ data.', end='', flush=True)
             
             # Receive new market data from MetaTrader
-            if self._SUB_SOCKET in sockets and sockets[self._SUB_SOCKET] == zmq.POLLIN:
+            if self._SUB_SOCKET in sockets and sockets[self._SUB_SOCKET] == zmq.POLLIN and self._conflate:
+                
+                self._drain_sub_conflated_(string_delimiter)
+            
+            elif self._SUB_SOCKET in sockets and sockets[self._SUB_SOCKET] == zmq.POLLIN:
                 
                 try:
                     msg = self._SUB_SOCKET.recv_string(zmq.DONTWAIT)
-                    
-                    if msg != "":
-
-                        _timestamp = str(Timestamp.now('UTC'))[:-6]
-                        _symbol, _data = msg.split(" ")
-                        if len(_data.split(string_delimiter)) == 2:
-                            _bid, _ask = _data.split(string_delimiter)   
-                                                                   
-                        
-                            if self._verbose:
-                                print("\n[" + _symbol + "] " + _timestamp + " (" + _bid + "/" + _ask + ") BID/ASK")                    
-                    
-                            # Update Market Data DB
-                            if _symbol not in self._Market_Data_DB.keys():
-                                self._Market_Data_DB[_symbol] = {}
-                            
-                            self._Market_Data_DB[_symbol][_timestamp] = (float(_bid), float(_ask))
-
-                        elif len(_data.split(string_delimiter)) == 8:
-                            _time, _open, _high, _low, _close, _tick_vol, _spread, _real_vol = _data.split(string_delimiter)
-                            if self._verbose:
-                                print("\n[" + _symbol + "] " + _timestamp + " (" + _time + "/" + _open + "/" + _high + "/" + _low + "/" + _close + "/" + _tick_vol + "/" + _spread + "/" + _real_vol + ") TIME/OPEN/HIGH/LOW/CLOSE/TICKVOL/SPREAD/VOLUME")                    
-                            # Update Market Rate DB
-                            if _symbol not in self._Market_Data_DB.keys():
-                                self._Market_Data_DB[_symbol] = {}
-                            self._Market_Data_DB[_symbol][_timestamp] = (int(_time), float(_open), float(_high), float(_low), float(_close), int(_tick_vol), int(_spread), int(_real_vol))
-
-                        # invokes data handlers on sub port
-                        for hnd in self._subdata_handlers:
-                            hnd.onSubData(msg)
+                    self._handle_sub_msg_(msg, string_delimiter)
 
                 except zmq.error.Again:
-                    pass # resource temporarily unavailable, nothing to print
+                    self._Metrics.on_again('SUB') # resource temporarily unavailable, nothing to print
                 except ValueError:
-                    pass # No data returned, passing iteration.
+                    self._Metrics.on_error('SUB') # No data returned, passing iteration.
                 except UnboundLocalError:
-                    pass # _symbol may sometimes get referenced before being assigned.
+                    self._Metrics.on_error('SUB') # _symbol may sometimes get referenced before being assigned.
+            
+            self._Metrics.maybe_dump()
                     
         print("\n++ [KERNEL] _DWX_ZMQ_Poll_Data_() Signing Out ++")
+    
+    ##########################################################################
+    
+    """
+    Reactor loop (_reactor=True): blocks only in poll(), then drains the
+    ready messages of both sockets in batches without sleeping
+    """
+    
+    def _DWX_ZMQ_Reactor_(self, 
+                          string_delimiter=';',
+                          poll_timeout=1000):
+        
+        while self._ACTIVE:
+            
+            sockets = dict(self._poller.poll(poll_timeout))
+            
+            # Drain responses to commands sent to MetaTrader
+            if self._PULL_SOCKET in sockets:
+                
+                if self._PULL_SOCKET_STATUS['state'] == True:
+                    for _ in range(self._reactor_batch):
+                        try:
+                            msg = self._PULL_SOCKET.recv_string(zmq.DONTWAIT)
+                        except zmq.error.Again:
+                            break
+                        self._handle_pull_msg_(msg)
+                
+                else:
+                    print('\r[KERNEL] NO HANDSHAKE on PULL SOCKET.. Cannot READ data.', end='', flush=True)
+            
+            # Drain new market data from MetaTrader
+            if self._SUB_SOCKET in sockets and self._conflate:
                 
+                self._drain_sub_conflated_(string_delimiter)
+            
+            elif self._SUB_SOCKET in sockets:
+                
+                for _ in range(self._reactor_batch):
+                    try:
+                        msg = self._SUB_SOCKET.recv_string(zmq.DONTWAIT)
+                    except zmq.error.Again:
+                        break
+                    try:
+                        self._handle_sub_msg_(msg, string_delimiter)
+                    except (ValueError, UnboundLocalError):
+                        self._Metrics.on_error('SUB') # malformed message, skip it.
+            
+            self._Metrics.maybe_dump()
+                    
+        print("\n++ [KERNEL] _DWX_ZMQ_Reactor_() Signing Out ++")
+    
+    ##########################################################################
+    
+    """
+    Conflation (_conflate=True): drains up to _reactor_batch ready SUB messages
+    and handles only the latest one of every symbol, the older ones are passed
+    (in order) to the handlers with a True '_full_ticks' attribute only
+    """
+    
+    def _drain_sub_conflated_(self, string_delimiter=';'):
+        
+        msgs = []
+        for _ in range(self._reactor_batch):
+            try:
+                msgs.append(self._SUB_SOCKET.recv_string(zmq.DONTWAIT))
+            except zmq.error.Again:
+                break
+        
+        # Index of the latest message of every symbol
+        latest = {msg.split(' ', 1)[0]: i for i, msg in enumerate(msgs)}
+        full_handlers = [hnd for hnd in self._subdata_handlers if getattr(hnd, '_full_ticks', False)]
+        
+        for i, msg in enumerate(msgs):
+            _symbol = msg.split(' ', 1)[0]
+            try:
+                if latest[_symbol] == i:
+                    self._handle_sub_msg_(msg, string_delimiter)
+                else:
+                    self._Metrics.on_conflated('SUB', _symbol)
+                    if full_handlers:
+                        self._handle_sub_msg_(msg, string_delimiter, full_handlers)
+            except (ValueError, UnboundLocalError):
+                self._Metrics.on_error('SUB') # malformed message, skip it.
+
     ##########################################################################
     
     """
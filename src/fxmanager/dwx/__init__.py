@@ -2,12 +2,24 @@
 This sub-package contains a modified version of Darwinex ZeroMQ connector which is used for connecting client code to MT4 trading platform.
 
 Public Modules:
+    - history_downloader  : This Module is used for downloading 1-min candles from the MT4 EA incrementally.
+    - market_data         : This Module contains the bounded ring buffers the DWX connector keeps the received market data in.
+    - metrics             : This Module contains the counters the DWX connector keeps about the messages it receives and sends.
+    - message_parser      : This Module is used for parsing the messages the MT4 EA sends on the PULL channel without eval().
     - prices_subscription : This is a modified version of an example of using the Darwinex ZeroMQ Connector for Python 3 and MT4 PULL REQUEST.
     - rates_historic      : This Module is used as an API to get historic data from the MT4 EA.
+    - stand_in_server     : This Module contains a local stand-in for the MT4 EA that replays tick and candles data over the same ZeroMQ protocol.
+    - tick_recorder       : This Module is used for recording the ticks received from the MT4 EA to binary files and replaying them.
 """
 
+from . import history_downloader
+from . import market_data
+from . import message_parser
+from . import metrics
 from . import prices_subscriptions
 from . import rates_historic
+from . import stand_in_server
+from . import tick_recorder
 import fxmanager._metadata as md
 from __main__ import __dict__
 
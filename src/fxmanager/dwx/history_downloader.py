@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This Module is used for downloading 1-min candles from the MT4 EA incrementally.
+
+A 'history_downloader' object keeps a hidden '.history_manifest.json' file in the directory the data is saved to (hidden files are skipped by the readers of raw data folders, e.g. 'fxmanager.basic.util.preprocess()'), with an entry for every file it has saved (currency pair, first and last day, size). Before downloading, the requested days are compared with the manifest and only the missing ones are requested: one request per missing day for 'daily_candles', one request per run of consecutive missing days for 'period_candles'. 'fxmanager.basic.util.preprocess()' takes a 'period_candles' file as the whole period of its currency pair, so every downloaded run is merged into the single file of the pair (named after its first and last days) and the manifest lists the days it holds. At most 'max_in_flight' HIST requests are pending at any time, and every reply is written to disk and added to the manifest as soon as it arrives.
+
+Public Classes:
+    - history_downloader: downloads the missing days of history of a list of currency pairs.
+"""
+
+import json
+import pandas as pd
+from os import replace, remove
+from os.path import join, isfile, getsize, basename
+from threading import Lock, BoundedSemaphore
+from concurrent.futures import Future
+from fxmanager.dwx.rates_historic import rates_historic
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+MANIFEST = '.history_manifest.json'
+
+class history_downloader():
+    """
+    downloads the missing days of history of a list of currency pairs to 'save_to'.
+
+    Args:
+        - save_to       : string with the path to the directory in which the files and the manifest are saved.
+        - raw_data_type : string with the type of the saved files, 'daily_candles' (a file per currency pair per day) or 'period_candles' (a single file per currency pair, the downloaded runs of days are merged into it).
+        - max_in_flight : integer indicating the maximum number of HIST requests pending at the same time.
+        - rates         : 'fxmanager.dwx.rates_historic.rates_historic' (or 'rates_historic_pool') object used to send the requests, if None, a new 'rates_historic' object is created.
+        - timeout       : float indicating the number of seconds to wait for a reply before the request is sent again.
+        - retries       : integer indicating the number of times a request is sent again before it is reported as failed.
+
+    Public Methods:
+        - missing() : returns the requests ([(start_day, end_day), ..]) needed to complete the given days of a currency pair.
+        - download(): downloads the missing days of the given currency pairs and waits for all of them.
+        - stop()    : stops the 'rates_historic' object used to send the requests.
+    """
+
+    def __init__(self, save_to='', raw_data_type='daily_candles', max_in_flight=4, rates=None, timeout=60, retries=3):
+        self._save_to = save_to
+        self._raw_data_type = raw_data_type
+        self._rates = rates_historic() if rates is None else rates
+        self._timeout = timeout
+        self._retries = retries
+        self._in_flight = BoundedSemaphore(max_in_flight)
+        self._lock = Lock()
+        self._manifest_path = join(save_to, MANIFEST)
+        # the manifest used to be a visible 'manifest.json', listed with the data files
+        if not isfile(self._manifest_path) and isfile(join(save_to, 'manifest.json')):
+            replace(join(save_to, 'manifest.json'), self._manifest_path)
+        self._manifest = {}
+        if isfile(self._manifest_path):
+            with open(self._manifest_path) as f:
+                self._manifest = json.load(f)
+
+    def _covered(self, currency_pair, days):
+        """
+        returns the days of 'days' already saved in a file of the manifest that still exists.
+        """
+        covered = set()
+        for name, entry in self._manifest.items():
+            if entry['currency_pair'] != currency_pair or entry['raw_data_type'] != self._raw_data_type:
+                continue
+            if not isfile(join(self._save_to, name)):
+                continue
+            covered.update(d for d in days if (d in entry['days'] if 'days' in entry else entry['start'] <= d <= entry['end']))
+        return covered
+
+    @staticmethod
+    def _entry_days(entry):
+        """
+        returns the days held by the file of a manifest entry, the business days from its first to its last day for entries without a list of days.
+        """
+        if 'days' in entry:
+            return entry['days']
+        return list(pd.bdate_range(pd.to_datetime(entry['start'], format='%Y.%m.%d'),
+                                   pd.to_datetime(entry['end'], format='%Y.%m.%d')).strftime('%Y.%m.%d'))
+
+    def _merge_period(self, currency_pair, path, days):
+        """
+        merges a downloaded run of days into the 'period_candles' file of the currency pair, the rows of the run replace those with the same times.
+
+        Returns:
+            - name : string with the name of the merged file.
+            - days : sorted list of the days held by the merged file.
+            - stale: list of the names of the files merged into it, to be removed once the manifest is written.
+        """
+        previous = [name for name, entry in self._manifest.items()
+                    if entry['currency_pair'] == currency_pair and entry['raw_data_type'] == 'period_candles'
+                    and name != basename(path) and isfile(join(self._save_to, name))]
+        if not previous:
+            return basename(path), sorted(days), []
+        days = set(days)
+        frames = []
+        for name in previous:
+            days.update(self._entry_days(self._manifest[name]))
+            frames.append(pd.read_csv(join(self._save_to, name), index_col=0))
+        frames.append(pd.read_csv(path, index_col=0))
+        df = pd.concat(frames, ignore_index=True).drop_duplicates('time', keep='last').sort_values('time', ignore_index=True)
+        days = sorted(days)
+        name = currency_pair + '_' + days[0] + '_' + days[-1] + '.csv'
+        df.to_csv(join(self._save_to, name + '.tmp'))
+        replace(join(self._save_to, name + '.tmp'), join(self._save_to, name))
+        return name, days, [n for n in previous + [basename(path)] if n != name]
+
+    def missing(self, currency_pair, days, force=False):
+        """
+        Args:
+            - currency_pair: string with the symbol.
+            - days         : sorted list of days ('%Y.%m.%d' strings) to be available.
+            - force        : boolean, if True the manifest is ignored and all the days are requested.
+        Returns:
+            - requests: list of (start_day, end_day) tuples, a tuple per day for 'daily_candles' and per run of consecutive missing days for 'period_candles'.
+        """
+        covered = set() if force else self._covered(currency_pair, days)
+        requests = []
+        for i, day in enumerate(days):
+            if day in covered:
+                continue
+            if self._raw_data_type == 'period_candles' and requests and i > 0 and days[i-1] == requests[-1][1]:
+                requests[-1] = (requests[-1][0], day)
+            else:
+                requests.append((day, day))
+        return requests
+
+    def _on_saved(self, future, done, currency_pair, days):
+        """
+        adds the saved file to the manifest ('period_candles' runs are merged into the file of the currency pair first), 'done' is resolved once the manifest is written so download() never returns before it.
+        """
+        self._in_flight.release()
+        try:
+            path = future.result()
+        except Exception as ex:
+            print(f'>> DWX MESSAGE >> {currency_pair} {days[0]} - {days[-1]} failed: {ex}')
+            done.set_result(False)
+            return
+        with self._lock:
+            name, stale = basename(path), []
+            if self._raw_data_type == 'period_candles':
+                try:
+                    name, days, stale = self._merge_period(currency_pair, path, days)
+                except Exception as ex:
+                    print(f'>> DWX MESSAGE >> {currency_pair} {days[0]} - {days[-1]} could not be merged: {ex}')
+                    done.set_result(False)
+                    return
+            for old in stale:
+                self._manifest.pop(old, None)
+            self._manifest[name] = {'currency_pair': currency_pair,
+                                    'raw_data_type': self._raw_data_type,
+                                    'start': days[0],
+                                    'end': days[-1],
+                                    'days': days,
+                                    'size': getsize(join(self._save_to, name))}
+            with open(self._manifest_path + '.tmp', 'w') as f:
+                json.dump(self._manifest, f, indent=4)
+            replace(self._manifest_path + '.tmp', self._manifest_path)
+            # the merged files are removed once the manifest no longer lists them
+            for old in stale:
+                remove(join(self._save_to, old))
+        done.set_result(True)
+
+    def download(self, currency_pairs, days, force=False):
+        """
+        downloads the missing days of 'currency_pairs' and waits until every request is saved or failed.
+
+        Args:
+            - currency_pairs: list of symbols.
+            - days          : sorted list of days ('%Y.%m.%d' strings, weekends excluded by the caller).
+            - force         : boolean, if True the manifest is ignored and all the days are requested again.
+        Returns:
+            - n_saved : integer indicating the number of saved files.
+            - n_failed: integer indicating the number of failed requests.
+        """
+        futures = []
+        for cp in currency_pairs:
+            requests = self.missing(cp, days, force)
+            print(f'>> DWX MESSAGE >> {cp}: {len(requests)} requests for {len(days)} days')
+            for start, end in requests:
+                self._in_flight.acquire()
+                try:
+                    if self._raw_data_type == 'period_candles':
+                        future = self._rates.get_period_candles(save_to=self._save_to, currency_pair=cp, start=start, end=end,
+                                                                timeout=self._timeout, retries=self._retries)
+                    else:
+                        future = self._rates.get_daily_candles(save_to=self._save_to, currency_pair=cp, date=start,
+                                                               timeout=self._timeout, retries=self._retries)
+                except Exception as ex:
+                    # a request that can not be made fails like one that got no reply, '_on_saved' releases its permit
+                    future = Future()
+                    future.set_exception(ex)
+                done = Future()
+                run = [day for day in days if start <= day <= end]
+                future.add_done_callback(lambda f, done=done, cp=cp, run=run: self._on_saved(f, done, cp, run))
+                futures.append(done)
+        n_saved = sum(future.result() for future in futures)
+        return n_saved, len(futures) - n_saved
+
+    def stop(self):
+        """
+        stops the 'rates_historic' object used to send the requests.
+        """
+        self._rates.stop()
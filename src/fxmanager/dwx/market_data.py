@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This Module contains the bounded store the DWX connector keeps the received market data in.
+
+Every symbol gets a preallocated NumPy ring buffer of fixed capacity (one for BID/ASK ticks and one for rate records), so memory stays constant over sessions of any length. Each record is written twice, at its slot and at slot + capacity, which keeps the most recent 'capacity' records contiguous in memory: 'last(n)' and 'since(t)' return views of the buffer without copying.
+
+The views share memory with the buffer, so they are overwritten once 'capacity' newer records have arrived, call '.copy()' on a view to keep it longer.
+
+Public Classes:
+    - ring_buffer      : fixed capacity buffer of structured NumPy records.
+    - market_data_store: per-symbol tick and rate ring buffers, used as 'DWX_ZeroMQ_Connector._Market_Data_DB'.
+"""
+
+import numpy as np
+import pandas as pd
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+# receipt time (ns) and BID/ASK prices of a tick
+TICK_FIELDS = np.dtype([('time_ns', '<i8'),
+                        ('bid', '<f8'),
+                        ('ask', '<f8')])
+
+# receipt time (ns) and the 8 fields of a rate (TIME;OPEN;HIGH;LOW;CLOSE;TICKVOL;SPREAD;VOLUME)
+RATE_FIELDS = np.dtype([('time_ns', '<i8'),
+                        ('time', '<i8'),
+                        ('open', '<f8'),
+                        ('high', '<f8'),
+                        ('low', '<f8'),
+                        ('close', '<f8'),
+                        ('tick_volume', '<i8'),
+                        ('spread', '<i8'),
+                        ('real_volume', '<i8')])
+
+class ring_buffer():
+    """
+    fixed capacity buffer of structured NumPy records, the oldest records are overwritten once it is full.
+
+    Args:
+        - dtype   : numpy dtype of the records, must have an increasing int64 'time_ns' field to use since().
+        - capacity: integer indicating the maximum number of records kept.
+
+    Public Methods:
+        - append(): appends a record given as a tuple of field values.
+        - last()  : returns a zero-copy view of the last n records (all of them if n is None), oldest first.
+        - since() : returns a zero-copy view of the records with time_ns >= t.
+        - latest(): returns the most recent record (None if empty).
+    """
+
+    def __init__(self, dtype, capacity=100000):
+        self._capacity = capacity
+        self._buffer = np.zeros(2 * capacity, dtype=dtype)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def append(self, record):
+        i = self._count % self._capacity
+        self._buffer[i] = record
+        self._buffer[i + self._capacity] = record
+        self._count += 1
+
+    def last(self, n=None):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = (self._count - 1) % self._capacity + self._capacity + 1 if self._count else 0
+        return self._buffer[end - n:end]
+
+    def since(self, t):
+        view = self.last()
+        return view[np.searchsorted(view['time_ns'], t, side='left'):]
+
+    def latest(self):
+        return self.last(1)[0] if self._count else None
+
+class market_data_store():
+    """
+    per-symbol tick and rate ring buffers, used as 'DWX_ZeroMQ_Connector._Market_Data_DB'.
+
+    Args:
+        - capacity: integer indicating the number of ticks (and rates) kept per symbol.
+
+    Public Methods:
+        - append_tick(): stores a BID/ASK tick of a symbol.
+        - append_rate(): stores a rate record of a symbol.
+        - ticks()      : returns the tick ring buffer of a symbol.
+        - rates()      : returns the rate ring buffer of a symbol.
+        - last()       : returns a zero-copy view of the last n ticks of a symbol.
+        - since()      : returns a zero-copy view of the ticks of a symbol received at or after time t (ns).
+        - keys()       : returns the symbols with stored data.
+        - to_frame()   : returns a copy of the ticks (or rates) of a symbol as a pandas dataframe with a datetime index (UTC).
+    """
+
+    def __init__(self, capacity=100000):
+        self._capacity = capacity
+        self._ticks = {}
+        self._rates = {}
+
+    def append_tick(self, symbol, time_ns, bid, ask):
+        if symbol not in self._ticks:
+            self._ticks[symbol] = ring_buffer(TICK_FIELDS, self._capacity)
+        self._ticks[symbol].append((time_ns, bid, ask))
+
+    def append_rate(self, symbol, time_ns, rate):
+        if symbol not in self._rates:
+            self._rates[symbol] = ring_buffer(RATE_FIELDS, self._capacity)
+        self._rates[symbol].append((time_ns,) + tuple(rate))
+
+    def ticks(self, symbol):
+        return self._ticks[symbol]
+
+    def rates(self, symbol):
+        return self._rates[symbol]
+
+    def last(self, symbol, n=None):
+        return self._ticks[symbol].last(n)
+
+    def since(self, symbol, t):
+        return self._ticks[symbol].since(t)
+
+    def to_frame(self, symbol, rates=False):
+        records = (self._rates if rates else self._ticks)[symbol].last()
+        df = pd.DataFrame({name: records[name] for name in records.dtype.names if name != 'time_ns'})
+        df.index = pd.to_datetime(records['time_ns'], utc=True)
+        return df
+
+    def keys(self):
+        return list(dict.fromkeys(list(self._ticks) + list(self._rates)))
+
+    def __contains__(self, symbol):
+        return symbol in self._ticks or symbol in self._rates
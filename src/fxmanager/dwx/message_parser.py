@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This Module is used for parsing the messages the MT4 EA sends on the PULL channel without 'eval()'.
+
+The EA replies with python-dict-like strings (single quoted strings, True/False), e.g. "{'_action': 'EXECUTION', '_magic': 123, ...}". Messages are parsed as JSON when possible, otherwise with 'ast.literal_eval()' that accepts literals only and never runs code. HIST replies holding thousands of candles are decoded directly into NumPy columns, so their '_data' value is a dictionary of arrays (one per field, e.g. 'time', 'open', ..) instead of a list of dictionaries, 'pandas.DataFrame(data['_data'])' gives the same dataframe in both cases. The connector converts them back to a list of dictionaries (see 'to_records()') for the history it retains in '_History_DB', so code indexing it as '_History_DB[SYMBOL_TF][i]['open']' is not affected.
+
+Public Functions:
+    - parse_message(): parses a PULL message into a dictionary.
+    - to_records()   : converts the '_data' columns of a HIST reply to a list of dictionaries (one per candle).
+"""
+
+import re
+import json
+from ast import literal_eval
+import numpy as np
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+_HIST_DATA = "'_data': ["
+_KEY = re.compile(r"'(\w+)'\s*:")
+_VALUE = re.compile(r":\s*('[^']*'|[^,}\s]+)")
+
+def _column(values):
+    if values[0][:1] == "'":
+        return np.char.strip(values, "'")
+    try:
+        return values.astype(np.int64)
+    except ValueError:
+        return values.astype(np.float64)
+
+def _parse_hist(msg):
+    """
+    decodes the '_data' list of a HIST reply into a dictionary of NumPy columns, returns None if the list is not a flat list of records with the same fields.
+    """
+    start = msg.find(_HIST_DATA)
+    end = msg.rfind(']')
+    if start < 0 or end < start:
+        return None
+    data = literal_eval(msg[:start] + "'_data': None" + msg[end + 1:])
+    body = msg[start + len(_HIST_DATA):end]
+    names = _KEY.findall(body, 0, body.find('}') + 1)
+    if not names:
+        data['_data'] = {}
+        return data
+    values = _VALUE.findall(body)
+    rows = len(values) // len(names)
+    if len(values) % len(names) != 0 or any(body.count("'" + name + "'") != rows for name in names):
+        return None
+    values = np.array(values).reshape(rows, len(names))
+    data['_data'] = {name: _column(values[:, j]) for j, name in enumerate(names)}
+    return data
+
+def parse_message(msg):
+    """
+    parses a message received on the PULL channel.
+
+    Args:
+        - msg: string with the message as sent by the EA.
+    Returns:
+        - data: dictionary with the message content, the '_data' value of HIST replies is a dictionary of NumPy columns.
+    Raises:
+        - ValueError / SyntaxError if the message is not a valid literal.
+    """
+    try:
+        return json.loads(msg)
+    except ValueError:
+        pass
+    if msg.startswith("{'_action': 'HIST'"):
+        data = _parse_hist(msg)
+        if data is not None:
+            return data
+    return literal_eval(msg)
+
+def to_records(columns):
+    """
+    converts the '_data' value of a HIST reply parsed by 'parse_message()' to the list of dictionaries (one per candle, with python values) 'literal_eval()' gives, a list is returned unchanged.
+
+    Args:
+        - columns: dictionary of NumPy columns (or list of dictionaries).
+    Returns:
+        - records: list of dictionaries, e.g. [{'time': '2021.06.17 00:00', 'open': 1.19, ..}, ..].
+    """
+    if not isinstance(columns, dict):
+        return columns
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[name].tolist() for name in names))]
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This Module contains the counters the DWX connector keeps about the messages it receives and sends.
+
+Every message handled on the PULL and SUB sockets is counted per (socket, symbol) together with the time spent in its handler, SUB messages superseded by a newer quote of the same symbol in conflation mode are counted as conflated, messages that raise while being parsed or handled are counted as errors, and empty reads (zmq.Again) are counted per socket. Sends on the PUSH socket are counted as sent, retried (zmq.Again, the send HWM is full) or refused (no handshake). The counters are read with 'summary()' and can be dumped periodically to a CSV file, e.g. 'data_dir\\logs\\connector_metrics.csv'.
+
+Messages dropped by ZeroMQ at the high water mark never reach the connector and can not be counted, they show up as a lower message rate and a growing 'since_last_s' of the affected symbols.
+
+Public Classes:
+    - connector_metrics: message, error, handler time and send counters of a DWX connector, used as 'DWX_ZeroMQ_Connector._Metrics'.
+"""
+
+from time import monotonic_ns
+import pandas as pd
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+# indices of the per (socket, symbol) counters
+_COUNT, _ERRORS, _HANDLER_NS, _HANDLER_MAX_NS, _WINDOW_COUNT, _CONFLATED = range(6)
+
+class connector_metrics():
+    """
+    message, error, handler time and send counters of a DWX connector.
+
+    Args:
+        - dump_path : string with the full path of the CSV file the summary is dumped to, if None, periodic dumping is disabled.
+        - dump_every: float indicating the minimum number of seconds between two dumps made by 'maybe_dump()'.
+
+    Public Methods:
+        - on_message()  : counts a handled message of a socket and symbol with the time spent in its handler.
+        - on_error()    : counts a message of a socket that could not be parsed or handled.
+        - on_conflated(): counts a message superseded by a newer message of the same socket and symbol.
+        - on_again()    : counts an empty read of a socket.
+        - on_send()     : counts a send on the PUSH socket by outcome ('sent', 'again' or 'refused').
+        - summary()     : returns a pandas dataframe with the counters of every socket and symbol.
+        - dump()        : writes the summary to 'dump_path' and starts a new rate window.
+        - maybe_dump()  : calls dump() if 'dump_every' seconds passed since the last dump.
+    """
+
+    COLUMNS = ['socket', 'symbol', 'messages', 'errors', 'conflated', 'again', 'msgs_per_s', 'window_msgs_per_s', 'handler_mean_us', 'handler_max_us', 'since_last_s']
+
+    def __init__(self, dump_path=None, dump_every=60):
+        self._dump_path = dump_path
+        self._dump_every_ns = int(dump_every * 1e9)
+        self._start_ns = monotonic_ns()
+        self._window_start_ns = self._start_ns
+        self._stats = {}        # {(SOCKET, SYMBOL): [COUNT, ERRORS, HANDLER_NS, HANDLER_MAX_NS, WINDOW_COUNT, CONFLATED]}
+        self._last_ns = {}      # {(SOCKET, SYMBOL): monotonic ns of the last message}
+        self._again = {}        # {SOCKET: empty reads}
+        self._sends = {'sent': 0, 'again': 0, 'refused': 0}
+
+    def _get(self, socket, symbol):
+        key = (socket, symbol)
+        if key not in self._stats:
+            self._stats[key] = [0, 0, 0, 0, 0, 0]
+        return self._stats[key]
+
+    def on_message(self, socket, symbol, handler_ns, now_ns=None):
+        """
+        counts a handled message of 'socket' ('PULL' or 'SUB') and 'symbol' ('' if the message has none), 'handler_ns' is the time spent handling it.
+        """
+        key = (socket, symbol)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = [0, 0, 0, 0, 0, 0]
+        stats[_COUNT] += 1
+        stats[_WINDOW_COUNT] += 1
+        stats[_HANDLER_NS] += handler_ns
+        if handler_ns > stats[_HANDLER_MAX_NS]:
+            stats[_HANDLER_MAX_NS] = handler_ns
+        self._last_ns[key] = monotonic_ns() if now_ns is None else now_ns
+
+    def on_error(self, socket, symbol=''):
+        self._get(socket, symbol)[_ERRORS] += 1
+
+    def on_conflated(self, socket, symbol):
+        self._get(socket, symbol)[_CONFLATED] += 1
+
+    def on_again(self, socket):
+        self._again[socket] = self._again.get(socket, 0) + 1
+
+    def on_send(self, outcome):
+        self._sends[outcome] += 1
+
+    def summary(self):
+        """
+        returns a pandas dataframe with columns (socket, symbol, messages, errors, conflated, again, msgs_per_s, window_msgs_per_s, handler_mean_us, handler_max_us, since_last_s), one row per socket and symbol, the PUSH row counts sent messages, refused sends (errors) and sends retried because the HWM was full (again).
+        """
+        now = monotonic_ns()
+        elapsed = max(now - self._start_ns, 1) / 1e9
+        window = max(now - self._window_start_ns, 1) / 1e9
+        rows = []
+        for (socket, symbol), stats in sorted(list(self._stats.items())):
+            last = self._last_ns.get((socket, symbol))
+            rows.append({'socket': socket,
+                         'symbol': symbol,
+                         'messages': stats[_COUNT],
+                         'errors': stats[_ERRORS],
+                         'conflated': stats[_CONFLATED],
+                         'again': self._again.get(socket, 0),
+                         'msgs_per_s': stats[_COUNT] / elapsed,
+                         'window_msgs_per_s': stats[_WINDOW_COUNT] / window,
+                         'handler_mean_us': stats[_HANDLER_NS] / stats[_COUNT] / 1e3 if stats[_COUNT] else None,
+                         'handler_max_us': stats[_HANDLER_MAX_NS] / 1e3,
+                         'since_last_s': (now - last) / 1e9 if last is not None else None})
+        rows.append({'socket': 'PUSH',
+                     'symbol': '',
+                     'messages': self._sends['sent'],
+                     'errors': self._sends['refused'],
+                     'again': self._sends['again'],
+                     'msgs_per_s': self._sends['sent'] / elapsed})
+        return pd.DataFrame(rows, columns=self.COLUMNS)
+
+    def dump(self, path=None):
+        """
+        writes the summary to the given path (or 'dump_path' if None) as a CSV file and starts a new rate window.
+        """
+        path = self._dump_path if path is None else path
+        if path is not None:
+            self.summary().to_csv(path, index=False)
+        for stats in list(self._stats.values()):
+            stats[_WINDOW_COUNT] = 0
+        self._window_start_ns = monotonic_ns()
+
+    def maybe_dump(self):
+        """
+        calls dump() if at least 'dump_every' seconds passed since the last dump.
+        """
+        if self._dump_path is not None and (monotonic_ns() - self._window_start_ns) >= self._dump_every_ns:
+            self.dump()
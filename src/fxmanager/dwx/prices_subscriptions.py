@@ -60,7 +60,8 @@ class prices_subscriptions(DWX_ZMQ_Strategy):
                  _symbols=['EURUSD','GDAXI'],
                  _delay=0.1,
                  _broker_gmt=3,
-                 _verbose=False):
+                 _verbose=False,
+                 _zmq_options={}):
         
         # call DWX_ZMQ_Strategy constructor and passes itself as data processor for handling
         # received data on PULL and SUB ports 
@@ -69,7 +70,8 @@ class prices_subscriptions(DWX_ZMQ_Strategy):
                          _broker_gmt,
                          [self],      # Registers itself as handler of pull data via self.onPullData()
                          [self],      # Registers itself as handler of sub data via self.onSubData()
-                         _verbose)
+                         _verbose,
+                         _zmq_options)
         
         # This strategy's variables
         self._symbols = _symbols
@@ -84,6 +86,12 @@ class prices_subscriptions(DWX_ZMQ_Strategy):
                                'EURDKK':0, 'EURGBP':0, 'EURHKD':0, 'EURHUF':0, 'EURJPY':0, 'EURMXN':0,
                                'EURNOK':0, 'EURNZD':0, 'EURPLN':0, 'EURSEK':0, 'EURSGD':0, 'EURTRY':0,
                                'EURZAR':0}
+        
+        # monotonic ns receipt time of the last tick of each symbol (stamped by the connector on receipt)
+        self._recent_prices_ns = {}
+
+        # receipt time (ns since epoch, UTC) of the last tick of each symbol
+        self._recent_prices_time_ns = {}
 
         # lock for acquire/release of ZeroMQ connector
         self._lock = Lock()
@@ -110,6 +118,8 @@ class prices_subscriptions(DWX_ZMQ_Strategy):
         # split msg to get topic and message
         _topic, _msg = data.split(" ")
         self._recent_prices[_topic] = [float(i) for i in _msg.strip().split(';')]
+        self._recent_prices_ns[_topic] = self._zmq._Tick_Recv_NS.get(_topic)
+        self._recent_prices_time_ns[_topic] = self._zmq._Tick_Time_NS.get(_topic)
 
     ##########################################################################    
     def run(self):        
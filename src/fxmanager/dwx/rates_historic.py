@@ -6,8 +6,14 @@ This Module is used as an API to get historic data from the MT4 EA.
 
 This is a modified version of an example of using the Darwinex ZeroMQ Connector for Python 3 and MetaTrader 4 PULL REQUEST for v2.0.1 in which a Client requests rate history from a Daily from a start date to an end date. The user creates a 'rates_historic' object and using the methods 'get_daily_candles' and 'get_period_candles' the user client can get the historic data of the desired symbols. 
 
+HIST replies are not kept by the connector ('_retain_history' is False unless passed in '_zmq_options'), the columns of every reply are written to its CSV file in chunks as soon as it arrives and released, so memory use does not grow with the amount of history pulled.
+
+Requests are asynchronous: 'request_history', 'get_daily_candles' and 'get_period_candles' return 'concurrent.futures.Future' objects that are resolved by the PULL handler as soon as the reply is parsed, so many requests can be in flight at once. HIST replies carry no range, a reply resolves the request of its (symbol, timeframe) whose range holds its first and last candles (requests of overlapping ranges are sent one after the other) and late replies to requests resolved already are dropped. All requests are sent on the PUSH socket by one sender thread, whatever thread (caller, timer or PULL handler) they come from. A request is sent again if no reply arrives within its timeout or if MT4 replies without data (which it often does for symbols without open charts), and fails with a TimeoutError (or RuntimeError) once its retries are used up.
+
 The original example is referenced `here <https://github.com/darwinex/dwx-zeromq-connector/blob/master/v2.0.1/python/examples/template/strategies/rates_historic.py>`_.
 
+A 'rates_historic' object talks to a single MT4 terminal. A 'rates_historic_pool' object spreads the requests over several MT4 terminals (or EA instances) through a 'rates_historic' object per terminal, each with its own limit of requests in flight. A request that fails on a terminal is sent again on another one and the terminal is avoided for a while, so bulk downloads scale with the number of terminals. The pool has the 'request_history', 'get_daily_candles' and 'get_period_candles' methods of 'rates_historic', so it can be passed where a 'rates_historic' object is expected (e.g. the 'rates' argument of 'fxmanager.dwx.history_downloader.history_downloader'), it is not used by 'rates_historic' itself.
+
 Through commmand HIST, this client can select multiple rates from an INSTRUMENT (symbol, timeframe).
 For example, to receive rates from instruments EURUSD(M1), between two dates, it will send this command to the Server, through its PUSH channel:
 
@@ -30,25 +36,123 @@ from fxmanager.dwx.DWX_ZMQ_Strategy import DWX_ZMQ_Strategy
 #############################################################################
 
 import pandas as pd
-from threading import Thread, Lock
-from time import sleep
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from queue import Queue
+from threading import Thread, Lock, Timer
+from time import sleep, monotonic
 from os.path import join
 import fxmanager._metadata as md
 from __main__ import __dict__
 
 __dict__.update(md.__dict__)
 
+# HIST replies name instruments as SYMBOL_TF
+TIMEFRAMES = {1: 'M1', 5: 'M5', 15: 'M15', 30: 'M30', 60: 'H1', 240: 'H4', 1440: 'D1', 10080: 'W1', 43200: 'MN1'}
+
+def _write_csv(columns, path, chunk_size=50000):
+    """
+    writes the columns of a HIST reply (a dictionary of NumPy arrays, see 'fxmanager.dwx.message_parser') to a CSV file 'chunk_size' rows at a time, the file is the same as 'pandas.DataFrame(columns).to_csv(path)' without building the whole dataframe.
+    """
+    if not isinstance(columns, dict):
+        pd.DataFrame(columns).to_csv(path)
+        return
+    n = len(next(iter(columns.values()))) if columns else 0
+    with open(path, 'w', newline='') as f:
+        for i in range(0, max(n, 1), chunk_size):
+            chunk = pd.DataFrame({name: values[i:i + chunk_size] for name, values in columns.items()},
+                                 index=pd.RangeIndex(i, min(i + chunk_size, n)))
+            chunk.to_csv(f, header=(i == 0))
+
+def _hist_time(text):
+    """
+    returns the time of a HIST request or candle string ('%Y.%m.%d %H:%M', seconds are ignored).
+    """
+    return datetime.strptime(text[:16], '%Y.%m.%d %H:%M')
+
+def _reply_range(candles):
+    """
+    returns the times of the first and last candles of the '_data' of a HIST reply (a dictionary of columns or a list of records), or None if it has no candle times.
+    """
+    if isinstance(candles, dict):
+        times = candles.get('time', ())
+        if len(times) == 0:
+            return None
+        first, last = times[0], times[-1]
+    elif isinstance(candles, list) and candles and isinstance(candles[0], dict) and 'time' in candles[-1]:
+        first, last = candles[0].get('time'), candles[-1]['time']
+    else:
+        return None
+    try:
+        return _hist_time(str(first)), _hist_time(str(last))
+    except ValueError:
+        return None
+
+#############################################################################
+# History files requests shared by rates_historic and rates_historic_pool
+#############################################################################
+
+class _history_files():
+    """
+    'get_daily_candles()' and 'get_period_candles()' built on the 'request_history()' method of the class they are mixed in.
+    """
+
+    def _save_to_csv(self, future, path):
+        """
+        returns a future resolved with 'path' once the data of 'future' is saved to it.
+        """
+        saved = Future()
+        def save(f):
+            try:
+                _write_csv(f.result(), path)
+                saved.set_result(path)
+            except Exception as ex:
+                saved.set_exception(ex)
+        future.add_done_callback(save)
+        return saved
+
+    def get_daily_candles(self, save_to='', currency_pair='', date='', timeout=60, retries=3):        
+        """
+        Request historic data of type 'daily_candles', returns a future resolved with the path of the saved CSV file
+        """        
+        print(f'>> DWX MESSAGE >> Requesting {currency_pair} Rates from {date}')
+        future = self.request_history(currency_pair=currency_pair,
+                                      timeframe=1,
+                                      start=date + ' 00:00:00',
+                                      end=date + ' 23:59:00',
+                                      timeout=timeout,
+                                      retries=retries)
+        return self._save_to_csv(future, join(save_to, currency_pair + '_' + date + '.csv'))
+  
+    def get_period_candles(self, save_to='', currency_pair='', start='', end='', timeout=300, retries=3):        
+        """
+        Request historic data of type 'period_candles', returns a future resolved with the path of the saved CSV file
+        """        
+        print(f'>> DWX MESSAGE >> Requesting {currency_pair} Rates from {start} to {end}')
+        future = self.request_history(currency_pair=currency_pair,
+                                      timeframe=1,
+                                      start=start + ' 00:00:00',
+                                      end=end + ' 23:59:00',
+                                      timeout=timeout,
+                                      retries=retries)
+        return self._save_to_csv(future, join(save_to, currency_pair + '_' + start + '_' + end + '.csv'))
+
 #############################################################################
 # Class derived from DWZ_ZMQ_Strategy includes data processor for PULL,SUB data
 #############################################################################
 
-class rates_historic(DWX_ZMQ_Strategy):
+class rates_historic(DWX_ZMQ_Strategy, _history_files):
     
     def __init__(self, 
                  _name="PRICES_SUBSCRIPTIONS",
                  _delay=0.1,
                  _broker_gmt=3,
-                 _verbose=False):
+                 _verbose=False,
+                 _zmq_options={}):
+        
+        # replies are saved by this object, the connector does not need to keep them
+        _zmq_options = {'_retain_history': False, **_zmq_options}
         
         # call DWX_ZMQ_Strategy constructor and passes itself as data processor for handling
         # received data on PULL and SUB ports 
@@ -57,7 +161,8 @@ class rates_historic(DWX_ZMQ_Strategy):
                          _broker_gmt,
                          [self],      # Registers itself as handler of pull data via self.onPullData()
                          [self],      # Registers itself as handler of sub data via self.onSubData()
-                         _verbose)
+                         _verbose,
+                         _zmq_options)
         
         # This strategy's variables
         self._delay = _delay
@@ -66,6 +171,20 @@ class rates_historic(DWX_ZMQ_Strategy):
 
         # lock for acquire/release of ZeroMQ connector
         self._lock = Lock()
+
+        # HIST requests by instrument ({SYMBOL_TF: [request, ..]}): the requests waiting for a reply in the order they were
+        # sent, and the requests held back until no request of an overlapping range is waiting (a reply could not be told apart)
+        self._active = {}
+        self._held = {}
+        # sends waiting for a reply in sending order ({SYMBOL_TF: deque([(request, send number), ..])}), MT4 replies to commands
+        # in order, so a reply without candles (which can not be matched by range) answers the oldest one
+        self._sent = {}
+        self._pending_lock = Lock()
+
+        # the PUSH socket is not thread-safe, the requests of every thread (callers, timers, PULL handlers) are sent by this one
+        self._sends = Queue()
+        self._sender = Thread(target=self._send_loop, name='rates_historic sender', daemon=True)
+        self._sender.start()
         
     ##########################################################################    
     def isFinished(self):        
@@ -77,11 +196,27 @@ class rates_historic(DWX_ZMQ_Strategy):
         """
         Callback to process new data received through the PULL port
         """        
-        # print responses to request commands
-        # print('>> DWX MESSAGE >> Historic from ExpertAdvisor={}'.format(data))
-        # _topic, _msg = data.split(" ")
-        # print(_msg)
-        pass
+        # resolve the request whose range holds the candles of the reply, the oldest one if the reply has no candles
+        if data.get('_action') != 'HIST' or '_symbol' not in data:
+            return
+        times = _reply_range(data.get('_data'))
+        with self._pending_lock:
+            sent = self._sent.get(data['_symbol'], deque())
+            # drop the sends of requests that were resolved or sent again since
+            while sent and (sent[0][0]['done'] or sent[0][1] != sent[0][0]['sends']):
+                sent.popleft()
+            if times is None:
+                request = sent.popleft()[0] if sent else None
+            else:
+                active = self._active.get(data['_symbol'], [])
+                request = next((r for r in active if r['range'][0] - timedelta(minutes=r['args'][1]) < times[0] and times[1] <= r['range'][1]), None)
+        if request is None:
+            # late reply to a request that was resolved (or failed) already
+            return
+        if '_data' in data:
+            self._finish(request, result=data['_data'])
+        else:
+            self._retry(request, RuntimeError(f"No data returned for {data['_symbol']}: {data.get('_response', data)}"))
         
     ##########################################################################    
     def onSubData(self, data):        
@@ -93,54 +228,129 @@ class rates_historic(DWX_ZMQ_Strategy):
         # print('>> DWX MESSAGE >> Data on Topic={} with Message={}'.format(_topic, _msg))
         
     ##########################################################################    
-    def get_daily_candles(self, save_to='', currency_pair='', date=''):        
+    def request_history(self, currency_pair='', timeframe=1, start='', end='', timeout=60, retries=3):
         """
-        Request historic data and returns data of type 'daily_candles'
-        """        
-        self._finished = False
-                
-        # request rates
-        print(f'>> DWX MESSAGE >> Requesting {currency_pair} Rates from {date}')
-        self._zmq._DWX_MTX_SEND_HIST_REQUEST_(_symbol=currency_pair,
-                                              _timeframe=1,
-                                              _start=date + ' 00:00:00',
-                                              _end=date + ' 23:59:00')
-        while (currency_pair + '_M1') not in self._zmq._History_DB.keys():
-          sleep(1)
-        print('>> DWX MESSAGE >> Saving Data to CSV file ...\n')        
-        df = pd.DataFrame(self._zmq._History_DB[currency_pair + '_M1'])
-        df.to_csv(join(save_to, currency_pair + '_' + date + '.csv'))
-        del df
-        # finishes (removes all subscriptions)  
-        self.stop()
-  
-    def get_period_candles(self, save_to='', currency_pair='', start='', end=''):        
+        sends a HIST request and returns a 'concurrent.futures.Future' resolved with the '_data' of the reply (a dictionary of columns, see 'fxmanager.dwx.message_parser').
+
+        replies carry no range, a reply resolves the request of its instrument whose range holds its first and last candles, so a request is held back until no request of the same instrument with an overlapping range is waiting for a reply.
+
+        Args:
+            - currency_pair: string with the symbol.
+            - timeframe    : integer with the timeframe in minutes (1, 5, 15, 30, 60, 240, 1440, 10080 or 43200).
+            - start, end   : strings with the first and last times of the range ('%Y.%m.%d %H:%M:%S').
+            - timeout      : float indicating the number of seconds to wait for the reply before the request is sent again.
+            - retries      : integer indicating the number of times a request is sent again before its future fails.
         """
-        Request historic data and returns data of type 'period_candles'
-        """        
-        self._finished = False
-                
-        # request rates
-        print(f'>> DWX MESSAGE >> Requesting {currency_pair} Rates from {start} to {end}')
-        self._zmq._DWX_MTX_SEND_HIST_REQUEST_(_symbol=currency_pair,
-                                              _timeframe=1,
-                                              _start=start + ' 00:00:00',
-                                              _end=end + ' 23:59:00')
-        while (currency_pair + '_M1') not in self._zmq._History_DB.keys():
-          sleep(5)
-        print('>> DWX MESSAGE >> Saving Data to CSV file ...\n')  
-        df = pd.DataFrame(self._zmq._History_DB[currency_pair + '_M1'])
-        df.to_csv(join(save_to, currency_pair + '_' + start + '_' + end + '.csv'))
-        del df
-        
-        # finishes (removes all subscriptions)  
-        self.stop()
+        request = {'key': currency_pair + '_' + TIMEFRAMES.get(timeframe, str(timeframe)),
+                   'args': (currency_pair, timeframe, start, end),
+                   'range': (_hist_time(start), _hist_time(end)),
+                   'timeout': timeout,
+                   'retries': retries,
+                   'future': Future(),
+                   'timer': None,
+                   'sends': 0,
+                   'done': False}
+        with self._pending_lock:
+            waiting = self._active.get(request['key'], []) + list(self._held.get(request['key'], ()))
+            if any(self._overlap(request, other) for other in waiting):
+                self._held.setdefault(request['key'], deque()).append(request)
+                return request['future']
+            self._active.setdefault(request['key'], []).append(request)
+        self._sends.put(request)
+        return request['future']
+
+    @staticmethod
+    def _overlap(a, b):
+        return a['range'][0] <= b['range'][1] and b['range'][0] <= a['range'][1]
+
+    def _send_loop(self):
+        """
+        sends the queued requests on the PUSH socket, runs in the sender thread until 'stop()' queues None.
+        """
+        while True:
+            request = self._sends.get()
+            if request is None:
+                return
+            with self._pending_lock:
+                if request['done']:
+                    continue
+                if request['timer'] is not None:
+                    request['timer'].cancel()
+                request['sends'] += 1
+                request['timer'] = Timer(request['timeout'], self._on_timeout, (request, request['sends']))
+                request['timer'].daemon = True
+                request['timer'].start()
+                self._sent.setdefault(request['key'], deque()).append((request, request['sends']))
+            _symbol, _timeframe, _start, _end = request['args']
+            if not self._zmq._DWX_MTX_SEND_HIST_REQUEST_(_symbol=_symbol, _timeframe=_timeframe, _start=_start, _end=_end):
+                self._retry(request, RuntimeError(f"HIST request for {request['key']} could not be sent"), delay=self._delay)
+
+    def _on_timeout(self, request, sends):
+        # a timer of an earlier send of the request is ignored
+        if request['sends'] == sends:
+            self._retry(request, TimeoutError(f"No reply to HIST request for {request['key']} within {request['timeout']} s"))
+
+    def _retry(self, request, error, delay=0):
+        """
+        queues the request to be sent again (after 'delay' seconds, on a timer) or fails it once its retries are used up.
+        """
+        with self._pending_lock:
+            if request['done']:
+                return
+            if request['timer'] is not None:
+                request['timer'].cancel()
+            request['sends'] += 1       # the timeout of the last send no longer applies
+            retry = request['retries'] > 0
+            if retry:
+                request['retries'] -= 1
+        if not retry:
+            self._finish(request, error=error)
+        elif delay:
+            timer = Timer(delay, self._sends.put, (request,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._sends.put(request)
+
+    def _finish(self, request, result=None, error=None):
+        """
+        resolves (or fails) the future of a request and sends the held requests of its instrument that no longer overlap a waiting one.
+        """
+        released = []
+        with self._pending_lock:
+            if request['done']:
+                return
+            request['done'] = True
+            if request['timer'] is not None:
+                request['timer'].cancel()
+            # the timer holds the request, drop it so the reply is freed as soon as it is saved
+            request['timer'] = None
+            active = self._active[request['key']]
+            active.remove(request)
+            if not active:
+                self._sent.pop(request['key'], None)
+            held = self._held.get(request['key'], deque())
+            for other in list(held):
+                if not any(self._overlap(other, a) for a in active):
+                    held.remove(other)
+                    active.append(other)
+                    released.append(other)
+        for other in released:
+            self._sends.put(other)
+        if error is None:
+            request['future'].set_result(result)
+        else:
+            request['future'].set_exception(error)
 
     ##########################################################################    
     def stop(self):
       """
       unsubscribe from all market symbols and exits
       """
+      # stop the sender thread first, the PUSH socket is then only used by this thread
+      self._sends.put(None)
+      self._sender.join()
+
       # remove subscriptions and stop symbols price feeding
       try:
         # Acquire lock
@@ -155,6 +365,108 @@ class rates_historic(DWX_ZMQ_Strategy):
       
       self._finished = True
 
+#############################################################################
+# Pool of rates_historic objects connected to different MT4 terminals
+#############################################################################
+
+class rates_historic_pool(_history_files):
+    """
+    spreads HIST requests over several MT4 terminals (or EA instances), each served by its own 'rates_historic' object. It has the request methods of 'rates_historic' and can be passed in its place (e.g. to 'history_downloader').
+
+    Requests are queued and handed to the healthy terminal with the fewest requests in flight that is below its limit. A request that fails on a terminal (after the retries of that terminal) is sent to another terminal it was not tried on yet, and the failed terminal is only used again after 'cooldown' seconds (or when no other terminal is left for a request). The future of a request fails once it failed on every terminal.
+
+    Args:
+        - endpoints    : list of dictionaries with the DWX connector arguments of every terminal (e.g. {'_host': 'localhost', '_PUSH_PORT': 32768, '_PULL_PORT': 32769, '_SUB_PORT': 32770}), an optional 'max_in_flight' key overrides the limit of that terminal.
+        - max_in_flight: integer indicating the maximum number of requests in flight per terminal.
+        - cooldown     : float indicating the number of seconds a terminal is avoided after a request failed on it.
+        - _delay, _broker_gmt, _verbose: same as 'rates_historic'.
+
+    Public Methods:
+        - request_history()   : queues a HIST request and returns a future resolved with the '_data' of the reply.
+        - get_daily_candles() : same as 'rates_historic.get_daily_candles()'.
+        - get_period_candles(): same as 'rates_historic.get_period_candles()'.
+        - stop()              : stops the 'rates_historic' objects of all the terminals.
+    """
+
+    def __init__(self, endpoints=[{}], max_in_flight=4, cooldown=30, _delay=0.1, _broker_gmt=3, _verbose=False):
+        self._endpoints = []
+        for options in endpoints:
+            options = dict(options)
+            limit = options.pop('max_in_flight', max_in_flight)
+            self._endpoints.append({'rates': rates_historic(_delay=_delay, _broker_gmt=_broker_gmt, _verbose=_verbose, _zmq_options=options),
+                                    'max_in_flight': limit,
+                                    'in_flight': 0,
+                                    'down_until': 0})
+        self._cooldown = cooldown
+        self._queue = deque()
+        self._lock = Lock()
+
+    def request_history(self, currency_pair='', timeframe=1, start='', end='', timeout=60, retries=3):
+        """
+        queues a HIST request and returns a 'concurrent.futures.Future' resolved with the '_data' of the reply, the arguments are the same as 'rates_historic.request_history()', 'timeout' and 'retries' apply on every terminal the request is sent to.
+        """
+        job = {'args': (currency_pair, timeframe, start, end, timeout, retries),
+               'future': Future(),
+               'tried': set()}
+        with self._lock:
+            self._queue.append(job)
+        self._dispatch()
+        return job['future']
+
+    def _select(self):
+        """
+        pops the first queued request that can be sent now and reserves a terminal for it, returns (job, index) or None.
+        """
+        now = monotonic()
+        for job in self._queue:
+            untried = [i for i in range(len(self._endpoints)) if i not in job['tried']]
+            healthy = [i for i in untried if self._endpoints[i]['down_until'] <= now]
+            ready = [i for i in (healthy or untried) if self._endpoints[i]['in_flight'] < self._endpoints[i]['max_in_flight']]
+            if ready:
+                i = min(ready, key=lambda i: self._endpoints[i]['in_flight'])
+                self._queue.remove(job)
+                job['tried'].add(i)
+                self._endpoints[i]['in_flight'] += 1
+                return job, i
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                selected = self._select()
+            if selected is None:
+                return
+            job, i = selected
+            currency_pair, timeframe, start, end, timeout, retries = job['args']
+            # only queues the request for the sender thread of the terminal, '_on_done' may run in the PULL thread of another terminal
+            future =self._endpoints[i]['rates'].request_history(currency_pair=currency_pair, timeframe=timeframe, start=start, end=end,
+                                                                 timeout=timeout, retries=retries)
+            future.add_done_callback(lambda f, job=job, i=i: self._on_done(f, job, i))
+
+    def _on_done(self, future, job, i):
+        error = future.exception()
+        failover = False
+        with self._lock:
+            self._endpoints[i]['in_flight'] -= 1
+            if error is not None:
+                self._endpoints[i]['down_until'] = monotonic() + self._cooldown
+                if len(job['tried']) < len(self._endpoints):
+                    # send it to another terminal before the requests queued after it
+                    self._queue.appendleft(job)
+                    failover = True
+        if error is None:
+            job['future'].set_result(future.result())
+        elif not failover:
+            job['future'].set_exception(error)
+        self._dispatch()
+
+    def stop(self):
+        """
+        stops the 'rates_historic' objects of all the terminals.
+        """
+        for endpoint in self._endpoints:
+            endpoint['rates'].stop()
+
 """ -----------------------------------------------------------------------------------------------
     -----------------------------------------------------------------------------------------------
     SCRIPT SETUP
@@ -207,11 +519,11 @@ if __name__ == "__main__":
   # Starts example execution
   print('Running example...')
 
-  example.run(currency_pair = currency_pair, timeframe = timeframes[timeframe], tf=timeframe, start=start, end=end)
+  future = example.request_history(currency_pair = currency_pair, timeframe = timeframes[timeframe], start=start, end=end)
 
   # Waits example termination
   print('Waiting example termination...')
-  while not example.isFinished():
-    sleep(1)
+  print(pd.DataFrame(future.result()))
+  example.stop()
   print('Bye!!!')
   sleep(1)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This module contains a local stand-in for the MT4 terminal running the DWX ZeroMQ Server EA.
+
+The stand-in binds the same PUSH/PULL/PUB sockets the EA binds, so 'DWX_ZeroMQ_Connector' (and every client built on it, like 'prices_subscriptions' and 'rates_historic') can be used without a running MT4 terminal, e.g. in CI, on a headless Linux box or for benchmarking the live stack.
+
+Supported commands (received on the client's PUSH channel):
+
+"TRACK_PRICES;EURUSD;GBPUSD"                       -> starts publishing "EURUSD BID;ASK" messages on the PUB channel.
+
+"HIST;EURUSD;1;2021.10.11 00:00:00;2021.10.11 23:59:00" -> replies with the candles of the loaded history in the given range.
+
+"TRADE;OPEN;0;EURUSD;0;50;50;comment;0.01;123456;0" -> replies with an execution report at the last published price (OPEN, MODIFY, CLOSE, CLOSE_PARTIAL, CLOSE_MAGIC, CLOSE_ALL and GET_OPEN_TRADES are supported).
+
+"HEARTBEAT;"                                       -> replies with a heartbeat message.
+
+Replies are sent on the client's PULL channel in the same dict-like format the EA uses.
+
+Public Classes:
+    - stand_in_server: Class that replays tick and candles data over the DWX ZeroMQ protocol.
+
+Public Functions:
+    - load_preprocessed_ticks(): loads 2 ticks per 1-min candle from the preprocessed data in 'data_dir\\time_frames\\<day>\\1min'.
+    - load_raw_ticks()         : loads bid/ask ticks from a raw file of type 'daily_bid_ask'.
+    - load_history()           : loads 1-min candles from the CSV files saved by 'rates_historic'.
+"""
+
+import zmq
+import numpy as np
+import pandas as pd
+from os import listdir, getcwd
+from os.path import join
+from threading import Thread
+from time import sleep, monotonic_ns, strftime, gmtime
+from fxmanager.basic.storage import read_time_frame
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+TIMEFRAMES = {1: 'M1', 5: 'M5', 15: 'M15', 30: 'M30', 60: 'H1', 240: 'H4', 1440: 'D1', 10080: 'W1', 43200: 'MN1'}
+
+HIST_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume']
+
+def load_preprocessed_ticks(data_dir=None, day=0, currency_pairs=None, compact=False):
+    """
+    loads 2 ticks (open and close) per 1-min candle from the preprocessed data in 'data_dir\\time_frames\\<day>\\1min'.
+
+    Args:
+        - data_dir      : string with the directory or full path to the directory in which application data is kept. If the setup() function is used to create the recommended project structure, the default None value should be used.
+        - day           : integer indicating day number.
+        - currency_pairs: list of currency pairs to load, if None, all the currency pairs in the directory are loaded.
+        - compact       : boolean flag, if True, the prices are float32 (see 'fxmanager.basic.storage' for the precision guarantees).
+
+    Returns:
+        - ticks: dictionary with currency pairs as keys and numpy arrays of shape (n, 2) with (bid, ask) rows as values.
+    """
+
+    if data_dir is None:
+        data_dir = join(getcwd(), 'data')
+    tf_dir = join(data_dir, 'time_frames', str(day), '1min')
+    if currency_pairs is None:
+        currency_pairs = [f[:6] for f in listdir(tf_dir)]
+    ticks = {}
+    for cp in currency_pairs:
+        df = read_time_frame(join(tf_dir, cp + '_1min'), columns=['ask_open', 'bid_open', 'ask_close', 'bid_close'], compact=compact)
+        bid = np.column_stack([df['bid_open'].to_numpy(), df['bid_close'].to_numpy()]).ravel()
+        ask = np.column_stack([df['ask_open'].to_numpy(), df['ask_close'].to_numpy()]).ravel()
+        ticks[cp] = np.column_stack([bid, ask])
+    return ticks
+
+def load_raw_ticks(file_path, raw_data_format):
+    """
+    loads bid/ask ticks from a raw data file of type 'daily_bid_ask'.
+
+    Args:
+        - file_path      : string with the full path to the raw data file, the first 6 characters of the file name must be the currency pair symbol.
+        - raw_data_format: dictionary with the keys ('ask_col', 'bid_col') as described in 'fxmanager.basic.util.preprocess()' function.
+
+    Returns:
+        - ticks: numpy array of shape (n, 2) with (bid, ask) rows.
+    """
+
+    df = pd.read_csv(file_path, usecols=[raw_data_format['bid_col'], raw_data_format['ask_col']])
+    return np.column_stack([df[raw_data_format['bid_col']].to_numpy(), df[raw_data_format['ask_col']].to_numpy()])
+
+def load_history(hist_dir):
+    """
+    loads 1-min candles from CSV files saved by 'fxmanager.dwx.rates_historic' (columns time, open, high, low, close, tick_volume, spread, real_volume).
+
+    Args:
+        - hist_dir: string with the path to the directory with the CSV files, the first 6 characters of every file name must be the currency pair symbol, hidden files are skipped.
+
+    Returns:
+        - history: dictionary with currency pairs as keys and pandas dataframes sorted by time as values.
+    """
+
+    history = {}
+    for file_name in sorted(listdir(hist_dir)):
+        # hidden files (e.g. the manifest of 'fxmanager.dwx.history_downloader') are not candles
+        if file_name.startswith('.'):
+            continue
+        df = pd.read_csv(join(hist_dir, file_name))
+        df = df[[c for c in HIST_COLUMNS if c in df.columns]]
+        cp = file_name[:6]
+        if cp in history:
+            df = pd.concat([history[cp], df], ignore_index=True)
+        history[cp] = df.drop_duplicates('time').sort_values('time', ignore_index=True)
+    return history
+
+class stand_in_server():
+    """
+    Class that replays tick and candles data over the DWX ZeroMQ protocol, standing in for an MT4 terminal with the DWX ZeroMQ Server EA.
+
+    Args:
+        - _ticks     : dictionary with currency pairs as keys and numpy arrays of (bid, ask) rows as values, these ticks are published (round robin over the tracked symbols) after a TRACK_PRICES command.
+        - _history   : dictionary with currency pairs as keys and pandas dataframes of 1-min candles as values, used to answer HIST commands.
+        - _rate      : float indicating the number of ticks published per second (over all symbols), 0 publishes as fast as possible.
+        - _loop      : boolean flag, if True, the ticks are replayed from the start once they are exhausted.
+        - _sequence  : boolean flag, if True, the published bid and ask are replaced by the tick sequence number and the publish time of every tick is kept in 'self._sent_ns', used by benchmarks to measure end-to-end latency.
+        - _host, _protocol, _PUSH_PORT, _PULL_PORT, _SUB_PORT: same as 'DWX_ZeroMQ_Connector', the ports are seen from the client side (the server pulls on _PUSH_PORT, pushes on _PULL_PORT and publishes on _SUB_PORT).
+
+    Public Methods:
+        - run() : binds the sockets and starts the command and publisher threads.
+        - stop(): stops the threads and closes the sockets.
+    """
+
+    def __init__(self,
+                 _ticks={},
+                 _history={},
+                 _rate=1000,
+                 _loop=True,
+                 _sequence=False,
+                 _host='*',
+                 _protocol='tcp',
+                 _PUSH_PORT=32768,
+                 _PULL_PORT=32769,
+                 _SUB_PORT=32770,
+                 _delimiter=';',
+                 _poll_timeout=100,
+                 _verbose=False):
+
+        self._ticks = _ticks
+        self._history = _history
+        self._rate = _rate
+        self._loop = _loop
+        self._sequence = _sequence
+        self._URL = _protocol + "://" + _host + ":"
+        self._PUSH_PORT = _PUSH_PORT
+        self._PULL_PORT = _PULL_PORT
+        self._SUB_PORT = _SUB_PORT
+        self._delimiter = _delimiter
+        self._poll_timeout = _poll_timeout
+        self._verbose = _verbose
+
+        self._ACTIVE = False
+        self._ZMQ_CONTEXT = zmq.Context()
+        self._tracked_symbols = []
+        self._last_prices = {}      # {SYMBOL: (BID, ASK)}
+        self._trades = {}           # {TICKET: {trade properties}}
+        self._next_ticket = 1
+        self._published = 0
+        self._sent_ns = []          # publish time of every tick (only if _sequence is True)
+
+        self._Command_Thread = None
+        self._Publisher_Thread = None
+
+    ##########################################################################
+    def run(self):
+        """
+        binds the sockets and starts the command and publisher threads.
+        """
+        self._PULL_SOCKET = self._ZMQ_CONTEXT.socket(zmq.PULL)
+        self._PULL_SOCKET.bind(self._URL + str(self._PUSH_PORT))
+        self._PUSH_SOCKET = self._ZMQ_CONTEXT.socket(zmq.PUSH)
+        self._PUSH_SOCKET.bind(self._URL + str(self._PULL_PORT))
+        self._PUB_SOCKET = self._ZMQ_CONTEXT.socket(zmq.PUB)
+        self._PUB_SOCKET.setsockopt(zmq.SNDHWM, 0)
+        self._PUB_SOCKET.bind(self._URL + str(self._SUB_PORT))
+        print(f'[STAND-IN] Listening for commands (PULL): {self._PUSH_PORT}, replying (PUSH): {self._PULL_PORT}, publishing (PUB): {self._SUB_PORT}')
+
+        self._ACTIVE = True
+        self._Command_Thread = Thread(target=self._command_loop)
+        self._Command_Thread.daemon = True
+        self._Command_Thread.start()
+        self._Publisher_Thread = Thread(target=self._publisher_loop)
+        self._Publisher_Thread.daemon = True
+        self._Publisher_Thread.start()
+
+    ##########################################################################
+    def stop(self):
+        """
+        stops the threads and closes the sockets.
+        """
+        self._ACTIVE = False
+        if self._Command_Thread is not None:
+            self._Command_Thread.join()
+        if self._Publisher_Thread is not None:
+            self._Publisher_Thread.join()
+        self._ZMQ_CONTEXT.destroy(0)
+        print(f'[STAND-IN] Stopped after publishing {self._published} ticks')
+
+    ##########################################################################
+    def _reply(self, msg):
+        self._PUSH_SOCKET.send_string(msg)
+
+    def _command_loop(self):
+        poller = zmq.Poller()
+        poller.register(self._PULL_SOCKET, zmq.POLLIN)
+        while self._ACTIVE:
+            if not dict(poller.poll(self._poll_timeout)):
+                continue
+            msg = self._PULL_SOCKET.recv_string()
+            if self._verbose:
+                print(f'[STAND-IN] Command: {msg}')
+            try:
+                reply = self._on_command(msg.split(self._delimiter))
+            except Exception as ex:
+                reply = "{'_action': 'ERROR', '_response': '" + type(ex).__name__ + "'}"
+            if reply is not None:
+                self._reply(reply)
+
+    def _on_command(self, comp):
+        action = comp[0]
+        if action == 'TRACK_PRICES':
+            self._tracked_symbols = [s for s in comp[1:] if s != '']
+            if all(s in self._ticks for s in self._tracked_symbols):
+                return "{'_action': 'TRACK_PRICES', '_data': {'symbol_count':" + str(len(self._tracked_symbols)) + "}}"
+            return "{'_action': 'TRACK_PRICES', '_data': {'_response':'NOT_AVAILABLE'}}"
+        elif action == 'TRACK_RATES':
+            return "{'_action': 'TRACK_RATES', '_data': {'instrument_count':" + str(len([s for s in comp[1:] if s != '']) // 2) + "}}"
+        elif action == 'HIST':
+            return self._on_hist(comp[1], int(comp[2]), comp[3], comp[4])
+        elif action == 'TRADE':
+            return self._on_trade(comp)
+        elif action == 'HEARTBEAT':
+            return "{'_action': 'heartbeat', '_response': 'loading'}"
+        return None
+
+    def _on_hist(self, symbol, timeframe, start, end):
+        key = symbol + '_' + TIMEFRAMES.get(timeframe, str(timeframe))
+        df = self._history.get(symbol)
+        if df is not None:
+            # '%Y.%m.%d %H:%M' strings sort like the times they represent
+            times = df['time'].to_numpy().astype(str)
+            lo, hi = np.searchsorted(times, start[:16], 'left'), np.searchsorted(times, end[:16], 'right')
+            df = df.iloc[lo:hi]
+            if timeframe != 1 and len(df) > 0:
+                df = self._resample(df, timeframe)
+        if df is None or len(df) == 0:
+            return "{'_action': 'HIST', '_symbol': '" + key + "', '_response': 'NOT_AVAILABLE'}"
+        records = []
+        for row in df.itertuples(index=False):
+            records.append("{'time':'" + row.time + "', 'open':" + repr(float(row.open)) + ", 'high':" + repr(float(row.high)) +
+                           ", 'low':" + repr(float(row.low)) + ", 'close':" + repr(float(row.close)) +
+                           ", 'tick_volume':" + str(int(row.tick_volume)) + ", 'spread':" + str(int(getattr(row, 'spread', 0))) +
+                           ", 'real_volume':" + str(int(getattr(row, 'real_volume', 0))) + "}")
+        return "{'_action': 'HIST', '_symbol': '" + key + "', '_data': [" + ", ".join(records) + "]}"
+
+    def _resample(self, df, timeframe):
+        df = df.set_index(pd.to_datetime(df['time'], format='%Y.%m.%d %H:%M'))
+        agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'tick_volume': 'sum'}
+        for c in ('spread', 'real_volume'):
+            if c in df.columns:
+                agg[c] = 'last' if c == 'spread' else 'sum'
+        df = df.resample(f'{timeframe}min').agg(agg).dropna()
+        df.insert(0, 'time', df.index.strftime('%Y.%m.%d %H:%M'))
+        return df.reset_index(drop=True)
+
+    def _on_trade(self, comp):
+        action, _type, symbol = comp[1], int(comp[2]), comp[3]
+        _SL, _TP, comment, lots, magic, ticket = comp[5], comp[6], comp[7], float(comp[8]), int(comp[9]), int(comp[10])
+        if action == 'OPEN':
+            bid, ask = self._last_prices.get(symbol, (0.0, 0.0))
+            price = ask if _type % 2 == 0 else bid
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            open_time = strftime('%Y.%m.%d %H:%M:%S', gmtime())
+            self._trades[ticket] = {'_magic': magic, '_symbol': symbol, '_lots': lots, '_type': _type,
+                                    '_open_price': price, '_open_time': open_time, '_SL': _SL, '_TP': _TP,
+                                    '_pnl': 0.0, '_comment': comment}
+            return ("{'_action': 'EXECUTION', '_magic': " + str(magic) + ", '_ticket': " + str(ticket) +
+                    ", '_open_time': '" + open_time + "', '_open_price': " + repr(float(price)) + "}")
+        elif action == 'MODIFY':
+            if ticket not in self._trades:
+                return "{'_action': 'MODIFY', '_ticket': " + str(ticket) + ", '_response': 'NOT_FOUND'}"
+            self._trades[ticket]['_SL'], self._trades[ticket]['_TP'] = _SL, _TP
+            return "{'_action': 'MODIFY', '_ticket': " + str(ticket) + ", '_sl': " + _SL + ", '_tp': " + _TP + "}"
+        elif action in ('CLOSE', 'CLOSE_PARTIAL'):
+            if ticket not in self._trades:
+                return "{'_action': 'CLOSE', '_ticket': " + str(ticket) + ", '_response': 'NOT_FOUND'}"
+            return self._close(ticket, lots if action == 'CLOSE_PARTIAL' else None)
+        elif action in ('CLOSE_MAGIC', 'CLOSE_ALL'):
+            tickets = [t for t in self._trades if action == 'CLOSE_ALL' or self._trades[t]['_magic'] == magic]
+            responses = ', '.join(str(t) + ': ' + self._close(t) for t in tickets)
+            return "{'_action': '" + action + "', '_responses': {" + responses + "}, '_response_value': 'SUCCESS'}"
+        elif action == 'GET_OPEN_TRADES':
+            trades = ', '.join(str(t) + ": {'_magic': " + str(p['_magic']) + ", '_symbol': '" + p['_symbol'] +
+                               "', '_lots': " + repr(p['_lots']) + ", '_type': " + str(p['_type']) +
+                               ", '_open_price': " + repr(float(p['_open_price'])) + ", '_open_time': '" + p['_open_time'] +
+                               "', '_SL': " + p['_SL'] + ", '_TP': " + p['_TP'] + ", '_pnl': 0.0, '_comment': '" + p['_comment'] + "'}"
+                               for t, p in self._trades.items())
+            return "{'_action': 'OPEN_TRADES', '_trades': {" + trades + "}}"
+        return None
+
+    def _close(self, ticket, lots=None):
+        trade = self._trades[ticket]
+        bid, ask = self._last_prices.get(trade['_symbol'], (0.0, 0.0))
+        price = bid if trade['_type'] % 2 == 0 else ask
+        if lots is None or lots >= trade['_lots']:
+            lots = trade['_lots']
+            del self._trades[ticket]
+        else:
+            trade['_lots'] -= lots
+        return ("{'_action': 'CLOSE', '_ticket': " + str(ticket) + ", '_close_price': " + repr(float(price)) +
+                ", '_close_lots': " + repr(lots) + ", '_response': 'CLOSE_MARKET', '_response_value': 'SUCCESS'}")
+
+    ##########################################################################
+    def _publisher_loop(self):
+        positions = {}
+        start_ns = None
+        while self._ACTIVE:
+            symbols = [s for s in self._tracked_symbols if s in self._ticks and len(self._ticks[s]) > 0]
+            if not symbols:
+                sleep(0.01)
+                start_ns = None
+                continue
+            if start_ns is None:
+                start_ns, count = monotonic_ns(), 0
+
+            for s in symbols:
+                i = positions.get(s, 0)
+                if i >= len(self._ticks[s]):
+                    if not self._loop:
+                        continue
+                    i = 0
+                bid, ask = self._ticks[s][i]
+                positions[s] = i + 1
+                self._last_prices[s] = (bid, ask)
+                if self._sequence:
+                    self._sent_ns.append(monotonic_ns())
+                    bid = ask = len(self._sent_ns) - 1
+                self._PUB_SOCKET.send_string(s + " " + str(bid) + self._delimiter + str(ask))
+                self._published += 1
+                count += 1
+
+            if not self._loop and all(positions.get(s, 0) >= len(self._ticks[s]) for s in symbols):
+                sleep(0.01)
+                continue
+
+            # throttle to the configured rate
+            if self._rate > 0:
+                ahead = count / self._rate - (monotonic_ns() - start_ns) / 1e9
+                if ahead > 0.001:
+                    sleep(ahead)
+
+""" -----------------------------------------------------------------------------------------------
+    -----------------------------------------------------------------------------------------------
+    SCRIPT SETUP
+    -----------------------------------------------------------------------------------------------
+    -----------------------------------------------------------------------------------------------
+"""
+if __name__ == "__main__":
+  # replays the preprocessed data of day 0 at 1000 ticks per second
+  server = stand_in_server(_ticks=load_preprocessed_ticks(day=0), _rate=1000)
+  server.run()
+  try:
+    while True:
+      sleep(1)
+  except KeyboardInterrupt:
+    server.stop()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+This Module is used for recording the ticks received on the SUB channel to disk and replaying them later.
+
+Every "SYMBOL BID;ASK" message is appended to a binary file as a fixed-width record (see TICK_RECORD), files are rotated after a given number of records and carry no header, so each of them can be memory-mapped directly with 'numpy.memmap(path, dtype=TICK_RECORD)'. Symbols are mapped to integer ids in a 'symbols.json' file kept next to the record files.
+
+The user registers a 'tick_recorder' object as a SUB data handler of the DWX connector (or passes 'record_ticks=True' to 'fxmanager.simulation.live.run()'), and a 'tick_replayer' object reads the recorded files back at full speed or in real time.
+
+Public Classes:
+    - tick_recorder: SUB data handler that appends every tick to rotating binary record files.
+    - tick_replayer: reads the record files of a directory back as arrays, dataframes or SUB messages.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from os import listdir, makedirs
+from os.path import join, isfile
+from threading import Lock
+from time import sleep, time_ns, strftime, localtime
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+# 32 bytes per tick: receipt time (ns since epoch), symbol id, reserved, bid, ask
+TICK_RECORD = np.dtype([('time_ns', '<i8'),
+                        ('symbol_id', '<u4'),
+                        ('reserved', '<u4'),
+                        ('bid', '<f8'),
+                        ('ask', '<f8')])
+
+def _load_symbols(record_dir):
+    path = join(record_dir, 'symbols.json')
+    if isfile(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+class tick_recorder():
+    """
+    SUB data handler that appends every tick to rotating binary record files in 'record_dir'.
+
+    Args:
+        - record_dir : string with the path to the directory in which the record files are saved (created if missing).
+        - max_records: integer indicating the number of records after which a new file is started.
+        - buffer_size: integer indicating the number of records kept in memory before they are written to disk.
+        - delimiter  : string delimiter between bid and ask in SUB messages.
+        - connector  : 'DWX_ZeroMQ_Connector' object the recorder is registered to, if given, the connector's tick receipt times are recorded, otherwise the time the handler is called.
+
+    Public Methods:
+        - onSubData(): callback invoked by the DWX connector for every SUB message.
+        - flush()    : writes the buffered records to disk.
+        - close()    : flushes and closes the current file.
+    """
+
+    # every tick is recorded, even when the connector conflates the SUB messages
+    _full_ticks = True
+
+    def __init__(self, record_dir, max_records=1000000, buffer_size=4096, delimiter=';', connector=None):
+        makedirs(record_dir, exist_ok=True)
+        self._record_dir = record_dir
+        self._max_records = max_records
+        self._delimiter = delimiter
+        self._connector = connector
+        self._session = strftime('%Y%m%d_%H%M%S', localtime())
+        self._symbols = _load_symbols(record_dir)
+        self._buffer = np.zeros(buffer_size, dtype=TICK_RECORD)
+        self._buffered = 0
+        self._file = None
+        self._file_idx = 0
+        self._file_records = 0
+        self._lock = Lock()
+
+    def _symbol_id(self, symbol):
+        if symbol not in self._symbols:
+            self._symbols[symbol] = len(self._symbols)
+            with open(join(self._record_dir, 'symbols.json'), 'w') as f:
+                json.dump(self._symbols, f, indent=4)
+        return self._symbols[symbol]
+
+    def onSubData(self, data):
+        """
+        Callback to process new data received through the SUB port
+        """
+        _symbol, _msg = data.split(" ")
+        _time_ns = self._connector._Tick_Time_NS[_symbol] if self._connector is not None else time_ns()
+        _prices = _msg.split(self._delimiter)
+        if len(_prices) != 2:
+            return
+        with self._lock:
+            rec = self._buffer[self._buffered]
+            rec['time_ns'] = _time_ns
+            rec['symbol_id'] = self._symbol_id(_symbol)
+            rec['bid'] = float(_prices[0])
+            rec['ask'] = float(_prices[1])
+            self._buffered += 1
+            if self._buffered == len(self._buffer):
+                self._flush()
+
+    def onPullData(self, data):
+        pass
+
+    def _flush(self):
+        written = 0
+        while written < self._buffered:
+            if self._file is None or self._file_records >= self._max_records:
+                if self._file is not None:
+                    self._file.close()
+                    self._file_idx += 1
+                self._file = open(join(self._record_dir, f'ticks_{self._session}_{self._file_idx:04d}.bin'), 'ab')
+                self._file_records = 0
+            n = min(self._buffered - written, self._max_records - self._file_records)
+            self._file.write(self._buffer[written:written + n].tobytes())
+            self._file_records += n
+            written += n
+        self._file.flush()
+        self._buffered = 0
+
+    def flush(self):
+        """
+        writes the buffered records to disk.
+        """
+        with self._lock:
+            if self._buffered:
+                self._flush()
+
+    def close(self):
+        """
+        flushes the buffered records and closes the current file.
+        """
+        with self._lock:
+            if self._buffered:
+                self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class tick_replayer():
+    """
+    reads the record files written by 'tick_recorder' in 'record_dir' back, in file name (i.e. session and rotation) order.
+
+    Args:
+        - record_dir: string with the path to the directory with the record files.
+
+    Public Methods:
+        - files()   : returns the full paths of the record files.
+        - records() : returns the records of every file as read-only memory-mapped numpy arrays.
+        - to_frame(): returns all the records as a pandas dataframe.
+        - replay()  : feeds the records to SUB data handlers as "SYMBOL BID;ASK" messages, at full speed or in real time.
+    """
+
+    def __init__(self, record_dir):
+        self._record_dir = record_dir
+        self._symbols = _load_symbols(record_dir)
+        self._names = {v: k for k, v in self._symbols.items()}
+
+    def files(self):
+        return [join(self._record_dir, f) for f in sorted(listdir(self._record_dir)) if f.startswith('ticks_') and f.endswith('.bin')]
+
+    def records(self, symbols=None):
+        """
+        returns a list with one read-only memory-mapped array of TICK_RECORD per record file, filtered by 'symbols' if given (filtering makes a copy).
+        """
+        out = []
+        ids = None if symbols is None else [self._symbols[s] for s in symbols if s in self._symbols]
+        for path in self.files():
+            recs = np.memmap(path, dtype=TICK_RECORD, mode='r')
+            if ids is not None:
+                recs = recs[np.isin(recs['symbol_id'], ids)]
+            out.append(recs)
+        return out
+
+    def to_frame(self, symbols=None):
+        """
+        returns the records as a pandas dataframe with columns (symbol, bid, ask) and a datetime index (UTC) of the receipt times.
+        """
+        recs = self.records(symbols)
+        recs = np.concatenate(recs) if recs else np.zeros(0, dtype=TICK_RECORD)
+        names = np.array([self._names[i] for i in range(len(self._names))], dtype=object)
+        return pd.DataFrame({'symbol': names[recs['symbol_id']] if len(recs) else [],
+                             'bid': recs['bid'],
+                             'ask': recs['ask']}, index=pd.to_datetime(recs['time_ns'], utc=True))
+
+    def replay(self, handlers, symbols=None, realtime=False, speed=1.0, delimiter=';'):
+        """
+        feeds the records to every handler's onSubData() as "SYMBOL BID;ASK" messages.
+
+        Args:
+            - handlers : list of SUB data handlers (objects with onSubData() method).
+            - symbols  : list of symbols to replay, if None, all symbols are replayed.
+            - realtime : boolean flag, if True, the original time between ticks is kept (divided by 'speed'), otherwise ticks are replayed at full speed.
+            - speed    : float indicating the replay speed multiplier used if 'realtime' is True.
+        Returns:
+            - n: integer indicating the number of replayed ticks.
+        """
+        n = 0
+        start_ns = None
+        for recs in self.records(symbols):
+            for t, sid, bid, ask in zip(recs['time_ns'].tolist(), recs['symbol_id'].tolist(), recs['bid'].tolist(), recs['ask'].tolist()):
+                if realtime:
+                    if start_ns is None:
+                        start_ns, wall_ns = t, time_ns()
+                    ahead = (t - start_ns) / speed - (time_ns() - wall_ns)
+                    if ahead > 0:
+                        sleep(ahead / 1e9)
+                msg = self._names[sid] + " " + repr(bid) + delimiter + repr(ask)
+                for hnd in handlers:
+                    hnd.onSubData(msg)
+                n += 1
+        return n
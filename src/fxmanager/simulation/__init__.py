@@ -2,13 +2,19 @@
 This sub-package contains the modules used for historical and live trading sumulations.
 
 Modules:
+    - clock   : This module contains the clocks used by the live simulator (wall clock and virtual clock for accelerated replay).
+
     - historic: This module contains helper functions used internally in this module and a public function to run historical simulation.
     
     - live    : This module contains helper functions used internally in this module and a public function to run live simulation with live price feed from MT4.
+
+    - replay  : This module contains a replay price source that can be used by the live simulator in place of the MT4 price feed.
 """
 
+from . import clock
 from . import historic
 from . import live
+from . import replay
 import fxmanager._metadata as md
 from __main__ import __dict__
 
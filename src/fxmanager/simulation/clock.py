@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""
+This module contains the clocks used by the live simulator.
+
+'fxmanager.simulation.live.run()' never reads the system time directly, it asks a clock object instead. the default 'wall_clock' follows the system time, so a live session runs in real time. a 'virtual_clock' is bound to a replay price source (see 'fxmanager.simulation.replay') and jumps straight to the time of the next tick whenever the simulator waits, so a whole recorded day runs through the exact same code path as fast as the CPU allows.
+
+Classes:
+    - wall_clock   : clock that follows the system time.
+    - virtual_clock: clock that is advanced by a replay price source.
+"""
+
+import time as _time
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+class wall_clock():
+    """
+    clock that follows the system time.
+
+    Public Methods:
+        - time()     : returns the current time in seconds since the epoch.
+        - localtime(): returns the current time as a struct_time in local time.
+        - sleep()    : suspends execution for the given number of seconds.
+        - idle()     : called by busy-wait loops between two checks, does nothing for the wall clock.
+    """
+
+    def time(self):
+        return _time.time()
+
+    def localtime(self):
+        return _time.localtime(self.time())
+
+    def sleep(self, seconds):
+        _time.sleep(seconds)
+
+    def idle(self):
+        pass
+
+class virtual_clock():
+    """
+    clock that is advanced by a replay price source instead of the system time.
+
+    every call to idle() moves the clock forward to the time of the next event of the bound source, or by 'step' seconds if the next event is further away, and lets the source apply all events up to the new time.
+
+    Args:
+        - start: float indicating the start time in seconds since the epoch, if None, the time of the first event of the bound source is used.
+        - step : float indicating the maximum number of seconds the clock moves forward in one idle() call.
+
+    Public Methods:
+        - bind()     : binds a replay source with next_time() and advance() methods to the clock.
+        - time()     : returns the current virtual time in seconds since the epoch.
+        - localtime(): returns the current virtual time as a struct_time in local time.
+        - sleep()    : advances the virtual time by the given number of seconds.
+        - idle()     : advances the virtual time to the next event (or by 'step' seconds).
+    """
+
+    def __init__(self, start=None, step=1.0):
+        self._now = start
+        self._step = step
+        self._source = None
+
+    def bind(self, source):
+        self._source = source
+        if self._now is None:
+            first = source.next_time()
+            self._now = first if first is not None else _time.time()
+        source.advance(self._now)
+
+    def time(self):
+        return self._now
+
+    def localtime(self):
+        return _time.localtime(self._now)
+
+    def idle(self):
+        target = self._now + self._step
+        if self._source is not None:
+            nxt = self._source.next_time()
+            if nxt is not None and nxt < target:
+                target = max(nxt, self._now)
+        self._now = target
+        if self._source is not None:
+            self._source.advance(self._now)
+
+    def sleep(self, seconds):
+        end = self._now + seconds
+        while self._now < end:
+            self.idle()
+            self._now = min(self._now, end)
@@ -11,6 +11,7 @@ import sys
 from os import getcwd
 from os.path import join
 import pandas as pd 
+from fxmanager.basic.storage import read_time_frame
 import fxmanager._metadata as md
 from __main__ import __dict__
 
@@ -20,7 +21,7 @@ __dict__.update(md.__dict__)
 ##                                                 Helper Functions
 ##########################################################################################################################
 
-def get_prices(day, data_dir=None, time_frame='', currency_pair=''):
+def get_prices(day, data_dir=None, time_frame='', currency_pair='', compact=False):
     """
     helper function to 'fxmanager.simulation.historic.run()' function. gets the bid/ask prices of the given currency_pair & time_frame in the selected day from the 'data_dir\\time_frames' directory.
 
@@ -29,15 +30,14 @@ def get_prices(day, data_dir=None, time_frame='', currency_pair=''):
         - data_dir      : string with the directory or full path to the directory in which application data is kept. If the setup() function is used to create the recommended project structure, the default None value should be used.
         - time_frame    : a string of the timeframe from wich the prices is read.
         - currency_pair : a string of the currency pair from wich the prices is read. 
+        - compact       : boolean flag, if True, the prices are float32 (see 'fxmanager.basic.storage' for the precision guarantees).
     Returns:
         - df: pandas dataframe of the bid & ask prices with columns (ask_open, bid_open, ask_close, bid_close, tick_volume) and a datetime index from the begining to the end off the day with frequency equal to time_frame.
     """
 
     if data_dir is None:
         data_dir = join(getcwd(), 'data')
-    df = pd.read_csv(join(data_dir, 'time_frames', str(day), '1min' , currency_pair+'_1min.csv'), parse_dates=True)
-    df.index = pd.to_datetime(df['time'])
-    df.drop(['time', 'best_rets', 'wrst_rets', 'ask_sample1', 'bid_sample1', 'ask_sample2', 'bid_sample2', 'tick_volume'], axis = 1, inplace = True)
+    df = read_time_frame(join(data_dir, 'time_frames', str(day), '1min', currency_pair+'_1min'), columns=['ask_open', 'bid_open', 'ask_close', 'bid_close'], compact=compact)
     return df
 
 def print_final_state(account, win_rate):
@@ -106,7 +106,7 @@ def close_position(account, ticket, portfolio_prices, portfolio_orders, wins, lo
 ##                                                 Main Function
 ##########################################################################################################################
 
-def run(account, strategy, data_dir=None, portfolios={}, risk_factor=0.95, dynamic_sltp=False, save_logs=False, **kwargs):
+def run(account, strategy, data_dir=None, portfolios={}, risk_factor=0.95, dynamic_sltp=False, save_logs=False, compact=False, **kwargs):
     """
     starts trading simulation with historic prices.
 
@@ -118,6 +118,7 @@ def run(account, strategy, data_dir=None, portfolios={}, risk_factor=0.95, dynam
         - risk_factor           : a float with range from 0 to 1 indicating the percentage of reinvested balance.
         - dynamic_stlp          : boolean flag, if True, stop losses and take profits of opened positions are updated with each simulation step.
         - save_logs             : boolean flag, if the program logs are saved to 'data_dir\\logs\\live_simulation_logs.txt' file.
+        - compact               : boolean flag, if True, the prices of the day are kept as float32 (see 'fxmanager.basic.storage' for the precision guarantees).
         - kwargs                : dictionary to hold any number of arguments required for the strategy object.
     Returns:
         - None
@@ -159,7 +160,7 @@ def run(account, strategy, data_dir=None, portfolios={}, risk_factor=0.95, dynam
             cols.append(cp+'_bid_open')
             cols.append(cp+'_ask_close')
             cols.append(cp+'_bid_close')
-            prices = get_prices(day=day, data_dir=data_dir, time_frame=tf, currency_pair=cp)
+            prices = get_prices(day=day, data_dir=data_dir, time_frame=tf, currency_pair=cp, compact=compact)
             prices.index = pd.date_range(prices.index[0], freq='min', periods=1440)
             portfolio_prices = pd.concat([portfolio_prices, prices], axis=1)
                     
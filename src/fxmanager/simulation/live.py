@@ -4,16 +4,24 @@
 This module contains helper functions used internally in this module and a public function to run live simulation with live price feed from MT4.
 
 Public Functions:
-    - run(): starts trading simulation with live prices from MT4 EA.
+    - run(): starts trading simulation with live prices from MT4 EA (or from a replay price feed on a virtual clock).
 """
 
 import sys
+import io
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
 from os import listdir, getcwd
 from os.path import join
-from time import sleep, time, asctime, localtime
+from time import asctime
+import numpy as np
 import pandas as pd 
-from fxmanager.basic.util import preprocess, get_avg_rets
+from fxmanager.basic.util import preprocess, get_avg_rets, _aggregate_time_frames
+from fxmanager.basic.times import NS_PER_MIN
+from fxmanager.basic.latency import LatencyRecorder
 from fxmanager.dwx.prices_subscriptions import prices_subscriptions as ps
+from fxmanager.dwx.tick_recorder import tick_recorder
+from fxmanager.simulation.clock import wall_clock
 import fxmanager.optimization.eq_weight_optimizer as optim
 import fxmanager.optimization.weight_optimizer as optim_w
 import fxmanager._metadata as md
@@ -25,6 +33,120 @@ __dict__.update(md.__dict__)
 ##                                                 Helper Functions
 ##########################################################################################################################
 
+def get_universe(data_dir):
+    """
+    helper function to 'fxmanager.simulation.live.run()' function. lists the currency pairs and time frames available in the preprocessed data of day 0.
+
+    Returns:
+        - currency_pairs: list with all the currency pairs.
+        - time_frames   : list with all the timeframes ('1min' last).
+    """
+
+    time_frames = listdir(join(data_dir, 'time_frames', '0'))
+    time_frames.append(time_frames[0])
+    time_frames = time_frames[1:]
+    currency_pairs = [x[:6] for x in listdir(join(data_dir, 'time_frames', '0', '1min'))]
+    return currency_pairs, time_frames
+
+def build_portfolio(best_rets_df, wrst_rets_df, currency_pairs, optimization_method, optimization_objective, weight_optimization=False, data_dir=None):
+    """
+    helper function to 'fxmanager.simulation.live.run()' function. runs the portfolio optimizer over the given average best & worst returns.
+
+    Returns:
+        - portfolio: dictionary with keys ('currency_pairs', 'time_frames', 'weights', 'optimized_n', 'optimized_W_R', 'optimized_R_R')
+    """
+
+    best_rets_df.index, wrst_rets_df.index = range(best_rets_df.shape[0]), range(best_rets_df.shape[0]) 
+    if weight_optimization:
+        optimized_portfolio_idxs, optimized_portfolio_tfs, optimized_portfolio_weights, \
+        optimized_n, optimized_W_R, optimized_R_R = optim_w.optimize(best_rets_df,
+                                                                    wrst_rets_df,
+                                                                    data_dir=data_dir,
+                                                                    method=optimization_method,
+                                                                    objective=optimization_objective,
+                                                                    test_run=True)
+    else:
+        optimized_portfolio_idxs, optimized_portfolio_tfs, optimized_portfolio_weights, \
+        optimized_n, optimized_W_R, optimized_R_R = optim.optimize(best_rets_df,
+                                                                    wrst_rets_df,
+                                                                    method=optimization_method,
+                                                                    objective=optimization_objective,
+                                                                    test_run=True)
+    optimized_portfolio_cps = [currency_pairs[x] for x in optimized_portfolio_idxs]
+    
+    portfolio = {'currency_pairs':optimized_portfolio_cps,
+                'time_frames':list(optimized_portfolio_tfs),
+                'weights':list(optimized_portfolio_weights),
+                'optimized_n':optimized_n, 'optimized_W_R':optimized_W_R, 'optimized_R_R':optimized_R_R}
+    return portfolio
+
+def get_live_avg_rets(prices, currency_pairs, time_frames, sleep_time):
+    """
+    helper function to 'fxmanager.simulation.live.run()' function. calculates the average best & worst returns of every asset from the bars collected so far in the live session.
+
+    the bars are grouped into candles of each timeframe, the high & low prices of a candle are taken from the open & close prices of its bars, and the best & worst returns are computed by 'fxmanager.basic.util._aggregate_time_frames()', the same code used for the preprocessed data. incomplete candles at the end are ignored, and timeframes without any complete candle are dropped.
+
+    Returns:
+        - avg_best_rets: pandas dataframe of average best return for each asset, columns are time_frames and index is currency_pairs.
+        - avg_wrst_rets: pandas dataframe of average worst return for each asset, columns are time_frames and index is currency_pairs.
+    """
+
+    # every candle spans a whole number of bars (at least one), the timeframes are aggregated at their candle length
+    # (in integer ns, 'sleep_time' may be a fraction of a minute)
+    bar_ns = int(round(sleep_time * NS_PER_MIN))
+    candle_freqs = {}
+    for tf in time_frames:
+        if tf[1].isalpha():
+            n = max(int(int(tf[0]) / sleep_time), 1)
+        else:
+            n = max(int(int(tf[:2]) / sleep_time), 1)
+        if len(prices) >= n:
+            candle_freqs[tf] = (f'{n * bar_ns}ns', len(prices) // n)
+
+    # the open & close prices of every bar are placed at its start and middle, the candles start at the first bar
+    bar_starts = np.arange(len(prices), dtype=np.int64) * bar_ns
+    index = pd.DatetimeIndex(np.column_stack([bar_starts, bar_starts + bar_ns // 2]).ravel().view('datetime64[ns]'))
+    best = {tf: [] for tf in candle_freqs}
+    wrst = {tf: [] for tf in candle_freqs}
+    for cp in currency_pairs:
+        if not candle_freqs:
+            break
+        bid = prices[[cp+'_bid_open', cp+'_bid_close']].to_numpy(dtype=np.float64).ravel()
+        ask = prices[[cp+'_ask_open', cp+'_ask_close']].to_numpy(dtype=np.float64).ravel()
+        tf_dfs = _aggregate_time_frames(index, list({freq for freq, _ in candle_freqs.values()}),
+                                        ask, bid, ask, bid, ask, bid, ask, bid, np.ones(len(bid), dtype=np.int64))
+        for tf, (freq, candles) in candle_freqs.items():
+            # the incomplete candle at the end is ignored
+            df = tf_dfs[freq].iloc[:candles]
+            best[tf].append(df['best_rets'].mean())
+            wrst[tf].append(df['wrst_rets'].mean())
+
+    avg_best_rets = pd.DataFrame(index=currency_pairs)
+    avg_wrst_rets = pd.DataFrame(index=currency_pairs)
+    for tf in candle_freqs:
+        avg_best_rets[tf] = best[tf]
+        avg_wrst_rets[tf] = wrst[tf]
+    return avg_best_rets, avg_wrst_rets
+
+def reoptimize_portfolio(prices, currency_pairs, time_frames, sleep_time, optimization_method, optimization_objective, weight_optimization=False, data_dir=None):
+    """
+    helper function to 'fxmanager.simulation.live.run()' function. constructs a new portfolio from the bars collected so far in the live session. runs in a background process, so the optimizer output is discarded.
+
+    Returns:
+        - portfolio: dictionary with keys ('currency_pairs', 'time_frames', 'weights', 'optimized_n', 'optimized_W_R', 'optimized_R_R')
+    """
+
+    best_rets_df, wrst_rets_df = get_live_avg_rets(prices, currency_pairs, time_frames, sleep_time)
+    if best_rets_df.shape[1] == 0:
+        raise ValueError('not enough bars to build a single candle of any timeframe.')
+    with redirect_stdout(io.StringIO()):
+        portfolio = build_portfolio(best_rets_df, wrst_rets_df, currency_pairs,
+                                        optimization_method=optimization_method,
+                                        optimization_objective=optimization_objective,
+                                        weight_optimization=weight_optimization,
+                                        data_dir=data_dir)
+    return portfolio
+
 def optimize_portfolio(data_dir, raw_data_format, optimization_method, optimization_objective, weight_optimization=False, is_preprocessed=True):
     """
     helper function to 'fxmanager.simulation.live.run()' function. Does portfolio optimization using data from previous day. The constructed portfolio is used for live simulation.
@@ -37,10 +159,7 @@ def optimize_portfolio(data_dir, raw_data_format, optimization_method, optimizat
     """
 
     # Extract the time frames and currency pairs lists
-    time_frames = listdir(join(data_dir, 'time_frames', '0'))
-    time_frames.append(time_frames[0])
-    time_frames = time_frames[1:]
-    currency_pairs = [x[:6] for x in listdir(join(data_dir, 'time_frames', '0', '1min'))]
+    currency_pairs, time_frames = get_universe(data_dir)
     
     ## STAGE 1: Preprocessing Data of Previous 24 Hours
     if not is_preprocessed:
@@ -57,29 +176,13 @@ def optimize_portfolio(data_dir, raw_data_format, optimization_method, optimizat
     print('>> SYSTEM MESSAGE >> STAGE 2: Optimizing Portfolio Parameters ..\n')
     # First load best and worst returns
     best_rets_df, wrst_rets_df = get_avg_rets(day=0, data_dir=join(data_dir,'live_data'), time_frames=time_frames, currency_pairs=currency_pairs)
-    best_rets_df.index, wrst_rets_df.index = range(best_rets_df.shape[0]), range(best_rets_df.shape[0]) 
 
     # Now start optimizing the portfolio
-    if weight_optimization:
-        optimized_portfolio_idxs, optimized_portfolio_tfs, optimized_portfolio_weights, \
-        optimized_n, optimized_W_R, optimized_R_R = optim_w.optimize(best_rets_df,
-                                                                    wrst_rets_df,
-                                                                    method=optimization_method,
-                                                                    objective=optimization_objective,
-                                                                    test_run=True)
-    else:
-        optimized_portfolio_idxs, optimized_portfolio_tfs, optimized_portfolio_weights, \
-        optimized_n, optimized_W_R, optimized_R_R = optim.optimize(best_rets_df,
-                                                                    wrst_rets_df,
-                                                                    method=optimization_method,
-                                                                    objective=optimization_objective,
-                                                                    test_run=True)
-    optimized_portfolio_cps = [currency_pairs[x] for x in optimized_portfolio_idxs]
-    
-    portfolio = {'currency_pairs':optimized_portfolio_cps,
-                'time_frames':optimized_portfolio_tfs,
-                'weights':optimized_portfolio_weights,
-                'optimized_n':optimized_n, 'optimized_W_R':optimized_W_R, 'optimized_R_R':optimized_R_R}
+    portfolio = build_portfolio(best_rets_df, wrst_rets_df, currency_pairs,
+                                    optimization_method=optimization_method,
+                                    optimization_objective=optimization_objective,
+                                    weight_optimization=weight_optimization,
+                                    data_dir=data_dir)
     
     currency_pairs = portfolio['currency_pairs']
     time_frames = portfolio['time_frames']
@@ -89,15 +192,21 @@ def optimize_portfolio(data_dir, raw_data_format, optimization_method, optimizat
 
     return portfolio, currency_pairs, time_frames, weights
 
-def get_price(currency_pairs, price_feed, sleep_time):
+def get_price(currency_pairs, price_feed, sleep_time, latency=None, clock=None):
     """
     helper function to 'fxmanager.simulation.live.run()' function. gets the current prices of portfolio assets from price feed.
 
+    the bar length is measured on 'clock' ('fxmanager.simulation.clock.wall_clock' if None), a virtual clock is advanced to the next tick between two reads instead of busy-waiting.
+
+    if a 'fxmanager.basic.latency.LatencyRecorder' object is passed in 'latency', the receipt times of the ticks the bar closed on are handed to it once the bar is complete.
+
     Returns:
         - price_every_iter_df: pandas dataframe with length = 1 and (4* number of currency pairs) columns. Each asset has 4 columns as follows, (000000_bid_open, 000000_ask_open, 000000_bid_close, 000000_ask_close) where 000000 is replaced with currency pair symbol.
     """
 
-    t = time()
+    if clock is None:
+        clock = wall_clock()
+    t = clock.time()
     price_every_iter = {}
     
     # get open prices
@@ -107,22 +216,32 @@ def get_price(currency_pairs, price_feed, sleep_time):
         price_every_iter[cp+'_ask_open'] = max(prices)
 
     # get close prices
-    while (time()-t) < (sleep_time*60):
+    tick_ns = {}
+    while (clock.time()-t) < (sleep_time*60):
         for cp in currency_pairs:
             prices = price_feed._recent_prices[cp]
             price_every_iter[cp+'_bid_close'] = min(prices)
             price_every_iter[cp+'_ask_close'] = max(prices)
+            if latency is not None:
+                tick_ns[cp] = price_feed._recent_prices_ns.get(cp)
+        clock.idle()
     
+    if latency is not None:
+        latency.bar_complete(tick_ns)
+
     price_every_iter_df = pd.DataFrame(price_every_iter, index=[0])
     return price_every_iter_df
 
-def print_live_state(account, win_rate):
+def print_live_state(account, win_rate, clock=None):
     """
     helper function to 'fxmanager.simulation.live.run()' function. prints the current state of the portfolio.
     """
 
+    if clock is None:
+        clock = wall_clock()
+
     print('-----------------------------------------------------------------------------------------------------------')
-    print(f'\n>> PROCESS MESSAGE >>  Account State At {asctime(localtime(time()))}:')
+    print(f'\n>> PROCESS MESSAGE >>  Account State At {asctime(clock.localtime())}:')
     print(f'>> PROCESS MESSAGE >> Balance          : {round(account._balance,2)}$')
     print(f'>> PROCESS MESSAGE >> Equity           : {round(account._live_equity,2)}$')
     print(f'>> PROCESS MESSAGE >> Margin           : {round(account._margin,2)}$')
@@ -205,10 +324,14 @@ def close_position(account, ticket, portfolio_prices, portfolio_orders, wins, lo
 ##########################################################################################################################
 
 def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={}, weight_optimization=False, is_preprocessed=True,raw_data_format='',
-        optimization_method='', optimization_objective='', sleep_time=1, risk_factor=1, dynamic_sltp=False, sync_zero=False, save_logs=False, **kwargs):
+        optimization_method='', optimization_objective='', sleep_time=1, risk_factor=1, dynamic_sltp=False, sync_zero=False, save_logs=False,
+        latency_stats=False, latency_dump_every=60, record_ticks=False, clock=None, price_feed=None,
+        reoptimize_every=0, reoptimize_universe=None, zmq_options={}, connector_metrics=False, **kwargs):
     """
     starts trading simulation with live prices from MT4 EA.
 
+    the same code path can be driven by recorded or historical prices by passing a 'fxmanager.simulation.replay.replay_feed' object in 'price_feed', its virtual clock jumps from tick to tick so a whole day is simulated in seconds.
+
     Args: 
         - account               : account object with all account information.
         - strategy              : strategy object with the trading strategy information.
@@ -225,6 +348,15 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
         - dynamic_stlp  : boolean flag, if True, stop losses and take profits of opened positions are updated with each simulation step.
         - sync_zero             : boolean flag, if True, the simulation starts when the seconds in current time = 0.
         - save_logs             : boolean flag, if the program logs are saved to 'data_dir\\logs\\live_simulation_logs.txt' file.
+        - latency_stats         : boolean flag or a 'fxmanager.basic.latency.LatencyRecorder' object, if set, the delays from tick receipt to bar completion, strategy return and position open/close are recorded per currency pair and dumped to 'data_dir\\logs\\live_latency.csv' file.
+        - latency_dump_every    : float indicating the number of seconds between two dumps of the latency stats (and of the connector metrics). This argument is only used when 'latency_stats' or 'connector_metrics' is set.
+        - record_ticks          : boolean flag, if True, every tick received from the price feed is recorded to binary files in 'data_dir\\tick_records' directory (see 'fxmanager.dwx.tick_recorder').
+        - clock                 : clock object used for all timing ('fxmanager.simulation.clock'), if None, the clock of 'price_feed' is used if it has one, otherwise the wall clock.
+        - price_feed            : price feed object to be used instead of subscribing to MT4 (e.g. 'fxmanager.simulation.replay.replay_feed'), if None, the portfolio currency pairs are subscribed to with 'fxmanager.dwx.prices_subscriptions'.
+        - reoptimize_every      : float indicating the number of minutes between two portfolio re-optimizations, 0 disables re-optimization. the optimizer runs on a background process over the bars collected so far ('optimization_method', 'optimization_objective' and 'weight_optimization' are used), and the new portfolio is swapped in at the first bar boundary after it is ready. positions of currency pairs that leave the portfolio are kept until their period is over.
+        - reoptimize_universe   : dictionary with keys (currency_pairs, time_frames) of the candidate assets for re-optimization, all of them are subscribed to. if None, all the preprocessed currency pairs & timeframes are used if 'construct_portfolio' is True, otherwise the ones in the portfolio.
+        - zmq_options           : dictionary with extra arguments to the DWX ZeroMQ connector of the MT4 price feed (e.g. {'_reactor': True} to block only in poll() and drain all ready ticks without sleeping, {'_conflate': True} to handle only the latest of the ready ticks of every currency pair).
+        - connector_metrics     : boolean flag, if True, the message, error, handler time and send counters of the MT4 price feed connector ('fxmanager.dwx.metrics') are dumped to 'data_dir\\logs\\connector_metrics.csv' file.
         - kwargs                : dictionary to hold any number of arguments required for the strategy object.
     Returns:
         - None
@@ -234,10 +366,20 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
         data_dir = join(getcwd(), 'data')
     if save_logs:
         sys.stdout = open(join(data_dir,'logs','back_test_logs.txt'), 'w')
+    if isinstance(latency_stats, LatencyRecorder):
+        latency = latency_stats
+    elif latency_stats:
+        latency = LatencyRecorder(dump_path=join(data_dir, 'logs', 'live_latency.csv'), dump_every=latency_dump_every)
+    else:
+        latency = None
+    if connector_metrics:
+        zmq_options = {'_metrics_dump_path': join(data_dir, 'logs', 'connector_metrics.csv'), '_metrics_dump_every': latency_dump_every, **zmq_options}
+    if clock is None:
+        clock = getattr(price_feed, '_clock', None) or wall_clock()
 
     print('-----------------------------------------------------------------------------------------------------------')
     print('-----------------------------------------------------------------------------------------------------------')
-    print(f'                                   >> {asctime(localtime(time()))} <<')
+    print(f'                                   >> {asctime(clock.localtime())} <<')
     print('-----------------------------------------------------------------------------------------------------------')
     print('-----------------------------------------------------------------------------------------------------------')
 
@@ -254,10 +396,28 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
         time_frames = portfolio['time_frames']
         weights = portfolio['weights']
 
+    # Candidate assets for background re-optimization
+    reoptimization = None
+    if reoptimize_every:
+        if reoptimize_universe is not None:
+            universe_cps, universe_tfs = reoptimize_universe['currency_pairs'], reoptimize_universe['time_frames']
+        elif construct_portfolio:
+            universe_cps, universe_tfs = get_universe(data_dir)
+        else:
+            universe_cps, universe_tfs = list(dict.fromkeys(currency_pairs)), list(dict.fromkeys(time_frames))
+        feed_cps = list(dict.fromkeys(list(currency_pairs) + list(universe_cps)))
+        next_reoptimization = reoptimize_every
+        executor = ProcessPoolExecutor(max_workers=1)
+    else:
+        feed_cps = currency_pairs
 
     # STAGE 3: Subscribe to The Price Feed of Currency Pairs in The Portfolio
     print('>> SYSTEM MESSAGE >> STAGE 3: Subscribing to The Price Feed of Currency Pairs in The Portfolio ..\n')
-    price_feed = ps(_symbols=currency_pairs)
+    if price_feed is None:
+        price_feed = ps(_symbols=feed_cps, _zmq_options=zmq_options)
+    if record_ticks and hasattr(price_feed, '_zmq'):
+        recorder = tick_recorder(record_dir=join(data_dir, 'tick_records'), connector=price_feed._zmq)
+        price_feed._zmq._subdata_handlers.append(recorder)
     price_feed.run()
     print('\n>> SYSTEM MESSAGE >> Successfully Connected To Live Price Feed!\n')
 
@@ -272,19 +432,19 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
     win_rate = 0
     try:
         # wait until initial prices are available
-        for cp in currency_pairs:
-            while price_feed._recent_prices[cp] == 0:
-                pass
+        for cp in feed_cps:
+            while price_feed._recent_prices[cp] == 0 and not price_feed.isFinished():
+                clock.idle()
         
         # wait until seconds == 0 befor starting the main loop (to sync with local time)
         if sync_zero:
-            while localtime(time()).tm_sec != 0:
-                pass
+            while clock.localtime().tm_sec != 0:
+                clock.idle()
         
         ## Main Loop
         while not price_feed.isFinished():
             try:
-                price_every_iter_df = get_price(currency_pairs=currency_pairs, price_feed=price_feed, sleep_time=sleep_time)
+                price_every_iter_df = get_price(currency_pairs=feed_cps, price_feed=price_feed, sleep_time=sleep_time, latency=latency, clock=clock)
                 portfolio_prices = pd.concat([portfolio_prices, price_every_iter_df], ignore_index=True)
 
                 # Update account state with current prices and check periods again
@@ -295,12 +455,32 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
                 for ticket in tickets:
                     period = account._positions[ticket]['period']
                     if period == 0:
+                        cp = account._positions[ticket]['base_currency'] + account._positions[ticket]['quote_currency']
                         portfolio_orders, wins, losses, win_rate = close_position(account=account,
                                                                                 ticket=ticket,
                                                                                 portfolio_prices=portfolio_prices,
                                                                                 portfolio_orders=portfolio_orders,
                                                                                 wins=wins,
                                                                                 losses=losses)
+                        if latency is not None:
+                            latency.record(cp, 'close')
+
+                # Swap in the re-optimized portfolio at the bar boundary and schedule the next re-optimization
+                if reoptimize_every:
+                    if reoptimization is not None and reoptimization.done():
+                        try:
+                            portfolio = reoptimization.result()
+                            currency_pairs = portfolio['currency_pairs']
+                            time_frames = portfolio['time_frames']
+                            weights = portfolio['weights']
+                            print(f'\n>> PROCESS MESSAGE >> Portfolio is re-optimized: {currency_pairs} {time_frames} {[round(float(w), 4) for w in weights]}\n')
+                        except Exception as e:
+                            print(f'\n>> PROCESS MESSAGE >> Portfolio re-optimization failed, keeping the current portfolio: {e}\n')
+                        reoptimization = None
+                    if reoptimization is None and len(portfolio_prices)*sleep_time >= next_reoptimization:
+                        reoptimization = executor.submit(reoptimize_portfolio, portfolio_prices, universe_cps, universe_tfs, sleep_time,
+                                                         optimization_method, optimization_objective, weight_optimization, data_dir)
+                        next_reoptimization = len(portfolio_prices)*sleep_time + reoptimize_every
                 
                 # Loop Through portfolio assets and add positions
                 for cp, tf, w in zip(currency_pairs, time_frames, weights):
@@ -313,6 +493,8 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
                     strategy._currency_pair = cp
                     strategy._time_frame = tf
                     orders = strategy.get_orders(prices = portfolio_prices, **kwargs)
+                    if latency is not None:
+                        latency.record(cp, 'strategy')
                     order = orders.iloc[-1]
                     order_idx = orders.index[-1]
                     order_ticket = cp + '_' + tf + str(order_idx)
@@ -340,6 +522,8 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
                                                             period = period,
                                                             order_idx = order_idx,
                                                             risk_factor = risk_factor)
+                        if latency is not None and is_opened:
+                            latency.record(cp, 'open')
                         # if the position couldn't be opened, break out of the main loop and print account state
                         if not is_opened:
                             print('\n>> PROCESS MESSAGE >> Balance is not enough to open a new position!\n')
@@ -358,7 +542,10 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
                     break
 
                 # print account state every minute
-                print_live_state(account=account, win_rate=win_rate)
+                print_live_state(account=account, win_rate=win_rate, clock=clock)
+
+                if latency is not None:
+                    latency.maybe_dump()
                 
             except UnboundLocalError:
                 print('\n>> PROCESS MESSAGE >> No orders are placed yet!\n')
@@ -381,6 +568,18 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
             else:
                 print('>> PROCESS MESSAGE >> Waiting for next update! to stop and save the results press CTRL+C\n')
 
+        # a replay price feed finishes on its own when its ticks are exhausted
+        if account._positions:
+            print('\n>> PROCESS MESSAGE >> Price feed is finished. Closing any remaining positions ..\n')
+            tickets = list(account._positions.keys())
+            for ticket in tickets:
+                portfolio_orders, wins, losses, win_rate = close_position(account=account,
+                                                                        ticket=ticket,
+                                                                        portfolio_prices=portfolio_prices,
+                                                                        portfolio_orders=portfolio_orders,
+                                                                        wins=wins,
+                                                                        losses=losses)
+
     except KeyboardInterrupt:
         price_feed.stop()
         print('\n>> PROCESS MESSAGE >> Process is terminated by user. Closing any remaining positions ..\n')
@@ -392,7 +591,14 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
                                                                     portfolio_orders=portfolio_orders,
                                                                     wins=wins,
                                                                     losses=losses)
+    finally:
+        # shut down on any exit of the main loop, otherwise a running reoptimization keeps the interpreter from exiting until it finishes
+        if reoptimize_every:
+            executor.shutdown(wait=False, cancel_futures=True)
     
+    if record_ticks and hasattr(price_feed, '_zmq'):
+        recorder.close()
+
     print('>> SYSTEM MESSAGE >> All Positions Are Closed Successfully!\n')
     print('>> SYSTEM MESSAGE >> STAGE 5: Saving Stats & Visualizations ..\n')
 
@@ -406,6 +612,18 @@ def run(account, strategy, data_dir=None, construct_portfolio=False, portfolio={
     # Save the orders
     portfolio_orders.to_csv(join(data_dir,'stats', 'live_orders.csv'))
 
+    # Save the latency stats
+    if latency is not None:
+        latency.dump()
+        print('\n>> SYSTEM MESSAGE >> Tick-To-Decision Latency (ms):\n')
+        print(latency.summary().to_string(index=False))
+
+    # Save the connector metrics
+    if connector_metrics and hasattr(price_feed, '_zmq'):
+        price_feed._zmq._Metrics.dump()
+        print('\n>> SYSTEM MESSAGE >> Price Feed Connector Metrics:\n')
+        print(price_feed._zmq._Metrics.summary().to_string(index=False))
+
     print('\n>> SYSTEM MESSAGE >> Execution Finished')
 
     if save_logs:
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+"""
+This module contains a replay price source that can be used by 'fxmanager.simulation.live.run()' in place of the MT4 price feed.
+
+the 'replay_feed' object exposes the same interface the live simulator uses from 'fxmanager.dwx.prices_subscriptions' ('_recent_prices', run(), stop() and isFinished()), but its prices come from recorded ticks or preprocessed historical data and its time is driven by a 'fxmanager.simulation.clock.virtual_clock'. this allows regression testing the live strategy and account logic over a whole day in seconds, and comparing its results against 'fxmanager.simulation.historic.run()' over the same data.
+
+Classes:
+    - replay_feed: price source that replays ticks on a virtual clock.
+"""
+
+import numpy as np
+import pandas as pd
+from os import getcwd
+from os.path import join
+from time import monotonic_ns
+from fxmanager.simulation.clock import virtual_clock
+from fxmanager.dwx.tick_recorder import tick_replayer
+from fxmanager.basic.storage import read_time_frame
+import fxmanager._metadata as md
+from __main__ import __dict__
+
+__dict__.update(md.__dict__)
+
+class replay_feed():
+    """
+    price source that replays ticks on a virtual clock.
+
+    Args:
+        - times  : numpy array of tick times in seconds since the epoch (sorted ascending).
+        - symbols: numpy array of the currency pair of every tick.
+        - bids   : numpy array of the bid price of every tick.
+        - asks   : numpy array of the ask price of every tick.
+        - clock  : 'virtual_clock' object driven by this feed, if None, a new one is created.
+        - compact: boolean flag, if True, the prices are kept as float32 (see 'fxmanager.basic.storage' for the precision guarantees).
+
+    Public Methods:
+        - from_time_frames(): creates a feed from the preprocessed 1-min data of a given day (2 ticks per candle).
+        - from_recording()  : creates a feed from the files written by 'fxmanager.dwx.tick_recorder'.
+        - run()             : binds the feed to its clock and applies the first tick.
+        - stop()            : stops the feed.
+        - isFinished()      : checks if the feed is stopped or exhausted.
+    """
+
+    def __init__(self, times, symbols, bids, asks, clock=None, compact=False):
+        self._times = np.asarray(times, dtype=np.float64)
+        self._tick_symbols = np.asarray(symbols, dtype=object)
+        self._bids = np.asarray(bids, dtype=np.float32 if compact else np.float64)
+        self._asks = np.asarray(asks, dtype=np.float32 if compact else np.float64)
+        self._clock = virtual_clock() if clock is None else clock
+        self._symbols = list(pd.unique(self._tick_symbols))
+        self._recent_prices = {s: 0 for s in self._symbols}
+        self._recent_prices_ns = {}
+        self._recent_prices_time_ns = {}
+        self._pos = 0
+        self._finished = False
+
+    @classmethod
+    def from_time_frames(cls, data_dir=None, day=0, currency_pairs=[], clock=None, compact=False):
+        """
+        creates a feed from the preprocessed 1-min data in 'data_dir\\time_frames\\<day>\\1min'. every candle gives an open tick at the start of the minute and a close tick 1 ms before its end, so a live bar of 'sleep_time' minutes sees the same open/close prices 'fxmanager.simulation.historic.run()' uses.
+        """
+        if data_dir is None:
+            data_dir = join(getcwd(), 'data')
+        times, symbols, bids, asks = [], [], [], []
+        for cp in currency_pairs:
+            df = read_time_frame(join(data_dir, 'time_frames', str(day), '1min', cp + '_1min'), columns=['ask_open', 'bid_open', 'ask_close', 'bid_close'], compact=compact)
+            t = df.index.to_numpy().astype('datetime64[ns]').astype(np.int64) / 1e9
+            times += [t, t + 59.999]
+            symbols += [np.full(len(df), cp, dtype=object)] * 2
+            bids += [df['bid_open'].to_numpy(), df['bid_close'].to_numpy()]
+            asks += [df['ask_open'].to_numpy(), df['ask_close'].to_numpy()]
+        return cls._sorted(times, symbols, bids, asks, clock, compact)
+
+    @classmethod
+    def from_recording(cls, record_dir, currency_pairs=None, clock=None, compact=False):
+        """
+        creates a feed from the tick record files in 'record_dir' written by 'fxmanager.dwx.tick_recorder'.
+        """
+        df = tick_replayer(record_dir).to_frame(currency_pairs)
+        t = df.index.to_numpy().astype('datetime64[ns]').astype(np.int64) / 1e9
+        return cls._sorted([t], [df['symbol'].to_numpy()], [df['bid'].to_numpy()], [df['ask'].to_numpy()], clock, compact)
+
+    @classmethod
+    def _sorted(cls, times, symbols, bids, asks, clock, compact):
+        times = np.concatenate(times)
+        order = np.argsort(times, kind='stable')
+        return cls(times[order], np.concatenate(symbols)[order], np.concatenate(bids)[order], np.concatenate(asks)[order], clock, compact)
+
+    def next_time(self):
+        """
+        returns the time of the next tick, or None if the feed is exhausted.
+        """
+        if self._pos < len(self._times):
+            return self._times[self._pos]
+        return None
+
+    def advance(self, t):
+        """
+        applies all the ticks with time <= t to '_recent_prices'.
+        """
+        end = int(np.searchsorted(self._times, t, side='right'))
+        now_ns = monotonic_ns()
+        for i in range(self._pos, end):
+            self._recent_prices[self._tick_symbols[i]] = [self._bids[i], self._asks[i]]
+            self._recent_prices_ns[self._tick_symbols[i]] = now_ns
+            self._recent_prices_time_ns[self._tick_symbols[i]] = int(self._times[i] * 1e9)
+        self._pos = max(self._pos, end)
+        if self._pos >= len(self._times):
+            self._finished = True
+
+    def isFinished(self):
+        """ Check if execution finished"""
+        return self._finished
+
+    def run(self):
+        """
+        binds the feed to its clock and applies the first tick.
+        """
+        self._finished = False
+        self._clock.bind(self)
+
+    def stop(self):
+        self._finished = True